@@ -1,69 +1,56 @@
-from google.adk.tools.mcp_tool.mcp_toolset import McpToolset
-from google.adk.tools.mcp_tool.mcp_session_manager import StdioConnectionParams
-from mcp import StdioServerParameters
 from google.adk.agents import LlmAgent
 from google.adk.models.google_llm import Gemini
 
 from config import retry_config
+from form_agent.browser import playwright_mcp
+from form_agent.callbacks import cache_extracted_form_schema, extract_form_schema, reduce_snapshot
+from form_agent.fill_tools import fill_form_tool
 from form_agent.config import (
     AGENT_MODEL, 
     FILLER_AGENT_NAME, 
     FILLER_AGENT_OUTPUT_KEY, 
     EXTRACTOR_AGENT_NAME, 
     EXTRACTOR_AGENT_OUTPUT_KEY,
-    MCP_CONNECTION_TIMEOUT,
-    BROWSER_TIMEOUT,
     PAGE_LOAD_TIMEOUT,
     ELEMENT_WAIT_TIMEOUT
 )
 
 
 
-# Playwright MCP integration with timeout configuration
-# NOTE: By sharing the same McpToolset instance across agents, we maintain browser state
-playwright_mcp = McpToolset(
-    connection_params=StdioConnectionParams(
-        server_params=StdioServerParameters(
-            command="npx",  # Run MCP server via npx
-            args=[
-                "-y",  # Argument for npx to auto-confirm install
-                "@playwright/mcp@latest",
-            ],
-            env={
-                "PLAYWRIGHT_TIMEOUT": str(BROWSER_TIMEOUT),
-                "PLAYWRIGHT_NAVIGATION_TIMEOUT": str(PAGE_LOAD_TIMEOUT),
-            }
-        ),
-        timeout=MCP_CONNECTION_TIMEOUT,
-    )
-)
-print("✅ Playwright MCP Tool created with shared session for browser state persistence")
-
-
-
 # Create form extractor agent that uses playwright mcp tool to extract form details
 form_extractor_agent = LlmAgent(
     model=Gemini(model=AGENT_MODEL, retry_options=retry_config),
     name=EXTRACTOR_AGENT_NAME,
     tools=[playwright_mcp],
     output_key=EXTRACTOR_AGENT_OUTPUT_KEY,
+    after_tool_callback=[extract_form_schema, reduce_snapshot],
+    after_agent_callback=cache_extracted_form_schema,
     description="Agent for extracting form details using Playwright MCP Tool",
     instruction=f"""
     You are a helpful assistant that parses and extracts form details and outputs in dictionary format.
     Your primary goal is to open the given url using Playwright MCP Tool to extract form details.
     
+    Browser snapshots are cut down to the form. After the first snapshot of a page, a tool may return only the lines
+    that changed ("-" removed, "+" added) or say the page is unchanged; apply them to the snapshot you saw before.
+
     Steps:
     1. Extract the URL from the user's request.
     2. Navigate to the URL using playwright_mcp tool (timeout: {PAGE_LOAD_TIMEOUT/1000}s).
        - If navigation times out, return error status immediately.
     3. Wait for the page to fully load (max {PAGE_LOAD_TIMEOUT/1000}s).
-    4. Snapshot the form fully and note down ALL form fields as a list.
+    4. Once the page has loaded, take a browser_snapshot of the form and note down ALL form fields as a list.
        - Include field labels, input types, and any required/optional indicators.
+       - Record each field's element ref from the snapshot (e.g. "e15").
+       - If the tool response has an "### Extraction status" saying the extraction is provisional, the page may still be
+         loading: wait for it and call browser_snapshot again instead of answering.
+       - If the tool response ends with "### Extracted form fields" and "### Ambiguous controls", copy the extracted fields
+         unchanged and only work out the label and type of each ambiguous control from the snapshot around its ref.
     5. **CRITICAL: DO NOT CLOSE THE BROWSER** - The browser session must remain open for the form_filler_agent.
     
-    Return the final response with the dictionary format that has the keys "status", "response", and "url".
-    If the operation is successful, the "status" should be "success", "response" should contain the list of form fields, and "url" should contain the form URL.
-    Example: {{"status": "success", "response": ["Full Name", "Email", "Phone", "Resume"], "url": "https://example.com/apply"}}
+    Return the final response with the dictionary format that has the keys "status", "response", "fields" and "url".
+    If the operation is successful, the "status" should be "success", "response" should contain the list of form field labels,
+    "fields" should contain one entry per field with its "label", "type", "required" flag and "ref", and "url" should contain the form URL.
+    Example: {{"status": "success", "response": ["Full Name", "Email", "Resume"], "fields": [{{"label": "Full Name", "type": "text", "required": true, "ref": "e15"}}, {{"label": "Email", "type": "email", "required": true, "ref": "e16"}}, {{"label": "Resume", "type": "file", "required": false, "ref": "e18"}}], "url": "https://example.com/apply"}}
     If the operation fails (timeout, navigation error, etc.), the "status" should be "error" and "response" should contain the error message.
     """,
 )
@@ -72,19 +59,26 @@ form_extractor_agent = LlmAgent(
 form_filler_agent = LlmAgent(
     model=Gemini(model=AGENT_MODEL, retry_options=retry_config),
     name=FILLER_AGENT_NAME,
-    tools=[playwright_mcp],
+    tools=[fill_form_tool, playwright_mcp],
     output_key=FILLER_AGENT_OUTPUT_KEY,
+    after_tool_callback=reduce_snapshot,
     description="Agent for filling out forms using Playwright MCP Tool",
     instruction=f"""
     You are a helpful assistant that fills out forms using playwright_mcp tool by using the available information.
 
+    Browser snapshots are cut down to the form. After the first snapshot of a page, a tool may return only the lines
+    that changed ("-" removed, "+" added) or say the page is unchanged; apply them to the snapshot you saw before.
+
     Steps:
     1. **REUSE THE EXISTING BROWSER SESSION** - The browser is already open from form_extractor_agent.
        - Extract the URL from the previous agent's response (look for "url" field).
        - Check if you're already on the correct page. If not, navigate to the URL.
     2. Fill out the form using the information provided from the RAG agent (from the previous response).
-       - Use element wait timeout of {ELEMENT_WAIT_TIMEOUT/1000}s for each field.
-       - If an element is not found within timeout, add it to unfilled_fields.
+       - Call fill_form ONCE with a mapping of every form field label (as extracted) to its value, e.g.
+         fill_form(values={{"Full Name": "John Doe", "Email": "john@example.com", "Country": "Canada"}}).
+       - fill_form applies all fields in a single browser call and returns filled_fields and unfilled_fields; use them as they are.
+       - Only use the playwright_mcp tools yourself for fields fill_form could not fill because of a browser error
+         (element wait timeout of {ELEMENT_WAIT_TIMEOUT/1000}s); if an element is not found, keep it in unfilled_fields.
     3. **IMPORTANT**: Only fill fields where you have corresponding data from the RAG agent.
        - Don't fill out the field when the information is not available.
        - Track which fields were filled and which were skipped.
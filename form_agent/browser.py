@@ -0,0 +1,149 @@
+"""
+Playwright MCP browsers shared by the form agents and the form tools.
+
+Browsers come from a pool of Playwright MCP sessions (see
+form_agent.session_pool). playwright_mcp is the toolset the agents use: it
+serves the tools of the session leased to the current application, so the
+extractor, the filler and the fill_form tool of one application drive the
+same browser, across invocations, while other applications run in their own.
+
+An application is identified by an id kept in session state. start_application
+begins a new one (releasing the browser of the previous one), and
+finish_application closes its page and returns the browser to the pool once
+the user has submitted or abandoned the form. Before an application has been
+started, the session id is used.
+"""
+
+import uuid
+from typing import Any, Dict
+
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.tools import FunctionTool, ToolContext
+from google.adk.tools.mcp_tool.mcp_toolset import McpToolset
+from google.adk.tools.mcp_tool.mcp_session_manager import StdioConnectionParams
+from mcp import StdioServerParameters
+
+from form_agent.config import (
+    MCP_CONNECTION_TIMEOUT,
+    BROWSER_TIMEOUT,
+    PAGE_LOAD_TIMEOUT,
+    FORM_BROWSER_POOL_SIZE,
+    FORM_BROWSER_SESSION_MAX_USES,
+    FORM_BROWSER_HEALTH_CHECK_TIMEOUT,
+    FORM_BROWSER_CHECKOUT_TIMEOUT,
+    FORM_BROWSER_LEASE_TIMEOUT,
+    FORM_APPLICATION_ID_STATE_KEY
+)
+from form_agent.session_pool import McpSessionPool, PooledBrowserToolset
+
+
+def _create_playwright_toolset() -> McpToolset:
+    """Creates a Playwright MCP toolset with its own server process and browser."""
+    # Playwright MCP integration with timeout configuration
+    return McpToolset(
+        connection_params=StdioConnectionParams(
+            server_params=StdioServerParameters(
+                command="npx",  # Run MCP server via npx
+                args=[
+                    "-y",  # Argument for npx to auto-confirm install
+                    "@playwright/mcp@latest",
+                    "--isolated",  # In-memory profile, so several browsers can run side by side
+                ],
+                env={
+                    "PLAYWRIGHT_TIMEOUT": str(BROWSER_TIMEOUT),
+                    "PLAYWRIGHT_NAVIGATION_TIMEOUT": str(PAGE_LOAD_TIMEOUT),
+                }
+            ),
+            timeout=MCP_CONNECTION_TIMEOUT,
+        )
+    )
+
+
+async def _reset_browser(toolset: McpToolset) -> None:
+    """
+    Closes the browser of a toolset that goes back to the idle pool. With an
+    isolated profile this drops the page, cookies and storage of the previous
+    application; the next browser call opens a fresh browser.
+    """
+    tools = {tool.name: tool for tool in await toolset.get_tools()}
+    if "browser_close" not in tools:
+        raise RuntimeError("The Playwright MCP server has no browser_close tool")
+    # No auth or header provider is configured, so the tool needs no tool context
+    response = await tools["browser_close"].run_async(args={}, tool_context=None)
+    if isinstance(response, dict) and response.get("isError"):
+        raise RuntimeError(f"browser_close failed: {response}")
+
+
+def application_lease_key(context: ReadonlyContext) -> str:
+    """The key the browser of the context's application is leased under: its application id, else the session id."""
+    return context.state.get(FORM_APPLICATION_ID_STATE_KEY) or f"session:{context.session.id}"
+
+
+browser_pool = McpSessionPool(
+    _create_playwright_toolset,
+    size=FORM_BROWSER_POOL_SIZE,
+    max_uses=FORM_BROWSER_SESSION_MAX_USES,
+    health_check_timeout=FORM_BROWSER_HEALTH_CHECK_TIMEOUT,
+    checkout_timeout=FORM_BROWSER_CHECKOUT_TIMEOUT,
+    lease_timeout=FORM_BROWSER_LEASE_TIMEOUT,
+    reset=_reset_browser
+)
+
+# NOTE: Every agent of one application gets the same pooled session, which keeps the browser state between them
+playwright_mcp = PooledBrowserToolset(browser_pool, lease_key=application_lease_key)
+print(f"✅ Playwright MCP Tool created with a pool of {FORM_BROWSER_POOL_SIZE} browser session(s), pinned per application")
+
+
+def get_browser_toolset() -> PooledBrowserToolset:
+    """Returns the toolset of the pooled browsers; pass the tool context to its get_tools to get the application's session."""
+    return playwright_mcp
+
+
+async def start_application(tool_context: ToolContext) -> str:
+    """
+    Starts a new application in the session: releases the browser of the
+    previous one, if any, and stores a new application id.
+
+    Returns:
+        The new application id
+    """
+    await browser_pool.checkin(application_lease_key(tool_context))
+    application_id = f"application:{uuid.uuid4().hex}"
+    tool_context.state[FORM_APPLICATION_ID_STATE_KEY] = application_id
+    return application_id
+
+
+async def finish_application(tool_context: ToolContext) -> Dict[str, Any]:
+    """
+    Ends the current job application: closes its browser page and returns
+    the browser to the pool. Call this once the user has submitted the form,
+    or abandoned the application; the form can no longer be reviewed afterwards.
+
+    Args:
+        tool_context: The tool context for ADK
+
+    Returns:
+        A dictionary containing:
+        - status: "success" or "error"
+        - released: Whether the application held a browser
+        - message: Status message
+    """
+    try:
+        application_id = application_lease_key(tool_context)
+        released = await browser_pool.checkin(application_id)
+        tool_context.state[FORM_APPLICATION_ID_STATE_KEY] = None
+        return {
+            "status": "success",
+            "released": released,
+            "message": "Closed the application's browser" if released else "The application held no browser"
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "error_message": str(e),
+            "message": f"Failed to finish application: {str(e)}"
+        }
+
+
+# Create FunctionTools from the functions
+finish_application_tool = FunctionTool(finish_application)
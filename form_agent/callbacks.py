@@ -0,0 +1,270 @@
+"""
+Agent and tool callbacks of the form agents.
+
+The extractor's tool callback fingerprints every page snapshot the
+Playwright MCP tools return. When the form is already in the schema cache,
+the cached field list becomes the agent's response. Otherwise the fields
+are extracted from the snapshot itself. They only become the response once
+the page has settled: an explicit browser_snapshot shows the same form as
+the snapshot before it. Until then, or when some controls cannot be
+labeled, the model sees the snapshot together with the fields extracted so
+far and decides what to do next. Either way the model turn that would list
+the fields is skipped for most forms, and the agent callback stores the
+final answer for the next visit.
+
+reduce_snapshot sits between the browser tools and both agents: snapshots
+are pruned to the form, and once an agent has seen a page it only gets the
+lines that changed since.
+"""
+
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.tools import BaseTool, ToolContext
+
+from form_agent.config import (
+    EXTRACTOR_AGENT_OUTPUT_KEY,
+    FORM_SCHEMA_CACHE_ENABLED,
+    FORM_SCHEMA_CACHE_PATH,
+    FORM_SCHEMA_CACHE_TTL_SECONDS,
+    FORM_SNAPSHOT_KEY_STATE_KEY,
+    FORM_SNAPSHOT_PRUNING_ENABLED,
+    FORM_SNAPSHOT_MAX_TEXT_CHARS,
+    FORM_SNAPSHOT_DIFFS_ENABLED,
+    FORM_SNAPSHOT_STATE_KEY_PREFIX
+)
+from form_agent.extraction import extract_form_fields
+from form_agent.schema_cache import FormSchemaCache
+from form_agent.snapshot import (
+    diff_snapshots,
+    fingerprint,
+    form_controls,
+    normalize_url,
+    page_url,
+    parse_snapshot,
+    prune_snapshot,
+    render_snapshot,
+    replace_snapshot_block,
+    snapshot_block,
+    snapshot_text
+)
+
+logger = logging.getLogger(__name__)
+
+_schema_cache = (
+    FormSchemaCache(FORM_SCHEMA_CACHE_PATH, FORM_SCHEMA_CACHE_TTL_SECONDS)
+    if FORM_SCHEMA_CACHE_ENABLED else None
+)
+
+_CODE_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def _normalize_label(label: str) -> str:
+    return " ".join(str(label).lower().split())
+
+
+def parse_agent_output(output: Any) -> Optional[Dict[str, Any]]:
+    """Parses an agent's dictionary-format response (possibly in a ```json fence); None if it is not one."""
+    if isinstance(output, dict):
+        return output
+    if not isinstance(output, str):
+        return None
+    try:
+        parsed = json.loads(_CODE_FENCE.sub("", output.strip()))
+    except ValueError:
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+
+def _refresh_refs(fields: List[Dict[str, Any]], snapshot_nodes: List[Any]) -> List[Dict[str, Any]]:
+    """Points cached fields at the element refs of the current snapshot, matching them by label in order."""
+    refs_by_label: Dict[str, List[str]] = {}
+    for control in form_controls(snapshot_nodes):
+        if control.ref:
+            refs_by_label.setdefault(_normalize_label(control.name), []).append(control.ref)
+
+    refreshed = []
+    for cached in fields:
+        field = dict(cached)
+        refs = refs_by_label.get(_normalize_label(field.get("label", "")))
+        if refs:
+            field["ref"] = refs.pop(0)
+        refreshed.append(field)
+    return refreshed
+
+
+def _with_text(tool_response: Any, text: str) -> Dict[str, Any]:
+    """Returns a copy of an MCP tool response whose text content is replaced by text."""
+    response = dict(tool_response) if isinstance(tool_response, dict) else {}
+    response["content"] = [{"type": "text", "text": text}]
+    return response
+
+
+def _reduce_snapshot_text(tool_context: ToolContext, text: str) -> Optional[str]:
+    """
+    Prunes the snapshot in a tool response text to the form and, when the
+    calling agent already saw this page, swaps it for the lines that changed.
+    Returns None when the text holds no snapshot.
+    """
+    block = snapshot_block(text)
+    if block is None:
+        return None
+    if FORM_SNAPSHOT_PRUNING_ENABLED:
+        snapshot = render_snapshot(prune_snapshot(parse_snapshot(text), FORM_SNAPSHOT_MAX_TEXT_CHARS))
+    else:
+        snapshot = block.rstrip("\n")
+
+    # Each agent diffs against the last snapshot it saw itself
+    state_key = f"{FORM_SNAPSHOT_STATE_KEY_PREFIX}{tool_context.agent_name}"
+    url = page_url(text)
+    previous = tool_context.state.get(state_key)
+    tool_context.state[state_key] = {"url": url, "snapshot": snapshot}
+
+    replacement = f"```yaml\n{snapshot}\n```"
+    if FORM_SNAPSHOT_DIFFS_ENABLED and previous and previous.get("url") == url:
+        diff = diff_snapshots(previous["snapshot"], snapshot)
+        if not diff:
+            replacement = "(unchanged since the previous snapshot)"
+        elif len(diff) < len(snapshot):
+            replacement = f"Changes since the previous snapshot (\"-\" removed, \"+\" added lines):\n```diff\n{diff}\n```"
+    return replace_snapshot_block(text, replacement)
+
+
+def reduce_snapshot(
+    tool: BaseTool,
+    args: Dict[str, Any],
+    tool_context: ToolContext,
+    tool_response: Any
+) -> Optional[Dict[str, Any]]:
+    """
+    after_tool_callback of both form agents: replaces the page snapshot in a
+    browser tool response by its form subtree, or by a diff against the
+    previous snapshot the agent saw.
+
+    Returns:
+        The reduced tool response, or None when the response holds no snapshot
+    """
+    reduced = _reduce_snapshot_text(tool_context, snapshot_text(tool_response))
+    return _with_text(tool_response, reduced) if reduced is not None else None
+
+
+def _with_extraction_notes(
+    tool_response: Any,
+    tool_context: ToolContext,
+    text: str,
+    fields: List[Dict[str, Any]],
+    ambiguous: List[Dict[str, Any]],
+    settled: bool
+) -> Dict[str, Any]:
+    """
+    Appends the fields extracted so far, whether the page has settled and the
+    controls the model has to resolve to a (reduced) tool response.
+    """
+    text = _reduce_snapshot_text(tool_context, text) or text
+    notes = f"{text}\n\n### Extracted form fields\n{json.dumps(fields)}"
+    if not settled:
+        notes += (
+            "\n\n### Extraction status\nProvisional: the page may still be loading. Once it has loaded, "
+            "call browser_snapshot; the fields are confirmed when the form no longer changes."
+        )
+    if ambiguous:
+        notes += f"\n\n### Ambiguous controls\n{json.dumps(ambiguous)}"
+    return _with_text(tool_response, notes)
+
+
+def extract_form_schema(
+    tool: BaseTool,
+    args: Dict[str, Any],
+    tool_context: ToolContext,
+    tool_response: Any
+) -> Optional[Dict[str, Any]]:
+    """
+    after_tool_callback of the extractor: answers from the schema cache, or
+    from the snapshot itself, when a browser tool response shows a form.
+
+    A form extracted from the snapshot is only answered once the page has
+    settled, i.e. an explicit browser_snapshot shows the same form as the
+    snapshot before it; a navigation snapshot may show a page that is
+    still loading.
+
+    Returns:
+        The extractor response when the form could be answered without the
+        model (the agent then ends without another model turn), the tool
+        response annotated with the extracted fields when the page has not
+        settled yet or some controls are ambiguous, or None to pass the tool
+        response through
+    """
+    text = snapshot_text(tool_response)
+    nodes = parse_snapshot(text)
+    form_fingerprint = fingerprint(nodes)
+    url = page_url(text) or args.get("url")
+    if form_fingerprint is None or not url:
+        return None
+
+    url_key = normalize_url(url)
+    previous = tool_context.state.get(FORM_SNAPSHOT_KEY_STATE_KEY) or {}
+    settled = (
+        tool.name == "browser_snapshot"
+        and previous.get("url_key") == url_key
+        and previous.get("fingerprint") == form_fingerprint
+    )
+    # Remember which form this is and whether it settled, so the schema can be cached after the agent answers
+    form_key = {"url": url, "url_key": url_key, "fingerprint": form_fingerprint, "settled": settled}
+
+    fields = _schema_cache.get(url_key, form_fingerprint) if _schema_cache is not None else None
+    if fields is not None:
+        # Only confirmed schemas are cached, so a hit is the complete form even before the page settled
+        fields = _refresh_refs(fields, nodes)
+        source = "cache"
+    else:
+        fields, ambiguous = extract_form_fields(nodes)
+        form_key["extracted_fields"] = len(fields)
+        if ambiguous or not settled:
+            # Leave it to the model to wait for the page or to label the ambiguous controls
+            tool_context.state[FORM_SNAPSHOT_KEY_STATE_KEY] = form_key
+            return _with_extraction_notes(tool_response, tool_context, text, fields, ambiguous, settled)
+        source = "snapshot"
+    tool_context.state[FORM_SNAPSHOT_KEY_STATE_KEY] = form_key
+
+    response = {
+        "status": "success",
+        "response": [field["label"] for field in fields],
+        "fields": fields,
+        "url": url,
+        "source": source
+    }
+    tool_context.state[EXTRACTOR_AGENT_OUTPUT_KEY] = json.dumps(response)
+    tool_context.actions.skip_summarization = True
+    logger.info("Extracted %d form fields for %s from the %s", len(fields), url_key, source)
+    return response
+
+
+def cache_extracted_form_schema(callback_context: CallbackContext) -> None:
+    """
+    after_agent_callback of the extractor: stores a confirmed field list in the schema cache.
+
+    A field list is confirmed when the last snapshot the extractor saw was
+    taken after the page settled and the answer holds at least every field
+    extracted from that snapshot. Anything else may describe a half-loaded
+    form and would be served to every later application to the same URL.
+    """
+    if _schema_cache is None:
+        return None
+    form_key = callback_context.state.get(FORM_SNAPSHOT_KEY_STATE_KEY)
+    output = parse_agent_output(callback_context.state.get(EXTRACTOR_AGENT_OUTPUT_KEY))
+    if not form_key or not form_key.get("settled"):
+        return None
+    if not output or output.get("source") == "cache" or output.get("status") != "success":
+        return None
+
+    fields = output.get("fields")
+    if not isinstance(fields, list) or not all(isinstance(field, dict) and field.get("label") for field in fields):
+        return None
+    if len(fields) < form_key.get("extracted_fields", 0):
+        logger.info("Not caching the form schema of %s: the answer lists fewer fields than the snapshot", form_key["url_key"])
+        return None
+    _schema_cache.put(form_key["url_key"], form_key["fingerprint"], fields)
+    return None
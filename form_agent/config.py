@@ -1,3 +1,9 @@
+import os
+
+
+# Local State Settings
+FORM_LOCAL_STATE_DIR = os.environ.get("FORM_LOCAL_STATE_DIR", ".form_state")  # Directory for on-disk caches
+
 # Agent Settings
 AGENT_MODEL = "gemini-2.5-flash-lite"
 
@@ -15,3 +21,23 @@ BROWSER_TIMEOUT = 30000  # 30 seconds for browser operations
 PAGE_LOAD_TIMEOUT = 60000  # 60 seconds for page loads
 ELEMENT_WAIT_TIMEOUT = 10000  # 10 seconds for element waits
 MCP_CONNECTION_TIMEOUT = 90  # 90 seconds for MCP connection
+
+# Form Schema Cache Settings
+FORM_SCHEMA_CACHE_ENABLED = True  # Reuse the field list of forms seen before instead of asking the model again
+FORM_SCHEMA_CACHE_PATH = os.path.join(FORM_LOCAL_STATE_DIR, "form_schemas.sqlite")  # Normalized URL + form fingerprint -> fields
+FORM_SCHEMA_CACHE_TTL_SECONDS = 30 * 24 * 60 * 60  # Seconds a cached form schema stays valid
+FORM_SNAPSHOT_KEY_STATE_KEY = "temp:form_snapshot_key"  # State key of the URL and fingerprint of the last form snapshot
+
+# Snapshot Reduction Settings
+FORM_SNAPSHOT_PRUNING_ENABLED = True  # Cut browser snapshots down to the form before they reach the agents
+FORM_SNAPSHOT_MAX_TEXT_CHARS = 200  # Characters kept of each run of non-interactive text in a pruned snapshot
+FORM_SNAPSHOT_DIFFS_ENABLED = True  # Send a diff instead of the full snapshot when the page changed only in part
+FORM_SNAPSHOT_STATE_KEY_PREFIX = "temp:form_snapshot:"  # State key prefix (+ agent name) of the last snapshot an agent saw
+
+# Browser Session Pool Settings
+FORM_BROWSER_POOL_SIZE = int(os.environ.get("FORM_BROWSER_POOL_SIZE", "4"))  # Playwright MCP browsers open at once (applications run in parallel)
+FORM_BROWSER_SESSION_MAX_USES = 20  # Applications a browser serves before it is closed and replaced
+FORM_BROWSER_HEALTH_CHECK_TIMEOUT = MCP_CONNECTION_TIMEOUT  # Seconds a browser may take to answer its health check
+FORM_BROWSER_CHECKOUT_TIMEOUT = 300  # Seconds an application waits for a free browser
+FORM_BROWSER_LEASE_TIMEOUT = 60 * 60  # Seconds an application's browser may go unused (e.g. while the user reviews) before it is reclaimed
+FORM_APPLICATION_ID_STATE_KEY = "job:application_id"  # Session state key of the current application, which its browser is leased to
@@ -0,0 +1,182 @@
+"""
+Deterministic form field extraction from accessibility snapshots.
+
+Listing the inputs of a form does not need a model: the Playwright MCP
+snapshot already names every control and its role. extract_form_fields
+turns the controls of a snapshot into a typed field schema (label, role,
+input type, required flag, options, current value and element ref).
+Controls it cannot label are returned separately as ambiguous, so that
+only those go to the model.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from form_agent.snapshot import SnapshotNode, form_subtree, iter_nodes
+
+# Roles turned into fields, with the input type they stand for
+_FIELD_TYPES = {
+    "textbox": "text",
+    "searchbox": "search",
+    "spinbutton": "number",
+    "slider": "range",
+    "combobox": "select",
+    "listbox": "select",
+    "checkbox": "checkbox",
+    "switch": "checkbox",
+    "radio": "radio",
+}
+
+# Text input types recognised from the label
+_TEXT_TYPES = (
+    (re.compile(r"e-?mail", re.IGNORECASE), "email"),
+    (re.compile(r"phone|mobile|telephone", re.IGNORECASE), "tel"),
+    (re.compile(r"\burl\b|website|linkedin|github|portfolio", re.IGNORECASE), "url"),
+    (re.compile(r"\bdate\b|\bdob\b", re.IGNORECASE), "date"),
+)
+
+# Buttons that open a file chooser
+_FILE_BUTTON = re.compile(r"\b(attach|upload|choose file|browse|select file)\b", re.IGNORECASE)
+_REQUIRED = re.compile(r"\s*(\*|\(required\))\s*$", re.IGNORECASE)
+_LABEL_ROLES = frozenset({"text", "generic", "paragraph", "label", "strong", "emphasis", "heading", "legend"})
+
+
+def _node_text(node: SnapshotNode) -> str:
+    """Visible text of a non-interactive node: its name or inline value."""
+    return (node.name or node.value or "").strip()
+
+
+def _clean_label(label: str) -> Tuple[str, bool]:
+    """Strips required markers ("*", "(required)") from a label and reports whether there was one."""
+    label = " ".join(label.split())
+    cleaned = _REQUIRED.sub("", label)
+    return cleaned.strip(" :"), cleaned != label
+
+
+def _preceding_label(siblings: List[SnapshotNode], index: int) -> str:
+    """Text of the nearest non-interactive sibling before a control, used when the control has no name."""
+    for sibling in reversed(siblings[:index]):
+        if sibling.interactive:
+            return ""
+        if sibling.role in _LABEL_ROLES:
+            text = _node_text(sibling) or " ".join(
+                _node_text(child) for child in sibling.children if not child.interactive
+            ).strip()
+            if text:
+                return text
+    return ""
+
+
+def _text_type(label: str) -> str:
+    for pattern, input_type in _TEXT_TYPES:
+        if pattern.search(label):
+            return input_type
+    return "text"
+
+
+def _field(node: SnapshotNode, label: str, input_type: str) -> Dict[str, Any]:
+    label, marked_required = _clean_label(label)
+    field = {
+        "label": label,
+        "role": node.role,
+        "type": input_type,
+        "required": marked_required or "required" in node.attributes,
+        "ref": node.ref,
+    }
+    options = [child for child in iter_nodes(node.children) if child.role == "option"]
+    if options:
+        field["options"] = [option.name for option in options]
+        selected = [option.name for option in options if "selected" in option.attributes]
+        if selected:
+            field["value"] = selected[0] if len(selected) == 1 else selected
+    elif node.role in ("checkbox", "switch"):
+        field["value"] = "checked" in node.attributes
+    elif node.value:
+        field["value"] = node.value
+    return field
+
+
+def extract_form_fields(nodes: List[SnapshotNode]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Extracts the fields of the form(s) in a parsed snapshot.
+
+    Radio buttons become one field per group (options are the radio labels),
+    buttons are skipped except file upload buttons, and disabled controls
+    are skipped.
+
+    Args:
+        nodes: Root nodes returned by form_agent.snapshot.parse_snapshot
+
+    Returns:
+        The fields in document order, and the ambiguous widgets (a "reason",
+        the control's "role", "name" and "ref") the model has to label
+    """
+    fields: List[Dict[str, Any]] = []
+    ambiguous: List[Dict[str, Any]] = []
+
+    def visit(siblings: List[SnapshotNode], group_label: Optional[str] = None) -> None:
+        radios: List[Tuple[SnapshotNode, str]] = []
+
+        def flush_radios() -> None:
+            # Consecutive loose radios form a group, labeled by the text before the first of them
+            if radios:
+                _add_radio_group([radio for radio, _ in radios], radios[0][1] or group_label or "")
+                radios.clear()
+
+        for index, node in enumerate(siblings):
+            if "disabled" in node.attributes:
+                continue
+
+            if node.role == "radio":
+                radios.append((node, _preceding_label(siblings, index)))
+                continue
+            if node.interactive or node.role == "radiogroup":
+                flush_radios()
+
+            if node.role == "radiogroup":
+                radio_nodes = [child for child in iter_nodes(node.children) if child.role == "radio"]
+                label = node.name or _preceding_label(siblings, index) or group_label or ""
+                if radio_nodes:
+                    _add_radio_group(radio_nodes, label)
+                continue
+
+            if node.role == "button":
+                if _FILE_BUTTON.search(node.name):
+                    label = _preceding_label(siblings, index) or node.name
+                    fields.append(_field(node, label, "file"))
+                continue
+
+            if node.role in _FIELD_TYPES:
+                label = node.name or _preceding_label(siblings, index)
+                if not label:
+                    ambiguous.append({"reason": "unlabeled", "role": node.role, "name": node.name, "ref": node.ref})
+                    continue
+                input_type = _FIELD_TYPES[node.role]
+                if node.role == "textbox":
+                    input_type = _text_type(label)
+                elif node.role == "combobox" and not any(child.role == "option" for child in iter_nodes(node.children)):
+                    # A typeahead or custom dropdown whose options only load once it is opened: type into it
+                    input_type = "combobox"
+                fields.append(_field(node, label, input_type))
+                continue
+
+            if node.children:
+                flush_radios()
+                visit(node.children, _node_text(node) if node.role in ("group", "fieldset") else group_label)
+        flush_radios()
+
+    def _add_radio_group(radio_nodes: List[SnapshotNode], label: str) -> None:
+        if not label:
+            for radio in radio_nodes:
+                ambiguous.append({"reason": "unlabeled_radio_group", "role": "radio", "name": radio.name, "ref": radio.ref})
+            return
+        field = _field(radio_nodes[0], label, "radio")
+        field["role"] = "radiogroup"
+        field["options"] = [radio.name for radio in radio_nodes]
+        field["option_refs"] = [radio.ref for radio in radio_nodes]
+        checked = [radio.name for radio in radio_nodes if "checked" in radio.attributes]
+        field["value"] = checked[0] if checked else None
+        fields.append(field)
+
+    visit(form_subtree(nodes))
+    return fields, ambiguous
@@ -0,0 +1,252 @@
+"""
+Batched form filling for the form filler agent.
+
+Filling a form one browser tool call at a time costs a model round trip
+per field. fill_form takes the whole field -> value mapping, resolves every
+field to its element ref and fill type from the schema the extractor
+produced, and applies all fills in a single Playwright MCP browser_fill_form
+call. If the batch call fails, or the server has no batch tool, fields are
+filled one by one without going back to the model. The per-field outcome
+maps directly onto the filler's filled_fields / unfilled_fields.
+
+These browser calls bypass the agents' after_tool_callback, so fill_form
+drops the calling agent's last snapshot afterwards: its next snapshot is
+sent in full rather than diffed against a page that has since changed.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.adk.tools import FunctionTool, ToolContext
+
+from form_agent.browser import get_browser_toolset
+from form_agent.callbacks import parse_agent_output
+from form_agent.config import EXTRACTOR_AGENT_OUTPUT_KEY, FORM_SNAPSHOT_STATE_KEY_PREFIX
+from form_agent.snapshot import iter_nodes, parse_snapshot, snapshot_text
+
+logger = logging.getLogger(__name__)
+
+# Fill types of browser_fill_form for the input types of the extracted schema
+_FILL_TYPES = {
+    "text": "textbox",
+    "email": "textbox",
+    "tel": "textbox",
+    "url": "textbox",
+    "date": "textbox",
+    "number": "textbox",
+    "search": "textbox",
+    "textarea": "textbox",
+    "password": "textbox",
+    "combobox": "textbox",  # Typeahead: typing the value is how it is chosen
+    "select": "combobox",
+    "checkbox": "checkbox",
+    "radio": "radio",
+    "range": "slider",
+}
+
+_TRUE_VALUES = frozenset({"true", "yes", "y", "1", "checked", "on"})
+
+
+def _normalize_label(label: str) -> str:
+    return " ".join(str(label).lower().rstrip("?:* ").split())
+
+
+def _match_option(value: str, options: List[str]) -> Optional[int]:
+    """Index of the option matching value (exactly, then case-insensitively, then as a prefix), or None."""
+    wanted = _normalize_label(value)
+    for matches in (
+        lambda option: option == value,
+        lambda option: _normalize_label(option) == wanted,
+        lambda option: _normalize_label(option).startswith(wanted) or wanted.startswith(_normalize_label(option)),
+    ):
+        for index, option in enumerate(options):
+            if matches(option):
+                return index
+    return None
+
+
+def _plan_fill(field: Dict[str, Any], value: Any) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Turns one field and its value into a browser_fill_form entry.
+
+    Returns:
+        The entry, or None and the reason the field cannot be filled
+    """
+    input_type = field.get("type", "text")
+    if input_type == "file":
+        return None, "file uploads need the file chooser"
+    fill_type = _FILL_TYPES.get(input_type)
+    if fill_type is None:
+        return None, f"unsupported field type '{input_type}'"
+
+    ref = field.get("ref")
+    if fill_type == "checkbox":
+        value = "true" if str(value).strip().lower() in _TRUE_VALUES else "false"
+    elif fill_type in ("combobox", "radio") and field.get("options"):
+        index = _match_option(str(value), field["options"])
+        if index is None:
+            return None, f"'{value}' is not one of the options: {', '.join(field['options'])}"
+        value = field["options"][index]
+        if fill_type == "radio":
+            # A radio group is filled by checking the radio of the chosen option
+            option_refs = field.get("option_refs") or []
+            ref = option_refs[index] if index < len(option_refs) else ref
+            value = "true"
+    if not ref:
+        return None, "the element ref of this field is unknown"
+    return {"name": field["label"], "type": fill_type, "ref": ref, "value": str(value)}, None
+
+
+def _failed(response: Any) -> Optional[str]:
+    """The error of an MCP tool response, or None if it succeeded."""
+    if isinstance(response, dict) and (response.get("isError") or "error" in response):
+        return snapshot_text(response) or str(response.get("error")) or "Unknown error"
+    return None
+
+
+async def _call(tools: Dict[str, Any], name: str, args: Dict[str, Any], tool_context: ToolContext) -> Optional[str]:
+    """Runs one browser tool and returns its error, or None if it succeeded."""
+    try:
+        return _failed(await tools[name].run_async(args=args, tool_context=tool_context))
+    except Exception as e:
+        return str(e)
+
+
+async def _is_checked(tools: Dict[str, Any], ref: str, tool_context: ToolContext) -> Optional[bool]:
+    """Whether the checkbox with ref is checked on the page right now, or None if a fresh snapshot does not show it."""
+    try:
+        response = await tools["browser_snapshot"].run_async(args={}, tool_context=tool_context)
+    except Exception:
+        return None
+    for node in iter_nodes(parse_snapshot(snapshot_text(response))):
+        if node.ref == ref:
+            return node.attributes.get("checked", "false") != "false"
+    return None
+
+
+async def _fill_one(tools: Dict[str, Any], fill: Dict[str, Any], tool_context: ToolContext) -> Optional[str]:
+    """Fills a single field with the per-field browser tools; returns the error, or None."""
+    element = {"element": fill["name"], "ref": fill["ref"]}
+    if fill["type"] in ("textbox", "slider"):
+        return await _call(tools, "browser_type", {**element, "text": fill["value"]}, tool_context)
+    if fill["type"] == "combobox":
+        return await _call(tools, "browser_select_option", {**element, "values": [fill["value"]]}, tool_context)
+    if fill["type"] == "checkbox":
+        # A click toggles, and a failed batch may have set some checkboxes already: set it, or click only when it differs
+        if "browser_fill_form" in tools:
+            return await _call(tools, "browser_fill_form", {"fields": [fill]}, tool_context)
+        checked = await _is_checked(tools, fill["ref"], tool_context) if "browser_snapshot" in tools else None
+        if checked is None:
+            return "could not read the checkbox state from a fresh snapshot"
+        if checked == (fill["value"] == "true"):
+            return None  # Already in the wanted state
+    return await _call(tools, "browser_click", element, tool_context)
+
+
+async def fill_form(
+    values: Dict[str, Any],
+    tool_context: ToolContext
+) -> Dict[str, Any]:
+    """
+    Fills many form fields at once, in a single browser call.
+    Use this instead of filling fields one browser tool call at a time.
+
+    Fields are looked up by label in the schema returned by form_extractor_agent,
+    which gives their element ref, type and options.
+
+    Args:
+        values: Mapping of form field label (as extracted) to the value to fill in,
+            e.g. {"Full Name": "John Doe", "Email": "john@example.com", "Country": "Canada"};
+            for checkboxes use true/false, for dropdowns and radio groups one of the options
+        tool_context: The tool context for ADK
+
+    Returns:
+        A dictionary containing:
+        - status: "success", "partial" or "error"
+        - filled_fields: Fields that were filled, as {"field", "value", "schema_label"}
+        - unfilled_fields: Labels (as passed in values) of the fields that could not be filled
+        - unfilled_reasons: For each unfilled label as passed in values, {"schema_label", "reason"};
+          schema_label is the extracted field it resolved to (None if none matched)
+        - batched: Whether all fills went through one browser_fill_form call
+    """
+    try:
+        extractor_output = parse_agent_output(tool_context.state.get(EXTRACTOR_AGENT_OUTPUT_KEY)) or {}
+        schema = {_normalize_label(field["label"]): field for field in extractor_output.get("fields") or [] if field.get("label")}
+        if not schema:
+            return {
+                "status": "error",
+                "error_message": "No extracted form fields",
+                "message": "Failed to fill form: form_extractor_agent has not extracted the form fields with their refs"
+            }
+
+        # Everything is reported under the labels the caller used, which may differ from the schema's
+        fills: List[Tuple[str, Dict[str, Any], Any]] = []
+        unfilled_reasons: Dict[str, Dict[str, Any]] = {}
+        for label, value in values.items():
+            field = schema.get(_normalize_label(label))
+            if field is None:
+                unfilled_reasons[label] = {"schema_label": None, "reason": "no such field in the extracted form"}
+            elif value is None or (isinstance(value, str) and not value.strip()):
+                unfilled_reasons[label] = {"schema_label": field["label"], "reason": "no value available"}
+            else:
+                fill, reason = _plan_fill(field, value)
+                if fill is None:
+                    unfilled_reasons[label] = {"schema_label": field["label"], "reason": reason}
+                else:
+                    fills.append((label, fill, value))
+
+        filled_fields = []
+        batched = False
+        if fills:
+            toolset = get_browser_toolset()
+            tools = {tool.name: tool for tool in await toolset.get_tools(readonly_context=tool_context)}
+
+            # Apply every fill in one browser call
+            batch_error = "browser_fill_form is not available"
+            if "browser_fill_form" in tools:
+                batch_error = await _call(
+                    tools, "browser_fill_form", {"fields": [fill for _, fill, _ in fills]}, tool_context
+                )
+            if batch_error is None:
+                batched = True
+                filled_fields = [
+                    {"field": label, "value": value, "schema_label": fill["name"]} for label, fill, value in fills
+                ]
+            else:
+                # Fall back to one browser call per field, still without a model turn in between
+                logger.warning("Batch fill failed, filling fields one by one: %s", batch_error)
+                for label, fill, value in fills:
+                    error = await _fill_one(tools, fill, tool_context)
+                    if error is None:
+                        filled_fields.append({"field": label, "value": value, "schema_label": fill["name"]})
+                    else:
+                        unfilled_reasons[label] = {"schema_label": fill["name"], "reason": error}
+
+            # The page changed without the agent seeing a snapshot, so it must not diff against its last one
+            tool_context.state[f"{FORM_SNAPSHOT_STATE_KEY_PREFIX}{tool_context.agent_name}"] = None
+
+        if not unfilled_reasons:
+            status = "success"
+        elif filled_fields:
+            status = "partial"
+        else:
+            status = "error"
+
+        return {
+            "status": status,
+            "filled_fields": filled_fields,
+            "unfilled_fields": list(unfilled_reasons),
+            "unfilled_reasons": unfilled_reasons,
+            "batched": batched,
+            "message": f"Filled {len(filled_fields)} of {len(values)} field(s)" + (" in one browser call" if batched else "")
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "error_message": str(e),
+            "message": f"Failed to fill form: {str(e)}"
+        }
+
+
+# Create FunctionTools from the functions
+fill_form_tool = FunctionTool(fill_form)
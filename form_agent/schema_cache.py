@@ -0,0 +1,83 @@
+"""
+Persistent cache of extracted form schemas.
+
+Application forms are built from a handful of ATS templates, so the same
+form shows up across many postings. Schemas are keyed by the normalized
+form URL and the structural fingerprint of the form's accessibility tree
+(see form_agent.snapshot): a hit means the form has the same controls, so
+its field list can be reused without asking the model again.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class FormSchemaCache:
+    """SQLite-backed mapping of (normalized URL, form fingerprint) to the extracted field list."""
+
+    def __init__(self, path: str, ttl_seconds: float):
+        """
+        Args:
+            path: Path of the SQLite database file (parent directories are created)
+            ttl_seconds: Seconds a cached schema stays valid
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS form_schemas ("
+            " url_key TEXT NOT NULL,"
+            " fingerprint TEXT NOT NULL,"
+            " fields TEXT NOT NULL,"
+            " stored_at REAL NOT NULL,"
+            " hits INTEGER NOT NULL DEFAULT 0,"
+            " PRIMARY KEY (url_key, fingerprint))"
+        )
+        self._connection.commit()
+
+    def get(self, url_key: str, fingerprint: str) -> Optional[List[Dict[str, Any]]]:
+        """Returns the cached fields of a form, or None if it is unknown or expired."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT fields, stored_at FROM form_schemas WHERE url_key = ? AND fingerprint = ?",
+                (url_key, fingerprint)
+            ).fetchone()
+            if row is None:
+                return None
+            if time.time() - row[1] > self.ttl_seconds:
+                self._connection.execute(
+                    "DELETE FROM form_schemas WHERE url_key = ? AND fingerprint = ?", (url_key, fingerprint)
+                )
+                self._connection.commit()
+                return None
+            self._connection.execute(
+                "UPDATE form_schemas SET hits = hits + 1 WHERE url_key = ? AND fingerprint = ?",
+                (url_key, fingerprint)
+            )
+            self._connection.commit()
+        return json.loads(row[0])
+
+    def put(self, url_key: str, fingerprint: str, fields: List[Dict[str, Any]]) -> None:
+        """Stores the field list extracted from a form, replacing any previous entry."""
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO form_schemas (url_key, fingerprint, fields, stored_at) VALUES (?, ?, ?, ?)",
+                (url_key, fingerprint, json.dumps(fields), time.time())
+            )
+            self._connection.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the number of cached schemas and the hits they have served."""
+        with self._lock:
+            entries, hits = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM form_schemas"
+            ).fetchone()
+        return {"entries": entries, "hits": hits}
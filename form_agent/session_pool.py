@@ -0,0 +1,285 @@
+"""
+Pool of Playwright MCP browser sessions.
+
+Every Playwright MCP server process drives one browser, so a single shared
+McpToolset lets the process fill only one form at a time. McpSessionPool
+keeps up to `size` toolsets, each its own server and browser, and leases
+one per application: the first browser tool call of an application checks
+a session out under the application's lease key, and every later call with
+that key (extractor, filler, fill_form) gets the same session until it is
+checked back in. The lease key identifies the application, not a single
+invocation: an application spans several invocations (e.g. when the user
+is asked for their name, or reviews the filled form). Before a checked-in
+session goes back to the idle pool its browser is reset, so the next
+application never sees the previous one's page. Sessions are health-checked
+before they are handed out and recycled after `max_uses` applications.
+
+Every call for a lease key refreshes the lease, so `lease_timeout` bounds
+how long an application may sit idle, not how long it may run. A lease
+idle for longer (an application abandoned before its checkin) is
+reclaimed: its slot is freed at once, but its browser is only closed on
+the next checkin of that key, or once it has stayed idle for another
+`lease_timeout`, so a call still running on it is never cut off. Browsers
+are always closed outside the pool lock.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.tools.base_toolset import BaseToolset
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BrowserSession:
+    """One pooled McpToolset and its usage."""
+    session_id: int
+    toolset: Any
+    uses: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class McpSessionPool:
+    """Checkout/checkin pool of McpToolset sessions, pinned per lease key."""
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        size: int,
+        max_uses: int,
+        health_check_timeout: float,
+        checkout_timeout: float,
+        lease_timeout: float,
+        reset: Optional[Callable[[Any], Awaitable[None]]] = None
+    ):
+        """
+        Args:
+            factory: Creates a new McpToolset (one server process and browser)
+            size: Maximum number of sessions open at the same time
+            max_uses: Applications a session serves before it is closed and replaced
+            health_check_timeout: Seconds a session may take to list its tools before it counts as broken
+            checkout_timeout: Seconds a checkout waits for a free session
+            lease_timeout: Seconds a lease may go unused before it is reclaimed
+            reset: Clears a toolset's browser before it returns to the idle pool;
+                a session whose reset fails is closed instead
+        """
+        self._factory = factory
+        self.size = size
+        self.max_uses = max_uses
+        self.health_check_timeout = health_check_timeout
+        self.checkout_timeout = checkout_timeout
+        self.lease_timeout = lease_timeout
+        self._reset = reset
+        self._ids = itertools.count(1)
+        self._idle: List[BrowserSession] = []
+        self._leases: Dict[str, BrowserSession] = {}
+        self._lease_locks: Dict[str, asyncio.Lock] = {}
+        # Sessions of reclaimed leases, by lease key, waiting to be closed
+        self._reclaimed: Dict[str, BrowserSession] = {}
+        self._opened = 0
+        self._condition = asyncio.Condition()
+
+    async def _healthy(self, session: BrowserSession) -> bool:
+        """A session is healthy when its server answers a tool listing in time (this also reconnects a dropped session)."""
+        try:
+            await asyncio.wait_for(session.toolset.get_tools(), timeout=self.health_check_timeout)
+            return True
+        except Exception as e:
+            logger.warning("Browser session %d failed its health check: %s", session.session_id, e)
+            return False
+
+    async def _close(self, sessions: List[BrowserSession]) -> None:
+        """Closes sessions; must be called without holding the pool lock."""
+        for session in sessions:
+            try:
+                await session.toolset.close()
+            except Exception as e:
+                logger.warning("Could not close browser session %d: %s", session.session_id, e)
+
+    def _reclaim_expired_leases(self) -> bool:
+        """Frees the slots of leases unused for longer than lease_timeout; returns whether any was reclaimed."""
+        now = time.monotonic()
+        expired = [key for key, session in self._leases.items() if now - session.last_used > self.lease_timeout]
+        for key in expired:
+            # The application may still be in a call on this browser, so it is closed later
+            self._reclaimed[key] = self._leases.pop(key)
+            self._opened -= 1
+            logger.warning("Reclaimed browser session lease '%s', unused for over %ss", key, self.lease_timeout)
+        return bool(expired)
+
+    def _take_closable_reclaimed(self, lease_key: Optional[str] = None) -> List[BrowserSession]:
+        """Removes and returns the reclaimed sessions that can be closed: the one of lease_key and those idle for another lease_timeout."""
+        now = time.monotonic()
+        keys = [
+            key for key, session in self._reclaimed.items()
+            if key == lease_key or now - session.last_used > 2 * self.lease_timeout
+        ]
+        return [self._reclaimed.pop(key) for key in keys]
+
+    async def _reserve(self, expires_at: float) -> BrowserSession:
+        """Takes an idle session, or opens a new one while the pool is below its size, waiting for one if needed."""
+        async with self._condition:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._opened < self.size:
+                    self._opened += 1
+                    return BrowserSession(session_id=next(self._ids), toolset=self._factory())
+                if self._reclaim_expired_leases():
+                    continue
+
+                now = time.monotonic()
+                remaining = expires_at - now
+                if remaining <= 0:
+                    raise TimeoutError(f"No browser session became free within {self.checkout_timeout}s")
+                # Wake up for a checkin, or when the next lease may be reclaimed
+                next_expiry = min(
+                    (session.last_used + self.lease_timeout - now for session in self._leases.values()), default=remaining
+                )
+                try:
+                    await asyncio.wait_for(self._condition.wait(), timeout=max(0.0, min(remaining, next_expiry)))
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _discard(self, session: BrowserSession) -> None:
+        """Closes a reserved session and frees its slot."""
+        async with self._condition:
+            self._opened -= 1
+            self._condition.notify()
+        await self._close([session])
+
+    async def checkout(self, lease_key: str) -> BrowserSession:
+        """
+        Returns the session leased to lease_key, leasing a healthy idle or a
+        new session first if there is none. Every checkout refreshes the lease.
+
+        Raises:
+            TimeoutError: If no session became free within checkout_timeout
+        """
+        session = self._leases.get(lease_key)
+        if session is not None:
+            session.last_used = time.monotonic()
+            return session
+
+        # Concurrent first calls of one application must end up with the same session
+        async with self._lease_locks.setdefault(lease_key, asyncio.Lock()):
+            session = self._leases.get(lease_key)
+            if session is not None:
+                session.last_used = time.monotonic()
+                return session
+            if lease_key in self._reclaimed:
+                logger.warning("The browser of lease '%s' was reclaimed while unused; continuing in a new browser", lease_key)
+
+            expires_at = time.monotonic() + self.checkout_timeout
+            while True:
+                candidate = await self._reserve(expires_at)
+                # Health checks (and starting a new browser) run without holding the pool
+                if await self._healthy(candidate):
+                    candidate.last_used = time.monotonic()
+                    self._leases[lease_key] = candidate
+                    return candidate
+                await self._discard(candidate)
+
+    def leased(self, lease_key: str) -> Optional[BrowserSession]:
+        """Returns the session leased to lease_key, if any."""
+        return self._leases.get(lease_key)
+
+    async def checkin(self, lease_key: str) -> bool:
+        """
+        Returns the session leased to lease_key to the pool, after resetting
+        its browser, or closes it once it has served max_uses applications.
+        Also closes the reclaimed session of lease_key and reclaimed sessions
+        that stayed unused, if any.
+
+        Returns:
+            Whether lease_key held a session
+        """
+        self._lease_locks.pop(lease_key, None)
+        to_close = []
+        async with self._condition:
+            to_close.extend(self._take_closable_reclaimed(lease_key))
+            session = self._leases.pop(lease_key, None)
+            recycle = session is not None and session.uses + 1 >= self.max_uses
+            if session is not None:
+                session.uses += 1
+                if recycle:
+                    logger.info("Recycling browser session %d after %d uses", session.session_id, session.uses)
+                    self._opened -= 1
+                    to_close.append(session)
+        await self._close(to_close)
+        if session is None or recycle:
+            return session is not None
+
+        # Reset the browser without holding the pool; the session keeps its slot meanwhile
+        reusable = True
+        if self._reset is not None:
+            try:
+                await asyncio.wait_for(self._reset(session.toolset), timeout=self.health_check_timeout)
+            except Exception as e:
+                logger.warning("Could not reset browser session %d, closing it: %s", session.session_id, e)
+                reusable = False
+        async with self._condition:
+            if reusable:
+                self._idle.append(session)
+            else:
+                self._opened -= 1
+            self._condition.notify()
+        if not reusable:
+            await self._close([session])
+        return True
+
+    async def close(self) -> None:
+        """Closes every session, idle, leased or reclaimed."""
+        async with self._condition:
+            sessions = self._idle + list(self._leases.values()) + list(self._reclaimed.values())
+            self._idle = []
+            self._leases = {}
+            self._reclaimed = {}
+            self._lease_locks = {}
+            self._opened = 0
+            self._condition.notify_all()
+        await self._close(sessions)
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the number of open, idle, leased and reclaimed (not yet closed) sessions."""
+        return {
+            "size": self.size,
+            "open": self._opened,
+            "idle": len(self._idle),
+            "leased": len(self._leases),
+            "reclaimed": len(self._reclaimed)
+        }
+
+
+class PooledBrowserToolset(BaseToolset):
+    """
+    Toolset that serves the browser tools of the session leased to the
+    current application, so all agents and tools of one application share a
+    browser while other applications get their own. ADK lists the tools
+    before every model call, so each step of an application refreshes its lease.
+    """
+
+    def __init__(self, pool: McpSessionPool, lease_key: Callable[[ReadonlyContext], str]):
+        """
+        Args:
+            pool: The pool the sessions are leased from
+            lease_key: Returns the key of the application a context belongs to
+        """
+        super().__init__()
+        self.pool = pool
+        self.lease_key = lease_key
+
+    async def get_tools(self, readonly_context: Optional[ReadonlyContext] = None) -> List[Any]:
+        if readonly_context is None:
+            raise ValueError("Pooled browser tools need the invocation context to pick a session")
+        session = await self.pool.checkout(self.lease_key(readonly_context))
+        return await session.toolset.get_tools(readonly_context)
+
+    async def close(self) -> None:
+        await self.pool.close()
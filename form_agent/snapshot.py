@@ -0,0 +1,347 @@
+"""
+Parsing of Playwright MCP accessibility snapshots.
+
+The Playwright MCP browser tools return the page as a YAML-like
+accessibility tree, one node per line:
+
+    - form "Apply" [ref=e12]:
+      - textbox "Full Name *" [ref=e15]
+      - combobox "Country" [ref=e17]:
+        - option "United States" [selected]
+
+parse_snapshot turns that text into SnapshotNode trees. form_controls lists
+the interactive elements, and fingerprint hashes their structure (roles,
+labels and options, not refs or values) so the same form can be recognised
+on another visit or another posting of the same template.
+
+prune_snapshot cuts a page down to its form before it reaches a model, and
+diff_snapshots lets consecutive snapshots be sent as changes only.
+"""
+
+import difflib
+import hashlib
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Roles of the elements a form is filled through
+INTERACTIVE_ROLES = frozenset({
+    "textbox",
+    "searchbox",
+    "combobox",
+    "listbox",
+    "checkbox",
+    "radio",
+    "switch",
+    "spinbutton",
+    "slider",
+    "button",
+})
+
+_LINE = re.compile(r"^(?P<indent>\s*)- (?P<body>.*)$")
+_NODE = re.compile(
+    r'^(?P<role>[\w/-]+)'
+    r'(?: "(?P<name>(?:[^"\\]|\\.)*)")?'
+    r'(?P<attributes>(?: \[[^\]]*\])*)'
+    r'(?P<colon>:)?(?: (?P<value>.*))?$'
+)
+_ATTRIBUTE = re.compile(r"\[([^\]=]+)(?:=([^\]]*))?\]")
+_YAML_BLOCK = re.compile(r"```yaml\s*\n(.*?)```", re.DOTALL)
+_PAGE_URL = re.compile(r"^- Page URL: (\S+)", re.MULTILINE)
+
+# Query parameters that only track where a visitor came from
+_TRACKING_PARAMS = re.compile(r"^(utm_\w+|gh_src|gh_jid|source|src|ref|referrer|lever-source|lever-origin|fbclid|gclid)$", re.IGNORECASE)
+# Path segments that identify one posting rather than the form template (numbers, hex and UUID ids)
+_ID_SEGMENT = re.compile(r"^(\d+|[0-9a-f]{8,}|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})$", re.IGNORECASE)
+# Query values that identify one posting (short numbers such as page=2 are kept)
+_ID_VALUE = re.compile(r"^(\d{4,}|[0-9a-f]{8,}|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})$", re.IGNORECASE)
+
+
+@dataclass
+class SnapshotNode:
+    """One node of an accessibility snapshot."""
+    role: str
+    name: str = ""
+    ref: Optional[str] = None
+    attributes: Dict[str, str] = field(default_factory=dict)
+    value: Optional[str] = None
+    children: List["SnapshotNode"] = field(default_factory=list)
+
+    @property
+    def interactive(self) -> bool:
+        return self.role in INTERACTIVE_ROLES
+
+
+def snapshot_text(tool_response: Any) -> str:
+    """Returns the text content of an MCP tool response (a CallToolResult dump, a string or a list of parts)."""
+    if tool_response is None:
+        return ""
+    if isinstance(tool_response, str):
+        return tool_response
+    if isinstance(tool_response, dict):
+        if "content" in tool_response:
+            return snapshot_text(tool_response["content"])
+        if "text" in tool_response:
+            return str(tool_response["text"])
+        if "result" in tool_response:
+            return snapshot_text(tool_response["result"])
+        return ""
+    if isinstance(tool_response, (list, tuple)):
+        return "\n".join(text for text in (snapshot_text(part) for part in tool_response) if text)
+    return snapshot_text(getattr(tool_response, "content", None) or getattr(tool_response, "text", None))
+
+
+def snapshot_block(text: str) -> Optional[str]:
+    """Returns the accessibility tree embedded in a tool response text, or None if there is none."""
+    match = _YAML_BLOCK.search(text)
+    if match:
+        return match.group(1)
+    return text if "[ref=" in text else None
+
+
+def replace_snapshot_block(text: str, replacement: str) -> str:
+    """Replaces the accessibility tree embedded in a tool response text (the whole text if it is a bare tree)."""
+    if _YAML_BLOCK.search(text):
+        return _YAML_BLOCK.sub(lambda match: replacement, text, count=1)
+    return replacement
+
+
+def page_url(text: str) -> Optional[str]:
+    """Returns the "Page URL" reported alongside a snapshot, if any."""
+    match = _PAGE_URL.search(text)
+    return match.group(1) if match else None
+
+
+def _unquote(name: str) -> str:
+    return name.replace('\\"', '"').replace("\\\\", "\\")
+
+
+def _parse_line(body: str) -> Optional[SnapshotNode]:
+    if body.startswith("/"):
+        # A property of the parent, e.g. "/url: https://..."
+        return None
+    if body.startswith("text: ") or body == "text:":
+        return SnapshotNode(role="text", value=body[len("text:"):].strip())
+    match = _NODE.match(body)
+    if not match:
+        return SnapshotNode(role="text", value=body.strip())
+
+    attributes = {}
+    ref = None
+    for key, value in _ATTRIBUTE.findall(match.group("attributes") or ""):
+        if key == "ref":
+            ref = value
+        else:
+            attributes[key] = value
+    value = match.group("value")
+    if value is not None and value.startswith('"') and value.endswith('"') and len(value) > 1:
+        value = _unquote(value[1:-1])
+    return SnapshotNode(
+        role=match.group("role"),
+        name=_unquote(match.group("name") or ""),
+        ref=ref,
+        attributes=attributes,
+        value=value
+    )
+
+
+def parse_snapshot(text: str) -> List[SnapshotNode]:
+    """
+    Parses a snapshot (or a tool response text that contains one) into trees.
+
+    Returns:
+        The root nodes, in document order; an empty list if text holds no snapshot
+    """
+    block = snapshot_block(text)
+    if block is None:
+        return []
+
+    roots: List[SnapshotNode] = []
+    stack: List[tuple] = []  # (indent, node)
+    for line in block.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        node = _parse_line(match.group("body"))
+        if node is None:
+            continue
+        indent = len(match.group("indent"))
+        while stack and stack[-1][0] >= indent:
+            stack.pop()
+        if stack:
+            stack[-1][1].children.append(node)
+        else:
+            roots.append(node)
+        stack.append((indent, node))
+    return roots
+
+
+def iter_nodes(nodes: List[SnapshotNode]) -> Iterator[SnapshotNode]:
+    """Yields every node of the trees, depth first in document order."""
+    for node in nodes:
+        yield node
+        yield from iter_nodes(node.children)
+
+
+def form_controls(nodes: List[SnapshotNode]) -> List[SnapshotNode]:
+    """Returns the interactive elements of the trees, in document order."""
+    return [node for node in iter_nodes(nodes) if node.interactive]
+
+
+def _structure(node: SnapshotNode) -> List[Any]:
+    options = [child.name for child in iter_nodes(node.children) if child.role == "option"]
+    return [node.role, " ".join(node.name.lower().split()), options]
+
+
+def fingerprint(nodes: List[SnapshotNode]) -> Optional[str]:
+    """
+    Structural hash of the form controls: their roles, labels and options in
+    order, ignoring refs, values, everything that is not a control and
+    everything outside the form (see form_subtree).
+
+    Returns:
+        A hex digest, or None when the snapshot holds no form controls
+    """
+    controls = form_controls(form_subtree(nodes))
+    if not any(control.role != "button" for control in controls):
+        return None
+    structure = json.dumps([_structure(control) for control in controls], separators=(",", ":"))
+    return hashlib.sha1(structure.encode("utf-8")).hexdigest()
+
+
+def normalize_url(url: str) -> str:
+    """
+    Reduces a form URL to the template it belongs to: lower-cased host,
+    no fragment or tracking parameters, and posting ids in the path
+    and query replaced by "*", e.g. boards.example.com/acme/jobs/4012345 and
+    boards.example.com/acme/jobs/4012399 both become boards.example.com/acme/jobs/*.
+    """
+    parts = urlsplit(url.strip())
+    segments = ["*" if _ID_SEGMENT.match(segment) else segment for segment in parts.path.rstrip("/").split("/")]
+    query = urlencode(sorted(
+        (key, "*" if _ID_VALUE.match(value) else value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _TRACKING_PARAMS.match(key)
+    ), safe="*")
+    return urlunsplit(((parts.scheme or "https").lower(), parts.netloc.lower(), "/".join(segments), query, ""))
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def render_snapshot(nodes: List[SnapshotNode], indent: int = 0) -> str:
+    """Writes trees back in the snapshot format parse_snapshot reads."""
+    lines = []
+    for node in nodes:
+        if node.role == "text":
+            lines.append(f"{' ' * indent}- text: {node.value or ''}")
+            continue
+        line = f"{' ' * indent}- {node.role}"
+        if node.name:
+            line += f" {_quote(node.name)}"
+        line += "".join(f" [{key}={value}]" if value else f" [{key}]" for key, value in node.attributes.items())
+        if node.ref:
+            line += f" [ref={node.ref}]"
+        if node.children:
+            line += ":"
+        elif node.value:
+            line += f": {node.value}"
+        lines.append(line)
+        if node.children:
+            lines.append(render_snapshot(node.children, indent + 2))
+    return "\n".join(lines)
+
+
+# Page regions whose controls (site search, newsletter sign-up, ...) are not part of the form
+_CHROME_ROLES = frozenset({"banner", "navigation", "contentinfo", "complementary", "search"})
+
+
+def _is_field(node: SnapshotNode) -> bool:
+    return node.interactive and node.role not in ("button", "searchbox")
+
+
+def _field_count(node: SnapshotNode) -> int:
+    if node.role in _CHROME_ROLES:
+        return 0
+    return int(_is_field(node)) + sum(_field_count(child) for child in node.children)
+
+
+def form_subtree(nodes: List[SnapshotNode]) -> List[SnapshotNode]:
+    """
+    The part of the page that holds the form: its form elements, or else the
+    deepest node that contains every field, or the whole page without fields.
+    """
+    forms = [node for node in iter_nodes(nodes) if node.role == "form"]
+    if forms:
+        return forms
+
+    total = sum(_field_count(node) for node in nodes)
+    if total == 0:
+        return nodes
+    current = nodes
+    best = nodes
+    while True:
+        containing = [node for node in current if _field_count(node) == total]
+        if len(containing) != 1 or _is_field(containing[0]):
+            return best
+        best = containing
+        current = containing[0].children
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    return text if len(text) <= max_chars else text[:max_chars].rstrip() + "..."
+
+
+def _prune(node: SnapshotNode, max_text_chars: int) -> List[SnapshotNode]:
+    if node.interactive:
+        return [node]
+
+    if not any(descendant.interactive for descendant in iter_nodes(node.children)):
+        # Plain content: one line of (truncated) text
+        text = " ".join(
+            part for part in (
+                (descendant.name or descendant.value or "").strip() for descendant in iter_nodes([node])
+            ) if part
+        )
+        if not text:
+            return []
+        if not node.children:
+            return [SnapshotNode(
+                role=node.role,
+                name=_truncate(node.name, max_text_chars),
+                attributes=dict(node.attributes),
+                value=_truncate(node.value, max_text_chars) if node.value else None
+            )]
+        return [SnapshotNode(role="text", value=_truncate(text, max_text_chars))]
+
+    children = [pruned for child in node.children for pruned in _prune(child, max_text_chars)]
+    if node.role in ("generic", "none", "presentation") and not node.name and not node.value:
+        # Unnamed wrappers only add depth
+        return children
+    return [SnapshotNode(
+        role=node.role,
+        name=node.name,
+        ref=node.ref,
+        attributes=dict(node.attributes),
+        value=node.value,
+        children=children
+    )]
+
+
+def prune_snapshot(nodes: List[SnapshotNode], max_text_chars: int) -> List[SnapshotNode]:
+    """
+    Reduces a page to its form: keeps the form subtree, drops unnamed
+    wrapper elements and collapses every run of non-interactive content to
+    one line of at most max_text_chars characters. Controls and their refs
+    are kept unchanged.
+    """
+    return [pruned for node in form_subtree(nodes) for pruned in _prune(node, max_text_chars)]
+
+
+def diff_snapshots(previous: str, current: str) -> str:
+    """Line diff from one rendered snapshot to the next ("-" removed, "+" added lines)."""
+    lines = difflib.unified_diff(previous.splitlines(), current.splitlines(), n=0, lineterm="")
+    return "\n".join(line for line in lines if not line.startswith(("---", "+++")))
@@ -8,6 +8,7 @@ from google.adk.tools import FunctionTool
 from config import retry_config
 from rag.agent import rag_agent
 from form_agent.agent import form_extractor_agent, form_filler_agent
+from form_agent.browser import start_application, finish_application_tool
 
 from job_application_coordinator.config import AGENT_NAME, AGENT_MODEL, AGENT_OUTPUT_KEY
 
@@ -37,13 +38,15 @@ def retrieve_user_name(tool_context: ToolContext) -> Dict[str, Any]:
     user_name = tool_context.state.get("user:name", "Username not found")
     return {"status": "success", "user_name": user_name}
 
-def save_url(tool_context: ToolContext, url: str) -> Dict[str, Any]:
-    """Save job application URL in session state."""
+async def save_url(tool_context: ToolContext, url: str) -> Dict[str, Any]:
+    """Save job application URL in session state and start a new application for it."""
     if not url or not url.strip():
         return {"status": "error", "message": "URL cannot be empty"}
 
     tool_context.state["job:url"] = url.strip()
-    return {"status": "success", "url": url.strip()}
+    # Each application leases its own pooled browser; this releases the previous application's one
+    application_id = await start_application(tool_context)
+    return {"status": "success", "url": url.strip(), "application_id": application_id}
 
 job_application_coordinator_agent = LlmAgent(
     model=Gemini(model=AGENT_MODEL, retry_options=retry_config),
@@ -53,6 +56,7 @@ job_application_coordinator_agent = LlmAgent(
         FunctionTool(save_user_name),
         FunctionTool(retrieve_user_name),
         FunctionTool(save_url),
+        finish_application_tool,
     ],
     output_key=AGENT_OUTPUT_KEY,
     description="Agent for coordinating job application operations",
@@ -68,13 +72,15 @@ job_application_coordinator_agent = LlmAgent(
        - Save the username using save_user_name tool
 
     STEP 1. FORM EXTRACTION (MANDATORY)
+       - Save the job application URL using save_url tool (this starts a new application)
        - Delegate to form_extractor_agent to extract form fields from the URL
        - The agent will automatically return control after completion
        - On error: Return {"status": "error", "response": error_message}
        - On success: Proceed to step 2
 
     STEP 2. RAG RETRIEVAL (MANDATORY)
-       - Delegate to rag_agent with query: "Retrieve information for user '<USER_NAME>': <field1>, <field2>, ..."
+       - Delegate to rag_agent with query: "Retrieve fields for user '<USER_NAME>': ["<field1>", "<field2>", ...]"
+       - Pass the field labels exactly as extracted; rag_agent retrieves them all in one retrieve_fields call
        - If RAG returns no data: Continue with empty data (don't fail)
        - If RAG returns error: Log it but continue with empty data
        - On success: Proceed to step 3
@@ -102,8 +108,12 @@ job_application_coordinator_agent = LlmAgent(
         }
     }
 
+    STEP 5. FINISH APPLICATION
+       - Call finish_application tool once the user has submitted the form, or abandons the application
+       - Do NOT call it while the user is still reviewing the filled form: it closes the form's browser
+
     CRITICAL RULES:
-    - Execute steps 0→1→2→3→4 in EXACT order
+    - Execute steps 0→1→2→3→4 in EXACT order, and step 5 only when the application is over
     - Do NOT use your judgment to skip or reorder steps
     - Do NOT try to fill forms yourself - always delegate to form_filler_agent
     - Do NOT try to extract forms yourself - always delegate to form_extractor_agent
@@ -36,17 +36,24 @@ rag_agent = LlmAgent(
 
     
     1. GCS OPERATIONS:
-       - Upload files to GCS buckets (ask for bucket name and filename)
-       - Create, list, and get details of buckets
+       - Upload files to GCS buckets (ask for bucket name and filename); all files attached to the message are uploaded in one call
+       - Create, list, and get details of buckets (get_bucket_details returns file statistics; pass list_files=True and follow next_page_token only when the user wants the files themselves)
        - List files in buckets
     
     2. RAG CORPUS MANAGEMENT:
        - Create, update, list and delete corpora
+       - When a corpus holds a user's profile documents, pass owner=<user name> when creating it (or update_rag_corpus with owner to assign an existing one)
+       - When listing corpora, only pass include_file_counts=True if the user asks how many files they hold
        - Import documents from GCS to a corpus (requires gcs_uri)
+       - To import several documents or a whole GCS folder, use bulk_import_documents with gcs_uris or gcs_prefix in ONE call
+       - Uploads and imports whose content is already stored are skipped and reported as "unchanged"; only pass force=True if the user insists on re-uploading or re-importing
        - List, get details, and delete files within a corpus
+       - Show the structured profile extracted from a user's documents with get_user_profile
        
     3. CORPUS SEARCHING:
-       - SEARCH ALL CORPORA: Use search_all_corpora(query_text="your question") to search across ALL available corpora
+       - SEARCH ALL CORPORA: Use search_all_corpora(query_text="your question") to search the current user's corpora (or every corpus when no user is known)
+       - Pass include_all_corpora=True only if the user explicitly asks to search every corpus
+       - If no corpora belong to the user, say so and ask which corpus holds their documents (then assign it with update_rag_corpus owner); never search other users' corpora instead
        - SEARCH SPECIFIC CORPUS: Use query_rag_corpus(corpus_id="ID", query_text="your question") for a specific corpus
        - When the user asks a question or for information, use the search_all_corpora tool by default.
        - If the user specifies a corpus ID, use the query_rag_corpus tool for that corpus.
@@ -55,11 +62,14 @@ rag_agent = LlmAgent(
          - When presenting search results, ALWAYS include the citation information
          - Format each result with its citation at the end: "[Source: Corpus Name (Corpus ID)]"
          - You can find citation information in each result's "citation" field
+         - When a result has a "citations" list, the same text was found in several sources; cite all of them
          - At the end of all results, include a Citations section with the citation_summary information
     
     4. FORM FIELD PROCESSING (for job application pipeline):
-       - If you receive a previous response with form fields (a list of field names), construct a query to retrieve user information for those fields.
-       - Example: If you receive ["Full Name", "Email", "Phone", "Resume"], query: "Retrieve the user's full name, email, phone number, and resume information"
+       - If you receive a previous response with form fields (a list of field names), call retrieve_fields ONCE with the user name and ALL the field names.
+       - Example: If you receive ["Full Name", "Email", "Phone", "Resume"] for user "sukumar", call: retrieve_fields(user="sukumar", fields=["Full Name", "Email", "Phone", "Resume"])
+       - Do not build a free-text query or call search_all_corpora for form fields; retrieve_fields already searches every field separately.
+       - When a snippet has a "value" (from the user's stored profile) or "matched_values", use that exact value for the field instead of re-searching.
        - Pass through the "url" field from the previous response if present.
 
     Always confirm operations before executing them, especially for delete operations.
@@ -80,6 +90,7 @@ rag_agent = LlmAgent(
         corpus_tools.get_corpus_tool,
         corpus_tools.delete_corpus_tool,
         corpus_tools.import_document_tool,
+        corpus_tools.bulk_import_tool,
         
         # RAG file management tools
         corpus_tools.list_files_tool,
@@ -89,6 +100,12 @@ rag_agent = LlmAgent(
         # RAG query tools
         corpus_tools.query_rag_corpus_tool,
         corpus_tools.search_all_corpora_tool,
+        corpus_tools.retrieve_fields_tool,
+        corpus_tools.get_user_profile_tool,
+        corpus_tools.sync_local_index_tool,
+        
+        # RAG diagnostics tools
+        corpus_tools.cache_stats_tool,
         
         # GCS bucket management tools
         storage_tools.create_bucket_tool,
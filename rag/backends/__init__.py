@@ -0,0 +1,63 @@
+"""
+Retrieval backends for the RAG corpus tools.
+
+The backend is selected with RAG_BACKEND in rag/config.py:
+- "vertex": Vertex AI RAG Engine (default)
+- "sqlite": local SQLite FTS5 store with BM25 ranking, for development, CI and load tests
+"""
+
+import threading
+from typing import Optional
+
+from rag.backends.base import (
+    Corpus,
+    FilePage,
+    ImportResult,
+    RagBackend,
+    RagFile,
+    RetrievedContext,
+)
+from rag.config import (
+    PROJECT_ID,
+    LOCATION,
+    RAG_BACKEND,
+    RAG_SQLITE_DB_PATH,
+    RAG_LOCAL_CHUNK_CHARS,
+    RAG_LOCAL_CHUNK_OVERLAP_CHARS,
+)
+
+_backend: Optional[RagBackend] = None
+_backend_lock = threading.Lock()
+
+
+def _storage_client():
+    from rag.tools.gcs_client import get_storage_client
+    return get_storage_client()
+
+
+def get_backend() -> RagBackend:
+    """Returns the configured backend, creating it on first use."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if RAG_BACKEND == "vertex":
+                from rag.backends.vertex import VertexRagBackend
+                _backend = VertexRagBackend(PROJECT_ID, LOCATION)
+            elif RAG_BACKEND == "sqlite":
+                from rag.backends.sqlite_fts import SQLiteFTSBackend
+                _backend = SQLiteFTSBackend(
+                    RAG_SQLITE_DB_PATH,
+                    chunk_chars=RAG_LOCAL_CHUNK_CHARS,
+                    chunk_overlap_chars=RAG_LOCAL_CHUNK_OVERLAP_CHARS,
+                    storage_client_factory=_storage_client
+                )
+            else:
+                raise ValueError(f"Unknown RAG_BACKEND '{RAG_BACKEND}' (expected 'vertex' or 'sqlite')")
+        return _backend
+
+
+def set_backend(backend: Optional[RagBackend]) -> None:
+    """Replaces the active backend, e.g. with a fake in tests; None restores the configured one."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
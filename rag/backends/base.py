@@ -0,0 +1,96 @@
+"""
+Retrieval backend interface used by the RAG corpus tools.
+
+A backend covers corpus CRUD, file CRUD, document import and retrieval.
+Backends return the plain dataclasses defined here so the tools never
+depend on a particular SDK's response objects.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Protocol
+
+
+@dataclass
+class Corpus:
+    """A RAG corpus as returned by a backend."""
+    name: str
+    display_name: Optional[str] = None
+    description: Optional[str] = None
+    create_time: Optional[str] = None
+    update_time: Optional[str] = None
+    state: Optional[str] = None
+    raw: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def id(self) -> str:
+        return self.name.split("/")[-1]
+
+
+@dataclass
+class RagFile:
+    """A document stored in a RAG corpus."""
+    name: str
+    display_name: Optional[str] = None
+    description: Optional[str] = None
+    source_uri: Optional[str] = None
+    create_time: Optional[str] = None
+    update_time: Optional[str] = None
+    size_bytes: Optional[int] = None
+    raw: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def id(self) -> str:
+        return self.name.split("/")[-1]
+
+
+@dataclass
+class FilePage:
+    """One page of a file listing."""
+    files: List[RagFile]
+    next_page_token: Optional[str] = None
+
+
+@dataclass
+class RetrievedContext:
+    """A chunk returned by a retrieval query; higher relevance_score is better."""
+    text: str
+    source_uri: Optional[str] = None
+    relevance_score: Optional[float] = None
+
+
+@dataclass
+class ImportResult:
+    """Outcome of importing a batch of documents."""
+    imported_count: int
+    failed_count: int = 0
+    skipped_count: int = 0
+
+
+class RagBackend(Protocol):
+    """Operations the RAG tools need from a corpus store."""
+
+    name: str
+
+    def create_corpus(self, display_name: str, description: str, embedding_model: str) -> Corpus: ...
+
+    def update_corpus(
+        self, corpus_id: str, display_name: Optional[str] = None, description: Optional[str] = None
+    ) -> Corpus: ...
+
+    def get_corpus(self, corpus_id: str) -> Corpus: ...
+
+    def list_corpora(self) -> List[Corpus]: ...
+
+    def delete_corpus(self, corpus_id: str) -> None: ...
+
+    def import_files(self, corpus_id: str, paths: List[str]) -> ImportResult: ...
+
+    def list_files(self, corpus_id: str, page_size: int, page_token: Optional[str] = None) -> FilePage: ...
+
+    def get_file(self, corpus_id: str, file_id: str) -> RagFile: ...
+
+    def delete_file(self, corpus_id: str, file_id: str) -> None: ...
+
+    def retrieval_query(
+        self, corpus_id: str, text: str, top_k: int, vector_distance_threshold: Optional[float] = None
+    ) -> List[RetrievedContext]: ...
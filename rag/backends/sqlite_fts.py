@@ -0,0 +1,268 @@
+"""
+Local SQLite FTS5 backend with BM25 ranking.
+
+Stores corpora, files and text chunks in a single SQLite database so the
+pipeline can run without Vertex AI, e.g. for development, CI and load tests.
+Documents are read from local paths, file:// URIs or gs:// URIs (through
+the GCS client) and chunked on import. Retrieval is lexical (BM25), so
+vector_distance_threshold does not apply and is ignored.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, List, Optional
+
+from rag.backends.base import Corpus, FilePage, ImportResult, RagFile, RetrievedContext
+from rag.tools.text_extraction import chunk_text, read_document_text
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _fts_query(text: str) -> str:
+    """Turns free text into an FTS5 query matching any of its terms."""
+    return " OR ".join(f'"{token}"' for token in re.findall(r"\w+", text.lower()))
+
+
+class SQLiteFTSBackend:
+    """RAG backend backed by a local SQLite database with an FTS5 chunk index."""
+
+    name = "sqlite"
+
+    def __init__(
+        self,
+        path: str,
+        chunk_chars: int,
+        chunk_overlap_chars: int,
+        storage_client_factory: Optional[Callable[[], Any]] = None
+    ):
+        """
+        Args:
+            path: Path of the SQLite database file (parent directories are created)
+            chunk_chars: Target size of the chunks documents are split into
+            chunk_overlap_chars: Characters repeated between consecutive chunks
+            storage_client_factory: Returns a GCS client, used only for gs:// imports
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._chunk_chars = chunk_chars
+        self._chunk_overlap_chars = chunk_overlap_chars
+        self._storage_client_factory = storage_client_factory
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS corpora (
+                id TEXT PRIMARY KEY,
+                display_name TEXT,
+                description TEXT,
+                embedding_model TEXT,
+                create_time TEXT,
+                update_time TEXT
+            );
+            CREATE TABLE IF NOT EXISTS files (
+                id TEXT PRIMARY KEY,
+                corpus_id TEXT NOT NULL,
+                display_name TEXT,
+                source_uri TEXT,
+                size_bytes INTEGER,
+                create_time TEXT,
+                update_time TEXT
+            );
+            CREATE INDEX IF NOT EXISTS files_corpus ON files (corpus_id, create_time);
+            CREATE VIRTUAL TABLE IF NOT EXISTS chunks USING fts5(
+                text,
+                corpus_id UNINDEXED,
+                file_id UNINDEXED,
+                source_uri UNINDEXED,
+                tokenize = 'porter unicode61'
+            );
+            """
+        )
+        self._connection.commit()
+
+    @staticmethod
+    def _corpus_name(corpus_id: str) -> str:
+        return f"local/ragCorpora/{corpus_id}"
+
+    def _to_corpus(self, row: sqlite3.Row) -> Corpus:
+        return Corpus(
+            name=self._corpus_name(row["id"]),
+            display_name=row["display_name"],
+            description=row["description"],
+            create_time=row["create_time"],
+            update_time=row["update_time"],
+            state="ACTIVE",
+            raw=dict(row)
+        )
+
+    def _to_file(self, row: sqlite3.Row) -> RagFile:
+        return RagFile(
+            name=f"{self._corpus_name(row['corpus_id'])}/ragFiles/{row['id']}",
+            display_name=row["display_name"],
+            source_uri=row["source_uri"],
+            create_time=row["create_time"],
+            update_time=row["update_time"],
+            size_bytes=row["size_bytes"],
+            raw=dict(row)
+        )
+
+    def _require_corpus(self, corpus_id: str) -> sqlite3.Row:
+        row = self._connection.execute("SELECT * FROM corpora WHERE id = ?", (corpus_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"RAG corpus '{corpus_id}' not found")
+        return row
+
+    def create_corpus(self, display_name: str, description: str, embedding_model: str) -> Corpus:
+        corpus_id = uuid.uuid4().hex[:16]
+        now = _now()
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO corpora (id, display_name, description, embedding_model, create_time, update_time)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (corpus_id, display_name, description, embedding_model, now, now)
+            )
+            self._connection.commit()
+            return self._to_corpus(self._require_corpus(corpus_id))
+
+    def update_corpus(
+        self, corpus_id: str, display_name: Optional[str] = None, description: Optional[str] = None
+    ) -> Corpus:
+        with self._lock:
+            row = self._require_corpus(corpus_id)
+            self._connection.execute(
+                "UPDATE corpora SET display_name = ?, description = ?, update_time = ? WHERE id = ?",
+                (display_name or row["display_name"], description or row["description"], _now(), corpus_id)
+            )
+            self._connection.commit()
+            return self._to_corpus(self._require_corpus(corpus_id))
+
+    def get_corpus(self, corpus_id: str) -> Corpus:
+        with self._lock:
+            return self._to_corpus(self._require_corpus(corpus_id))
+
+    def list_corpora(self) -> List[Corpus]:
+        with self._lock:
+            rows = self._connection.execute("SELECT * FROM corpora ORDER BY create_time").fetchall()
+        return [self._to_corpus(row) for row in rows]
+
+    def delete_corpus(self, corpus_id: str) -> None:
+        with self._lock:
+            self._require_corpus(corpus_id)
+            self._connection.execute("DELETE FROM chunks WHERE corpus_id = ?", (corpus_id,))
+            self._connection.execute("DELETE FROM files WHERE corpus_id = ?", (corpus_id,))
+            self._connection.execute("DELETE FROM corpora WHERE id = ?", (corpus_id,))
+            self._connection.commit()
+
+    def _expand_paths(self, paths: List[str]) -> List[str]:
+        """Expands local directories into the files they contain."""
+        expanded = []
+        for path in paths:
+            local_path = path[len("file://"):] if path.startswith("file://") else path
+            if not path.startswith("gs://") and os.path.isdir(local_path):
+                for root, _, names in os.walk(local_path):
+                    expanded.extend(os.path.join(root, name) for name in sorted(names))
+            else:
+                expanded.append(path)
+        return expanded
+
+    def import_files(self, corpus_id: str, paths: List[str]) -> ImportResult:
+        with self._lock:
+            self._require_corpus(corpus_id)
+
+        storage_client = None
+        result = ImportResult(imported_count=0)
+        for path in self._expand_paths(paths):
+            try:
+                if path.startswith("gs://") and storage_client is None and self._storage_client_factory:
+                    storage_client = self._storage_client_factory()
+                text = read_document_text(path, storage_client)
+            except Exception:
+                result.failed_count += 1
+                continue
+            if text is None:
+                result.skipped_count += 1
+                continue
+
+            file_id = uuid.uuid4().hex[:16]
+            now = _now()
+            chunks = chunk_text(text, self._chunk_chars, self._chunk_overlap_chars)
+            with self._lock:
+                # Re-importing a source replaces its previous version
+                for (old_file_id,) in self._connection.execute(
+                    "SELECT id FROM files WHERE corpus_id = ? AND source_uri = ?", (corpus_id, path)
+                ).fetchall():
+                    self._connection.execute("DELETE FROM chunks WHERE file_id = ?", (old_file_id,))
+                    self._connection.execute("DELETE FROM files WHERE id = ?", (old_file_id,))
+
+                self._connection.execute(
+                    "INSERT INTO files (id, corpus_id, display_name, source_uri, size_bytes, create_time, update_time)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (file_id, corpus_id, path.rstrip("/").split("/")[-1], path, len(text.encode("utf-8")), now, now)
+                )
+                self._connection.executemany(
+                    "INSERT INTO chunks (text, corpus_id, file_id, source_uri) VALUES (?, ?, ?, ?)",
+                    [(chunk, corpus_id, file_id, path) for chunk in chunks]
+                )
+                self._connection.execute("UPDATE corpora SET update_time = ? WHERE id = ?", (now, corpus_id))
+                self._connection.commit()
+            result.imported_count += 1
+        return result
+
+    def list_files(self, corpus_id: str, page_size: int, page_token: Optional[str] = None) -> FilePage:
+        offset = int(page_token) if page_token else 0
+        with self._lock:
+            self._require_corpus(corpus_id)
+            rows = self._connection.execute(
+                "SELECT * FROM files WHERE corpus_id = ? ORDER BY create_time, id LIMIT ? OFFSET ?",
+                (corpus_id, page_size + 1, offset)
+            ).fetchall()
+        next_page_token = str(offset + page_size) if len(rows) > page_size else None
+        return FilePage(files=[self._to_file(row) for row in rows[:page_size]], next_page_token=next_page_token)
+
+    def get_file(self, corpus_id: str, file_id: str) -> RagFile:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT * FROM files WHERE corpus_id = ? AND id = ?", (corpus_id, file_id)
+            ).fetchone()
+        if row is None:
+            raise KeyError(f"RAG file '{file_id}' not found in corpus '{corpus_id}'")
+        return self._to_file(row)
+
+    def delete_file(self, corpus_id: str, file_id: str) -> None:
+        self.get_file(corpus_id, file_id)
+        with self._lock:
+            self._connection.execute("DELETE FROM chunks WHERE file_id = ?", (file_id,))
+            self._connection.execute("DELETE FROM files WHERE id = ?", (file_id,))
+            self._connection.execute("UPDATE corpora SET update_time = ? WHERE id = ?", (_now(), corpus_id))
+            self._connection.commit()
+
+    def retrieval_query(
+        self, corpus_id: str, text: str, top_k: int, vector_distance_threshold: Optional[float] = None
+    ) -> List[RetrievedContext]:
+        match = _fts_query(text)
+        if not match:
+            return []
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT text, source_uri, bm25(chunks) AS rank FROM chunks"
+                " WHERE chunks MATCH ? AND corpus_id = ? ORDER BY rank LIMIT ?",
+                (match, corpus_id, top_k)
+            ).fetchall()
+
+        # bm25() is negative with lower meaning better; map it to a (0, 1) score
+        return [
+            RetrievedContext(
+                text=row["text"],
+                source_uri=row["source_uri"],
+                relevance_score=-row["rank"] / (1.0 - row["rank"])
+            )
+            for row in rows
+        ]
@@ -0,0 +1,169 @@
+"""
+Vertex AI RAG Engine backend.
+
+Wraps `vertexai.preview.rag` and converts its response objects into the
+backend dataclasses.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from rag.backends.base import Corpus, FilePage, ImportResult, RagFile, RetrievedContext
+
+
+def _raw_data(resource: Any) -> Dict[str, Any]:
+    """Returns the raw API data of a response object for transparency."""
+    if hasattr(resource, "to_dict"):
+        return resource.to_dict()
+    elif hasattr(resource, "__dict__"):
+        return {k: v for k, v in resource.__dict__.items() if not k.startswith('_')}
+    return {}
+
+
+def _to_corpus(corpus: Any) -> Corpus:
+    # Get corpus status, whichever attribute naming the API response uses
+    state = None
+    if hasattr(corpus, "corpus_status") and hasattr(corpus.corpus_status, "state"):
+        state = corpus.corpus_status.state
+    elif hasattr(corpus, "corpusStatus") and hasattr(corpus.corpusStatus, "state"):
+        state = corpus.corpusStatus.state
+
+    return Corpus(
+        name=corpus.name,
+        display_name=corpus.display_name,
+        description=corpus.description if hasattr(corpus, "description") else None,
+        create_time=str(corpus.create_time) if hasattr(corpus, "create_time") else None,
+        update_time=str(corpus.update_time) if hasattr(corpus, "update_time") else None,
+        state=str(state) if state is not None else None,
+        raw=_raw_data(corpus)
+    )
+
+
+def _to_file(file: Any) -> RagFile:
+    return RagFile(
+        name=file.name,
+        display_name=file.display_name if hasattr(file, "display_name") else None,
+        description=file.description if hasattr(file, "description") else None,
+        source_uri=file.source_uri if hasattr(file, "source_uri") else None,
+        create_time=str(file.create_time) if hasattr(file, "create_time") else None,
+        update_time=str(file.update_time) if hasattr(file, "update_time") else None,
+        size_bytes=getattr(file, "size_bytes", None),
+        raw=_raw_data(file)
+    )
+
+
+class VertexRagBackend:
+    """RAG backend backed by Vertex AI RAG Engine."""
+
+    name = "vertex"
+
+    def __init__(self, project_id: Optional[str], location: str):
+        import vertexai
+        from vertexai.preview import rag
+
+        # Initialize Vertex AI API
+        vertexai.init(project=project_id, location=location)
+        self._rag = rag
+        self._project_id = project_id
+        self._location = location
+
+    def _corpus_name(self, corpus_id: str) -> str:
+        return f"projects/{self._project_id}/locations/{self._location}/ragCorpora/{corpus_id}"
+
+    def _file_name(self, corpus_id: str, file_id: str) -> str:
+        return f"{self._corpus_name(corpus_id)}/ragFiles/{file_id}"
+
+    def create_corpus(self, display_name: str, description: str, embedding_model: str) -> Corpus:
+        # Configure embedding model
+        embedding_model_config = self._rag.EmbeddingModelConfig(
+            publisher_model=f"publishers/google/models/{embedding_model}"
+        )
+        return _to_corpus(self._rag.create_corpus(
+            display_name=display_name,
+            description=description,
+            embedding_model_config=embedding_model_config,
+        ))
+
+    def update_corpus(
+        self, corpus_id: str, display_name: Optional[str] = None, description: Optional[str] = None
+    ) -> Corpus:
+        corpus = self._rag.get_corpus(name=self._corpus_name(corpus_id))
+
+        # Update fields if provided
+        if display_name:
+            corpus.display_name = display_name
+        if description:
+            corpus.description = description
+
+        return _to_corpus(self._rag.update_corpus(
+            corpus=corpus,
+            update_mask=["display_name", "description"]
+        ))
+
+    def get_corpus(self, corpus_id: str) -> Corpus:
+        return _to_corpus(self._rag.get_corpus(name=self._corpus_name(corpus_id)))
+
+    def list_corpora(self) -> List[Corpus]:
+        return [_to_corpus(corpus) for corpus in self._rag.list_corpora()]
+
+    def delete_corpus(self, corpus_id: str) -> None:
+        self._rag.delete_corpus(name=self._corpus_name(corpus_id))
+
+    def import_files(self, corpus_id: str, paths: List[str]) -> ImportResult:
+        # Use the most basic form of the API call to avoid parameter issues;
+        # it submits a long-running import operation and waits for its result
+        response = self._rag.import_files(self._corpus_name(corpus_id), paths)
+        imported_count = getattr(response, "imported_rag_files_count", None)
+        return ImportResult(
+            imported_count=imported_count if imported_count is not None else len(paths),
+            failed_count=getattr(response, "failed_rag_files_count", 0) or 0,
+            skipped_count=getattr(response, "skipped_rag_files_count", 0) or 0
+        )
+
+    def list_files(self, corpus_id: str, page_size: int, page_token: Optional[str] = None) -> FilePage:
+        response = self._rag.list_files(
+            corpus_name=self._corpus_name(corpus_id),
+            page_size=page_size,
+            page_token=page_token
+        )
+        next_page_token = response.next_page_token if hasattr(response, "next_page_token") else None
+        return FilePage(
+            files=[_to_file(file) for file in response.rag_files],
+            next_page_token=next_page_token or None
+        )
+
+    def get_file(self, corpus_id: str, file_id: str) -> RagFile:
+        return _to_file(self._rag.get_file(name=self._file_name(corpus_id, file_id)))
+
+    def delete_file(self, corpus_id: str, file_id: str) -> None:
+        self._rag.delete_file(name=self._file_name(corpus_id, file_id))
+
+    def retrieval_query(
+        self, corpus_id: str, text: str, top_k: int, vector_distance_threshold: Optional[float] = None
+    ) -> List[RetrievedContext]:
+        # Create the resource config and retrieval parameters
+        rag_resource = self._rag.RagResource(rag_corpus=self._corpus_name(corpus_id))
+        retrieval_config = self._rag.RagRetrievalConfig(
+            top_k=top_k,
+            filter=self._rag.utils.resources.Filter(vector_distance_threshold=vector_distance_threshold)
+        )
+
+        response = self._rag.retrieval_query(
+            rag_resources=[rag_resource],
+            text=text,
+            rag_retrieval_config=retrieval_config
+        )
+
+        results = []
+        if hasattr(response, "contexts"):
+            # Handle different response structures
+            contexts = response.contexts
+            if hasattr(contexts, "contexts"):
+                contexts = contexts.contexts
+
+            for context in contexts:
+                results.append(RetrievedContext(
+                    text=context.text if hasattr(context, "text") else "",
+                    source_uri=context.source_uri if hasattr(context, "source_uri") else None,
+                    relevance_score=context.relevance_score if hasattr(context, "relevance_score") else None
+                ))
+        return results
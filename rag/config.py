@@ -3,24 +3,106 @@
 import os
 
 
+# Local State Settings
+RAG_LOCAL_STATE_DIR = os.environ.get("RAG_LOCAL_STATE_DIR", ".rag_state")  # Directory for on-disk caches and indexes
+
 # Google Cloud Project Settings
 PROJECT_ID = os.environ.get("GOOGLE_CLOUD_PROJECT_ID")  # Replace with your project ID
 LOCATION = os.environ.get("GOOGLE_CLOUD_LOCATION", "us-central1")  # Default location for Vertex AI and GCS resources
 
+# RAG Backend Settings
+RAG_BACKEND = os.environ.get("RAG_BACKEND", "vertex")  # "vertex" (Vertex AI RAG Engine) or "sqlite" (local FTS5/BM25 store)
+RAG_SQLITE_DB_PATH = os.path.join(RAG_LOCAL_STATE_DIR, "rag_corpora.sqlite")  # Database used by the sqlite backend
+
 # GCS Storage Settings
 GCS_DEFAULT_STORAGE_CLASS = "STANDARD"
 GCS_DEFAULT_LOCATION = "US"
 GCS_LIST_BUCKETS_MAX_RESULTS = 50
 GCS_LIST_BLOBS_MAX_RESULTS = 100
+GCS_BUCKET_STATS_MAX_BLOBS = 10000  # Objects aggregated by get_bucket_details before its statistics are cut off
+GCS_BUCKET_STATS_PAGE_SIZE = 1000  # Objects fetched per listing page while aggregating bucket statistics
 GCS_DEFAULT_CONTENT_TYPE = "application/pdf"  # Default content type for uploaded files
+GCS_HTTP_POOL_SIZE = 32  # Connections per host kept by the shared GCS client (cover the tools' thread pools)
+GCS_HTTP_MAX_RETRIES = 3  # Connection-level retries of the shared GCS client
+GCS_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # Bytes per chunk of a resumable upload
+GCS_UPLOAD_CHUNK_ALIGNMENT = 256 * 1024  # Resumable upload chunks must be a multiple of this size
+GCS_UPLOAD_MAX_PARALLELISM = 4  # Maximum number of attachments uploaded concurrently
+GCS_UPLOAD_TIMEOUT = 120.0  # Seconds each upload request may take
+GCS_UPLOAD_SKIP_UNCHANGED = True  # Skip uploads whose MD5/CRC32C matches the object already stored
 
 # RAG Corpus Settings
 RAG_DEFAULT_EMBEDDING_MODEL = "text-embedding-004"
 RAG_DEFAULT_TOP_K = 10  # Default number of results for single corpus query
 RAG_DEFAULT_SEARCH_TOP_K = 5  # Default number of results per corpus for search_all
+RAG_DEFAULT_SEARCH_GLOBAL_TOP_K = 10  # Default number of results returned by search_all across all corpora
 RAG_DEFAULT_VECTOR_DISTANCE_THRESHOLD = 0.5
 RAG_DEFAULT_PAGE_SIZE = 50  # Default page size for listing files
 
+# RAG Rerank Settings
+RAG_RERANK_ENABLED = True  # Rerank retrieval results with a hybrid vector + lexical + field pattern score
+RAG_RERANK_CANDIDATE_MULTIPLIER = 2  # Candidates retrieved per returned result when reranking
+RAG_RERANK_CANDIDATE_DISTANCE_THRESHOLD = 0.7  # Looser vector threshold used to gather rerank candidates
+RAG_RERANK_VECTOR_WEIGHT = 0.3  # Weight of the retrieval relevance_score
+RAG_RERANK_LEXICAL_WEIGHT = 0.2  # Weight of the BM25 score over the returned chunks
+RAG_RERANK_PATTERN_WEIGHT = 0.5  # Weight of a matched field value (email, phone, profile URL, ...)
+RAG_RERANK_RELATIVE_CUTOFF = 0.5  # Drop reranked results scoring below this fraction of the best one
+
+# RAG Deduplication Settings
+RAG_DEDUP_ENABLED = True  # Collapse identical and near-identical chunks returned by several corpora
+RAG_DEDUP_SHINGLE_SIZE = 5  # Words per shingle when comparing chunk texts
+RAG_DEDUP_JACCARD_THRESHOLD = 0.8  # Minimum shingle Jaccard similarity for two chunks to count as duplicates
+
+# RAG Response Budget Settings
+RAG_RESPONSE_MAX_TOKENS = 3000  # Default budget for the results returned by query_rag_corpus, search_all_corpora and retrieve_fields
+RAG_CHARS_PER_TOKEN = 4  # Characters per token used to turn a token budget into a character budget
+RAG_PACK_MIN_SNIPPET_CHARS = 200  # Chunk texts are never trimmed below this length; the result is dropped instead
+
+# Response Projection Settings (fields returned when a tool is called without fields=)
+RAG_CORPUS_DEFAULT_FIELDS = ("id", "display_name", "description", "files_count", "state", "update_time")
+RAG_FILE_DEFAULT_FIELDS = ("id", "display_name", "source_uri", "update_time")
+GCS_BUCKET_DEFAULT_FIELDS = ("name", "location", "storage_class")
+
+# RAG Import Settings
+RAG_IMPORT_MAX_BATCH_SIZE = 25  # Maximum number of GCS paths accepted by a single import_files call
+RAG_IMPORT_MAX_CONCURRENT_BATCHES = 4  # Maximum number of import operations running at the same time
+RAG_IMPORT_BATCH_TIMEOUT = 900.0  # Seconds to wait for a single import operation to finish
+RAG_IMPORT_SKIP_UNCHANGED = True  # Skip documents whose content hash is already imported into the corpus
+RAG_IMPORT_MANIFEST_PATH = os.path.join(RAG_LOCAL_STATE_DIR, "import_manifest.sqlite")  # Per-corpus content hashes of imported documents
+
+# Local Vector Index Settings
+RAG_LOCAL_VECTOR_INDEX_ENABLED = os.environ.get("RAG_LOCAL_VECTOR_INDEX_ENABLED", "false").lower() in ("1", "true", "yes")  # Answer synced corpora in process
+RAG_LOCAL_VECTOR_INDEX_DIR = os.path.join(RAG_LOCAL_STATE_DIR, "vector_index")
+RAG_LOCAL_VECTOR_EMBEDDER = os.environ.get("RAG_LOCAL_VECTOR_EMBEDDER", "vertex")  # "vertex" or "hashing" (deterministic, offline)
+RAG_LOCAL_CHUNK_CHARS = 1000  # Target size of the text chunks embedded into the local index
+RAG_LOCAL_CHUNK_OVERLAP_CHARS = 200  # Characters repeated between consecutive chunks
+
+# Corpus Routing Settings
+RAG_CORPUS_INDEX_PATH = os.path.join(RAG_LOCAL_STATE_DIR, "corpus_index.sqlite")  # User -> corpus routing index
+
+# Profile Store Settings
+RAG_PROFILE_STORE_ENABLED = True  # Extract a structured profile from documents imported into a user's corpus
+RAG_PROFILE_STORE_PATH = os.path.join(RAG_LOCAL_STATE_DIR, "profiles.sqlite")  # Per-user profile fields
+RAG_PROFILE_MIN_CONFIDENCE = 0.7  # Profile fields below this confidence are retrieved with RAG instead
+
+# Form Field Retrieval Settings
+RAG_FIELD_QUERY_TEMPLATE = "{user} {field}"  # Query sent for each distinct form field
+RAG_FIELD_TOP_K_PER_CORPUS = 3  # Number of results requested from each corpus per field
+RAG_FIELD_SNIPPETS_PER_FIELD = 3  # Number of snippets returned per field across all corpora
+
+# RAG Search Fan-out Settings
+RAG_SEARCH_MAX_PARALLELISM = 8  # Maximum number of corpora queried concurrently by search_all
+RAG_SEARCH_PER_CORPUS_TIMEOUT = 10.0  # Seconds a single corpus query may take before it is abandoned
+RAG_SEARCH_DEADLINE = 25.0  # Seconds the whole search_all fan-out may take before partial results are returned
+RAG_FILE_COUNT_MAX_PARALLELISM = 8  # Maximum number of concurrent list_files calls when counting corpus files
+
+# RAG Cache Settings
+RAG_METADATA_CACHE_TTL_SECONDS = 300  # Seconds corpus listings and details are served from cache
+RAG_METADATA_CACHE_MAX_ENTRIES = 256  # Maximum number of cached corpus listings/details
+RAG_RETRIEVAL_CACHE_MAX_ENTRIES = 1024  # Maximum number of cached query_rag_corpus results kept in memory
+RAG_RETRIEVAL_CACHE_TTL_SECONDS = 24 * 60 * 60  # Seconds a cached retrieval result stays valid
+RAG_RETRIEVAL_CACHE_PERSIST = os.environ.get("RAG_RETRIEVAL_CACHE_PERSIST", "false").lower() in ("1", "true", "yes")  # Keep retrieval results on disk across restarts
+RAG_RETRIEVAL_CACHE_DB_PATH = os.path.join(RAG_LOCAL_STATE_DIR, "retrieval_cache.sqlite")
+
 # Agent Settings
 AGENT_NAME = "rag_corpus_manager"
 AGENT_MODEL = "gemini-2.5-flash-lite"
@@ -9,6 +9,7 @@ from .corpus_tools import (
     get_corpus_tool,
     delete_corpus_tool,
     import_document_tool,
+    bulk_import_tool,
     
     # File management tools
     list_files_tool,
@@ -18,6 +19,12 @@ from .corpus_tools import (
     # Query tools
     query_rag_corpus_tool,
     search_all_corpora_tool,
+    retrieve_fields_tool,
+    get_user_profile_tool,
+    sync_local_index_tool,
+    
+    # Diagnostics tools
+    cache_stats_tool,
 )
 
 from .storage_tools import (
@@ -0,0 +1,180 @@
+"""
+In-process caches shared by the RAG tools.
+
+LRUCache is a thread-safe, size-bounded LRU map with an optional TTL and
+hit/miss counters. Cached values are returned as-is, so callers that mutate
+what they get back must copy it first. SQLiteCacheTier is an optional on-disk
+tier for values that should survive a restart.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """Thread-safe LRU cache with an optional per-entry time-to-live."""
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        """
+        Args:
+            maxsize: Maximum number of entries kept before the least recently used is evicted
+            ttl: Seconds an entry stays valid after it was stored (None: no expiry)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Returns the cached value for key, or default on a miss or an expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            stored_at, value = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Stores value under key, evicting the least recently used entries past maxsize."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drops a single entry if present."""
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drops every entry whose key matches predicate and returns how many were dropped."""
+        with self._lock:
+            matching = [key for key in self._entries if predicate(key)]
+            for key in matching:
+                del self._entries[key]
+            self.invalidations += len(matching)
+            return len(matching)
+
+    def clear(self) -> None:
+        """Drops every entry; counters are kept."""
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the current size, configuration and hit/miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
+
+
+class SQLiteCacheTier:
+    """
+    Persistent JSON key/value store backing an LRUCache across restarts.
+
+    Entries are grouped by namespace (e.g. a corpus ID) so that a whole
+    namespace can be invalidated at once.
+    """
+
+    def __init__(self, path: str, ttl: Optional[float] = None):
+        """
+        Args:
+            path: Path of the SQLite database file (parent directories are created)
+            ttl: Seconds an entry stays valid after it was stored (None: no expiry)
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            " namespace TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " stored_at REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        if ttl is not None:
+            # Expired entries are never served again, so drop them on startup
+            self._connection.execute("DELETE FROM cache_entries WHERE stored_at < ?", (time.time() - ttl,))
+        self._connection.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, namespace: str, key: str) -> Any:
+        """Returns the decoded value stored under (namespace, key), or None."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, stored_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            ).fetchone()
+            if row is None or (self.ttl is not None and time.time() - row[1] > self.ttl):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return json.loads(row[0])
+
+    def set(self, namespace: str, key: str, value: Any) -> None:
+        """Stores a JSON-serializable value under (namespace, key)."""
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, stored_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, json.dumps(value), time.time())
+            )
+            self._connection.commit()
+
+    def invalidate_namespace(self, namespace: str) -> None:
+        """Drops every entry stored under namespace."""
+        with self._lock:
+            self._connection.execute("DELETE FROM cache_entries WHERE namespace = ?", (namespace,))
+            self._connection.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the number of stored entries and hit/miss counters."""
+        with self._lock:
+            size = self._connection.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+            return {
+                "path": self.path,
+                "size": size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses
+            }
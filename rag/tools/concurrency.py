@@ -0,0 +1,147 @@
+"""
+Concurrency helpers shared by the RAG corpus and GCS tools.
+
+The Vertex AI RAG and GCS client libraries are blocking, so fan-out is done
+with a bounded thread pool rather than asyncio. Calls that overrun their
+budget are abandoned (threads cannot be interrupted) and reported back to the
+caller so partial results can still be returned. The threads of abandoned
+calls are bounded: see fan_out's max_abandoned.
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+
+@dataclass
+class FanOutResult:
+    """Outcome of a fan_out run, keyed by the keys of the submitted calls."""
+    results: Dict[Hashable, Any] = field(default_factory=dict)
+    errors: Dict[Hashable, str] = field(default_factory=dict)
+    timed_out: List[Hashable] = field(default_factory=list)
+    deadline_exceeded: bool = False
+
+
+def fan_out(
+    calls: Dict[Hashable, Callable[[], Any]],
+    max_parallelism: int,
+    per_call_timeout: Optional[float] = None,
+    deadline: Optional[float] = None,
+    on_result: Optional[Callable[[Hashable, Any], None]] = None,
+    max_abandoned: Optional[int] = None
+) -> FanOutResult:
+    """
+    Runs zero-argument callables concurrently on a bounded thread pool.
+
+    Calls are handed to the pool max_parallelism at a time. A call that
+    overruns per_call_timeout is abandoned and its slot goes to the next
+    call, so one slow call does not starve the calls queued behind it. The
+    abandoned call keeps its thread until it returns on its own; at most
+    max_abandoned such threads are added on top of max_parallelism, after
+    which new calls wait for an abandoned thread to finish. Timeouts are
+    always charged from the moment a call starts running.
+
+    Args:
+        calls: Mapping of key to a zero-argument callable
+        max_parallelism: Maximum number of calls running at the same time
+        per_call_timeout: Seconds a single call may run once it has started (None: no limit)
+        deadline: Seconds the whole fan-out may take (None: no limit)
+        on_result: Optional callback invoked in the caller's thread as each call completes
+        max_abandoned: Maximum number of extra threads left running by abandoned calls
+            (None: max_parallelism)
+
+    Returns:
+        A FanOutResult with the values of completed calls, the errors of failed
+        calls and the keys of calls that timed out or were never started
+        before the overall deadline.
+    """
+    outcome = FanOutResult()
+    if not calls:
+        return outcome
+
+    parallelism = max(1, min(max_parallelism, len(calls)))
+    abandon_limit = parallelism if max_abandoned is None else max(0, max_abandoned)
+    started_at: Dict[Hashable, float] = {}
+    lock = threading.Lock()
+
+    def _run(key: Hashable, call: Callable[[], Any]) -> Any:
+        with lock:
+            started_at[key] = time.monotonic()
+        return call()
+
+    expires_at = time.monotonic() + deadline if deadline is not None else None
+    executor = ThreadPoolExecutor(
+        max_workers=min(len(calls), parallelism + abandon_limit),
+        thread_name_prefix="rag-fan-out"
+    )
+    queued = list(calls.items())
+    queued.reverse()
+    pending: Dict[Any, Hashable] = {}
+
+    def _submit_queued() -> None:
+        # Keep max_parallelism calls in flight; abandoned calls no longer count
+        while queued and len(pending) < parallelism:
+            key, call = queued.pop()
+            pending[executor.submit(_run, key, call)] = key
+
+    try:
+        while True:
+            now = time.monotonic()
+
+            # Abandon calls that have been running longer than their own budget
+            if per_call_timeout is not None:
+                with lock:
+                    expired = [
+                        future for future, key in pending.items()
+                        if not future.done()
+                        and key in started_at
+                        and now - started_at[key] >= per_call_timeout
+                    ]
+                for future in expired:
+                    outcome.timed_out.append(pending.pop(future))
+
+            # Abandon everything still pending or queued once the overall deadline passes
+            if expires_at is not None and now >= expires_at:
+                outcome.deadline_exceeded = True
+                outcome.timed_out.extend(
+                    key for future, key in pending.items() if not future.done()
+                )
+                outcome.timed_out.extend(key for key, _ in reversed(queued))
+                queued.clear()
+                pending = {future: key for future, key in pending.items() if future.done()}
+
+            _submit_queued()
+            if not pending:
+                break
+
+            # Sleep until the next call completes or the next budget expires
+            wait_candidates = []
+            if expires_at is not None:
+                wait_candidates.append(expires_at - now)
+            if per_call_timeout is not None:
+                with lock:
+                    running_since = [started_at[key] for key in pending.values() if key in started_at]
+                if running_since:
+                    wait_candidates.append(min(running_since) + per_call_timeout - now)
+                else:
+                    wait_candidates.append(per_call_timeout)
+            wait_timeout = max(0.0, min(wait_candidates)) if wait_candidates else None
+
+            done, _ = wait(pending, timeout=wait_timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = pending.pop(future)
+                try:
+                    value = future.result()
+                except Exception as e:
+                    outcome.errors[key] = str(e)
+                    continue
+                outcome.results[key] = value
+                if on_result is not None:
+                    on_result(key, value)
+    finally:
+        # Do not block on abandoned calls; drop the ones that never started
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return outcome
@@ -0,0 +1,73 @@
+"""
+User to corpus routing index for the RAG tools.
+
+Maps each user to the corpora that hold their profile documents so that
+searches made on behalf of an applicant only touch that applicant's corpora.
+The index is a small SQLite table kept in sync by the corpus create, update
+and delete tools.
+"""
+
+import os
+import sqlite3
+import threading
+from typing import List, Optional
+
+
+def normalize_user(user: str) -> str:
+    """Normalizes a user name so 'Sukumar ' and 'sukumar' share index entries."""
+    return " ".join(user.lower().split())
+
+
+class CorpusIndex:
+    """SQLite-backed mapping of users to the IDs of their corpora."""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Path of the SQLite database file (parent directories are created)
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS user_corpora ("
+            " user TEXT NOT NULL,"
+            " corpus_id TEXT NOT NULL PRIMARY KEY)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS user_corpora_user ON user_corpora (user)")
+        self._connection.commit()
+
+    def assign(self, user: str, corpus_id: str) -> None:
+        """Records corpus_id as belonging to user, replacing any previous owner."""
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO user_corpora (user, corpus_id) VALUES (?, ?)",
+                (normalize_user(user), corpus_id)
+            )
+            self._connection.commit()
+
+    def remove_corpus(self, corpus_id: str) -> None:
+        """Forgets a corpus, e.g. after it was deleted."""
+        with self._lock:
+            self._connection.execute("DELETE FROM user_corpora WHERE corpus_id = ?", (corpus_id,))
+            self._connection.commit()
+
+    def corpora_for(self, user: str) -> List[str]:
+        """Returns the IDs of the corpora owned by user."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT corpus_id FROM user_corpora WHERE user = ? ORDER BY rowid",
+                (normalize_user(user),)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def owner_of(self, corpus_id: str) -> Optional[str]:
+        """Returns the (normalized) user that owns corpus_id, if known."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT user FROM user_corpora WHERE corpus_id = ?", (corpus_id,)
+            ).fetchone()
+        return row[0] if row else None
@@ -1,5 +1,8 @@
 """
-RAG Corpus Management Tools for Vertex AI using ADK function tools pattern.
+RAG Corpus Management Tools using ADK function tools pattern.
+
+The tools talk to the retrieval backend selected by RAG_BACKEND in
+rag/config.py (Vertex AI RAG Engine by default, see rag/backends).
 
 RAG Corpus Management:
 1. Create a new RAG corpus
@@ -16,37 +19,272 @@ RAG File Management (within a corpus):
 10. Query RAG files
 """
 
-import vertexai
-from vertexai.preview import rag
-from google.adk.tools import FunctionTool
-from typing import Dict, Optional, Any
+from google.adk.tools import FunctionTool, ToolContext
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Iterator, List, Optional, Any, Tuple
+import copy
+import heapq
+import itertools
+import json
+import logging
+import re
+import threading
 
+from rag.backends import RagFile, get_backend
 from rag.config import (
-    PROJECT_ID,
-    LOCATION,
     RAG_DEFAULT_EMBEDDING_MODEL,
     RAG_DEFAULT_TOP_K,
     RAG_DEFAULT_SEARCH_TOP_K,
+    RAG_DEFAULT_SEARCH_GLOBAL_TOP_K,
     RAG_DEFAULT_VECTOR_DISTANCE_THRESHOLD,
-    RAG_DEFAULT_PAGE_SIZE
+    RAG_DEFAULT_PAGE_SIZE,
+    RAG_RERANK_ENABLED,
+    RAG_RERANK_CANDIDATE_MULTIPLIER,
+    RAG_RERANK_CANDIDATE_DISTANCE_THRESHOLD,
+    RAG_RERANK_VECTOR_WEIGHT,
+    RAG_RERANK_LEXICAL_WEIGHT,
+    RAG_RERANK_PATTERN_WEIGHT,
+    RAG_RERANK_RELATIVE_CUTOFF,
+    RAG_DEDUP_ENABLED,
+    RAG_DEDUP_SHINGLE_SIZE,
+    RAG_DEDUP_JACCARD_THRESHOLD,
+    RAG_RESPONSE_MAX_TOKENS,
+    RAG_CHARS_PER_TOKEN,
+    RAG_PACK_MIN_SNIPPET_CHARS,
+    RAG_SEARCH_MAX_PARALLELISM,
+    RAG_SEARCH_PER_CORPUS_TIMEOUT,
+    RAG_SEARCH_DEADLINE,
+    RAG_FILE_COUNT_MAX_PARALLELISM,
+    RAG_METADATA_CACHE_TTL_SECONDS,
+    RAG_METADATA_CACHE_MAX_ENTRIES,
+    RAG_RETRIEVAL_CACHE_MAX_ENTRIES,
+    RAG_RETRIEVAL_CACHE_TTL_SECONDS,
+    RAG_RETRIEVAL_CACHE_PERSIST,
+    RAG_RETRIEVAL_CACHE_DB_PATH,
+    RAG_FIELD_QUERY_TEMPLATE,
+    RAG_FIELD_TOP_K_PER_CORPUS,
+    RAG_FIELD_SNIPPETS_PER_FIELD,
+    RAG_IMPORT_MAX_BATCH_SIZE,
+    RAG_IMPORT_MAX_CONCURRENT_BATCHES,
+    RAG_IMPORT_BATCH_TIMEOUT,
+    RAG_IMPORT_SKIP_UNCHANGED,
+    RAG_IMPORT_MANIFEST_PATH,
+    RAG_CORPUS_INDEX_PATH,
+    RAG_PROFILE_STORE_ENABLED,
+    RAG_PROFILE_STORE_PATH,
+    RAG_PROFILE_MIN_CONFIDENCE,
+    RAG_CORPUS_DEFAULT_FIELDS,
+    RAG_FILE_DEFAULT_FIELDS,
+    RAG_LOCAL_VECTOR_INDEX_ENABLED,
+    RAG_LOCAL_VECTOR_INDEX_DIR,
+    RAG_LOCAL_VECTOR_EMBEDDER,
+    RAG_LOCAL_CHUNK_CHARS,
+    RAG_LOCAL_CHUNK_OVERLAP_CHARS
+)
+from rag.tools.cache import LRUCache, SQLiteCacheTier
+from rag.tools.concurrency import fan_out
+from rag.tools.corpus_index import CorpusIndex, normalize_user
+from rag.tools.dedup import group_near_duplicates
+from rag.tools.import_manifest import ImportManifest
+from rag.tools.packing import pack_results
+from rag.tools.profile_store import ProfileStore, extract_profile, field_key_for_label, is_resume
+from rag.tools.projection import project
+from rag.tools.rerank import HybridReranker
+from rag.tools.gcs_client import blob_content_hash, get_storage_client, split_gcs_uri
+from rag.tools.text_extraction import PDF_SUPPORTED, chunk_text, read_document_text
+from rag.tools.vector_index import HashingEmbedder, LocalVectorIndex, VertexEmbedder
+
+logger = logging.getLogger(__name__)
+
+# Cache for corpus listings and corpus details, keyed by ("corpora", include_file_counts)
+# and ("corpus", corpus_id). Invalidated by every tool that changes a corpus.
+_corpus_metadata_cache = LRUCache(
+    maxsize=RAG_METADATA_CACHE_MAX_ENTRIES,
+    ttl=RAG_METADATA_CACHE_TTL_SECONDS
+)
+
+
+def _invalidate_corpus_metadata(corpus_id: Optional[str] = None) -> None:
+    """Drops cached corpus listings, and the cached details of corpus_id if given."""
+    _corpus_metadata_cache.invalidate_where(lambda key: key[0] == "corpora")
+    if corpus_id:
+        _corpus_metadata_cache.invalidate(("corpus", corpus_id))
+
+
+# Cache for query_rag_corpus results, keyed by
+# (corpus_id, normalized query_text, top_k, vector_distance_threshold).
+# The optional SQLite tier keeps results across restarts. Both tiers are
+# invalidated per corpus whenever the corpus contents change, which also
+# bumps the corpus generation: a query that was already running against the
+# old contents finds its generation changed and does not store its results.
+_retrieval_cache = LRUCache(
+    maxsize=RAG_RETRIEVAL_CACHE_MAX_ENTRIES,
+    ttl=RAG_RETRIEVAL_CACHE_TTL_SECONDS
 )
+_retrieval_disk_cache = (
+    SQLiteCacheTier(RAG_RETRIEVAL_CACHE_DB_PATH, ttl=RAG_RETRIEVAL_CACHE_TTL_SECONDS)
+    if RAG_RETRIEVAL_CACHE_PERSIST else None
+)
+_retrieval_generations: Dict[str, int] = {}
+_retrieval_generation_lock = threading.Lock()
+
+
+def _normalize_query(query_text: str) -> str:
+    """Lower-cases a query and collapses whitespace so equivalent questions share a cache entry."""
+    return " ".join(query_text.lower().split())
 
-# Initialize Vertex AI API
-vertexai.init(project=PROJECT_ID, location=LOCATION)
+
+def _get_cached_retrieval(key: tuple) -> Optional[List[Dict[str, Any]]]:
+    """Looks a retrieval up in memory, then on disk (promoting disk hits to memory)."""
+    results = _retrieval_cache.get(key)
+    if results is None and _retrieval_disk_cache is not None:
+        results = _retrieval_disk_cache.get(key[0], json.dumps(key[1:]))
+        if results is not None:
+            _retrieval_cache.set(key, results)
+    return copy.deepcopy(results) if results is not None else None
+
+
+def _retrieval_generation(corpus_id: str) -> int:
+    """The number of times the retrieval cache of a corpus has been invalidated; read it before querying the backend."""
+    with _retrieval_generation_lock:
+        return _retrieval_generations.get(corpus_id, 0)
+
+
+def _store_retrieval(key: tuple, results: List[Dict[str, Any]], generation: int) -> bool:
+    """
+    Stores retrieval results in every cache tier, unless the corpus has been
+    invalidated since generation was read. Returns whether they were stored.
+    """
+    with _retrieval_generation_lock:
+        if _retrieval_generations.get(key[0], 0) != generation:
+            return False
+        _retrieval_cache.set(key, copy.deepcopy(results))
+        if _retrieval_disk_cache is not None:
+            _retrieval_disk_cache.set(key[0], json.dumps(key[1:]), results)
+        return True
+
+
+def _invalidate_retrieval_cache(corpus_id: str) -> None:
+    """Drops every cached retrieval result of a corpus and discards the results of queries still running on it."""
+    with _retrieval_generation_lock:
+        _retrieval_generations[corpus_id] = _retrieval_generations.get(corpus_id, 0) + 1
+        _retrieval_cache.invalidate_where(lambda key: key[0] == corpus_id)
+        if _retrieval_disk_cache is not None:
+            _retrieval_disk_cache.invalidate_namespace(corpus_id)
+
+
+# Optional in-process mirror of corpus documents, answering query_rag_corpus
+# without a network round trip once a corpus has been synced.
+_local_vector_index = (
+    LocalVectorIndex(
+        RAG_LOCAL_VECTOR_INDEX_DIR,
+        HashingEmbedder() if RAG_LOCAL_VECTOR_EMBEDDER == "hashing" else VertexEmbedder(RAG_DEFAULT_EMBEDDING_MODEL)
+    )
+    if RAG_LOCAL_VECTOR_INDEX_ENABLED else None
+)
+
+
+def _on_corpus_contents_changed(corpus_id: str) -> None:
+    """Invalidates everything derived from a corpus' documents after an import or file deletion."""
+    _invalidate_corpus_metadata(corpus_id)
+    _invalidate_retrieval_cache(corpus_id)
+    if _local_vector_index is not None and _local_vector_index.has(corpus_id):
+        result = sync_local_vector_index(corpus_id)
+        if result["status"] != "success":
+            # Never answer from a stale mirror
+            _local_vector_index.remove(corpus_id)
+
+
+# Hybrid vector + lexical reranking applied to retrieval results
+_reranker = HybridReranker(
+    vector_weight=RAG_RERANK_VECTOR_WEIGHT,
+    lexical_weight=RAG_RERANK_LEXICAL_WEIGHT,
+    pattern_weight=RAG_RERANK_PATTERN_WEIGHT,
+    relative_cutoff=RAG_RERANK_RELATIVE_CUTOFF
+)
+
+
+# User -> corpus routing index, kept in sync by the create/update/delete corpus tools
+_corpus_index = CorpusIndex(RAG_CORPUS_INDEX_PATH)
+
+# Structured per-user profiles extracted at import time, answering common form fields without RAG
+_profile_store = ProfileStore(RAG_PROFILE_STORE_PATH) if RAG_PROFILE_STORE_ENABLED else None
+
+
+def _extract_document_profile(owner: str, uri: str) -> List[str]:
+    """Extracts the profile fields of one document into the owner's profile and returns the names of those stored."""
+    text = _read_source_text(uri)
+    if text is None:
+        if uri.lower().endswith(".pdf") and not PDF_SUPPORTED:
+            raise ValueError("PDF text extraction needs the pypdf package")
+        return []
+    profile = extract_profile(text)
+    if not profile:
+        return []
+    return _profile_store.update(owner, profile, source_uri=uri, from_resume=is_resume(text, uri))
+
+
+def _ingest_profiles(corpus_id: str, uris: List[str]) -> Dict[str, List[str]]:
+    """
+    Updates the profile of the corpus owner from freshly imported documents.
+    
+    Returns the extracted field names per document. Does nothing when the
+    corpus has no owner; extraction failures are logged and never fail the import.
+    """
+    owner = _corpus_index.owner_of(corpus_id) if _profile_store is not None else None
+    if not owner or not uris:
+        return {}
+    extraction = fan_out(
+        {uri: partial(_extract_document_profile, owner, uri) for uri in uris},
+        max_parallelism=RAG_FILE_COUNT_MAX_PARALLELISM
+    )
+    for uri, error in extraction.errors.items():
+        logger.warning("Could not extract a profile from %s: %s", uri, error)
+    return extraction.results
+
+
+# Content hashes of the documents imported into each corpus, used to skip unchanged re-imports
+_import_manifest = ImportManifest(RAG_IMPORT_MANIFEST_PATH)
+
+
+def _gcs_content_hash(gcs_uri: str) -> Optional[str]:
+    """Reads the stored content hash of a GCS object without downloading it; None if it does not exist."""
+    bucket_name, blob_name = split_gcs_uri(gcs_uri)
+    blob = get_storage_client().bucket(bucket_name).get_blob(blob_name)
+    return blob_content_hash(blob) if blob is not None else None
+
+
+def _gcs_content_hashes(uris: List[str], known: Dict[str, Optional[str]]) -> Dict[str, Optional[str]]:
+    """
+    Content hashes of uris, reading the ones not already known concurrently.
+    Failed reads, and paths that are not gs:// URIs (e.g. local files of the
+    sqlite backend), map to None: their content is unknown, so they are imported.
+    """
+    missing = [uri for uri in uris if uri not in known and uri.startswith("gs://")]
+    lookups = fan_out(
+        {uri: partial(_gcs_content_hash, uri) for uri in missing},
+        max_parallelism=RAG_FILE_COUNT_MAX_PARALLELISM
+    )
+    for uri, error in lookups.errors.items():
+        logger.warning("Could not read the content hash of %s: %s", uri, error)
+    return {uri: known[uri] if uri in known else lookups.results.get(uri) for uri in uris}
 
 
 def create_rag_corpus(
     display_name: str,
     description: Optional[str] = None,
-    embedding_model: Optional[str] = None
+    embedding_model: Optional[str] = None,
+    owner: Optional[str] = None
 ) -> Dict[str, Any]:
     """
-    Creates a new RAG corpus in Vertex AI.
+    Creates a new RAG corpus.
     
     Args:
         display_name: A human-readable name for the corpus
         description: Optional description for the corpus
         embedding_model: The embedding model to use (default: text-embedding-004)
+        owner: Name of the user whose profile documents the corpus holds (optional)
     
     Returns:
         A dictionary containing the created corpus details including:
@@ -59,26 +297,24 @@ def create_rag_corpus(
     embedding_model = embedding_model or RAG_DEFAULT_EMBEDDING_MODEL
 
     try:
-        # Configure embedding model
-        embedding_model_config = rag.EmbeddingModelConfig(
-            publisher_model=f"publishers/google/models/{embedding_model}"
-        )
-        
         # Create the corpus
-        corpus = rag.create_corpus(
+        corpus = get_backend().create_corpus(
             display_name=display_name,
             description=description or f"RAG corpus: {display_name}",
-            embedding_model_config=embedding_model_config,
+            embedding_model=embedding_model
         )
         
-        # Extract corpus ID from the full name
-        corpus_id = corpus.name.split('/')[-1]
+        corpus_id = corpus.id
+        _invalidate_corpus_metadata(corpus_id)
+        if owner:
+            _corpus_index.assign(owner, corpus_id)
         
         return {
             "status": "success",
             "corpus_name": corpus.name,
             "corpus_id": corpus_id,
             "display_name": corpus.display_name,
+            "owner": owner,
             "message": f"Successfully created RAG corpus '{display_name}'"
         }
     except Exception as e:
@@ -92,15 +328,18 @@ def create_rag_corpus(
 def update_rag_corpus(
     corpus_id: str,
     display_name: Optional[str] = None,
-    description: Optional[str] = None
+    description: Optional[str] = None,
+    owner: Optional[str] = None
 ) -> Dict[str, Any]:
     """
-    Updates an existing RAG corpus with new display name and/or description.
+    Updates an existing RAG corpus with new display name and/or description,
+    and/or assigns it to the user whose profile documents it holds.
     
     Args:
         corpus_id: The ID of the corpus to update
         display_name: New display name for the corpus (optional)
         description: New description for the corpus (optional)
+        owner: Name of the user the corpus belongs to (optional)
     
     Returns:
         A dictionary containing the update result:
@@ -112,23 +351,17 @@ def update_rag_corpus(
         - error_message: Present only if an error occurred
     """
     try:
-        # Construct full corpus name
-        corpus_name = f"projects/{PROJECT_ID}/locations/{LOCATION}/ragCorpora/{corpus_id}"
-        
-        # Get the existing corpus
-        corpus = rag.get_corpus(name=corpus_name)
-        
-        # Update fields if provided
-        if display_name:
-            corpus.display_name = display_name
-        if description:
-            corpus.description = description
-        
-        # Apply updates
-        updated_corpus = rag.update_corpus(
-            corpus=corpus,
-            update_mask=["display_name", "description"]
+        # Apply updates to the fields that were provided
+        updated_corpus = get_backend().update_corpus(
+            corpus_id,
+            display_name=display_name,
+            description=description
         )
+        _invalidate_corpus_metadata(corpus_id)
+        if owner:
+            _corpus_index.assign(owner, corpus_id)
+            # The documents already in the corpus now describe this user
+            _ingest_profiles(corpus_id, [file.source_uri for file in iter_rag_files(corpus_id) if file.source_uri])
         
         return {
             "status": "success",
@@ -136,6 +369,7 @@ def update_rag_corpus(
             "corpus_id": corpus_id,
             "display_name": updated_corpus.display_name,
             "description": updated_corpus.description,
+            "owner": _corpus_index.owner_of(corpus_id),
             "message": f"Successfully updated RAG corpus '{corpus_id}'"
         }
     except Exception as e:
@@ -147,59 +381,80 @@ def update_rag_corpus(
         }
 
 
-def list_rag_corpora() -> Dict[str, Any]:
+def _count_corpus_files(corpus_id: str) -> int:
+    """
+    Counts the files in a corpus by walking its file listing.
+    
+    Shared by list_rag_corpora and get_rag_corpus. Returns 0 if counting fails.
+    """
+    try:
+        return sum(1 for _ in iter_rag_files(corpus_id))
+    except Exception as file_error:
+        # If counting files fails, log but continue with zero count
+        logger.warning("Could not count files in corpus %s: %s", corpus_id, file_error)
+    return 0
+
+
+def _count_files_concurrently(corpus_ids: List[str]) -> Dict[str, int]:
+    """Counts the files of several corpora concurrently, keyed by corpus ID."""
+    counts = fan_out(
+        {corpus_id: partial(_count_corpus_files, corpus_id) for corpus_id in corpus_ids},
+        max_parallelism=RAG_FILE_COUNT_MAX_PARALLELISM
+    )
+    return {corpus_id: counts.results.get(corpus_id, 0) for corpus_id in corpus_ids}
+
+
+def list_rag_corpora(include_file_counts: bool = False) -> Dict[str, Any]:
     """
     Lists all RAG corpora in the current project and location.
     
+    Args:
+        include_file_counts: Set to True only when the user asks how many files each
+            corpus holds. Counting costs one extra API call per corpus (made concurrently).
+    
     Returns:
         A dictionary containing the list of corpora:
         - status: "success" or "error"
         - corpora: List of corpus objects with id, name, and display_name
+          (plus files_count when include_file_counts is True)
         - count: Number of corpora found
         - error_message: Present only if an error occurred
     """
+    cache_key = ("corpora", include_file_counts)
+    cached = _corpus_metadata_cache.get(cache_key)
+    if cached is not None:
+        return copy.deepcopy(cached)
     try:
-        corpora = rag.list_corpora()
+        corpora = get_backend().list_corpora()
+        
+        # Only pay for file counts when they were asked for
+        files_counts = {}
+        if include_file_counts:
+            files_counts = _count_files_concurrently([corpus.id for corpus in corpora])
         
         corpus_list = []
         for corpus in corpora:
-            corpus_id = corpus.name.split('/')[-1]
-            
-            # Get corpus status
-            status = None
-            if hasattr(corpus, "corpus_status") and hasattr(corpus.corpus_status, "state"):
-                status = corpus.corpus_status.state
-            elif hasattr(corpus, "corpusStatus") and hasattr(corpus.corpusStatus, "state"):
-                status = corpus.corpusStatus.state
-            
-            # Make an explicit API call to count files
-            files_count = 0
-            try:
-                # List all files to get the count
-                files_response = rag.list_files(corpus_name=corpus.name)
-                
-                if hasattr(files_response, "rag_files"):
-                    files_count = len(files_response.rag_files)
-            except Exception:
-                # If counting files fails, continue with zero count
-                pass
-            
-            corpus_list.append({
-                "id": corpus_id,
+            corpus_entry = {
+                "id": corpus.id,
                 "name": corpus.name,
                 "display_name": corpus.display_name,
-                "description": corpus.description if hasattr(corpus, "description") else None,
-                "create_time": str(corpus.create_time) if hasattr(corpus, "create_time") else None,
-                "files_count": files_count,
-                "status": status
-            })
+                "description": corpus.description,
+                "create_time": corpus.create_time,
+                "status": corpus.state
+            }
+            if include_file_counts:
+                corpus_entry["files_count"] = files_counts.get(corpus.id, 0)
+            
+            corpus_list.append(corpus_entry)
         
-        return {
+        response = {
             "status": "success",
             "corpora": corpus_list,
             "count": len(corpus_list),
             "message": f"Found {len(corpus_list)} RAG corpora"
         }
+        _corpus_metadata_cache.set(cache_key, copy.deepcopy(response))
+        return response
     except Exception as e:
         return {
             "status": "error",
@@ -208,12 +463,37 @@ def list_rag_corpora() -> Dict[str, Any]:
         }
 
 
-def get_rag_corpus(corpus_id: str) -> Dict[str, Any]:
+def _project_corpus_response(
+    response: Dict[str, Any],
+    fields: Optional[List[str]],
+    include_raw: bool
+) -> Dict[str, Any]:
+    """Applies the field projection to a full get_rag_corpus response."""
+    response = dict(response)
+    corpus_details = response["corpus"]
+    response["corpus"] = project(
+        {key: value for key, value in corpus_details.items() if key != "raw_api_data"},
+        fields,
+        RAG_CORPUS_DEFAULT_FIELDS
+    )
+    if include_raw and "raw_api_data" in corpus_details:
+        response["corpus"]["raw_api_data"] = corpus_details["raw_api_data"]
+    return response
+
+
+def get_rag_corpus(
+    corpus_id: str,
+    fields: Optional[List[str]] = None,
+    include_raw: bool = False
+) -> Dict[str, Any]:
     """
     Retrieves details of a specific RAG corpus.
     
     Args:
         corpus_id: The ID of the corpus to retrieve
+        fields: Corpus fields to return, e.g. ["id", "display_name", "create_time"], or ["*"] for all
+            (default: id, display_name, description, files_count, state, update_time)
+        include_raw: Also return the raw API data of the corpus (default: False)
     
     Returns:
         A dictionary containing the corpus details:
@@ -222,60 +502,41 @@ def get_rag_corpus(corpus_id: str) -> Dict[str, Any]:
         - files_count: Number of files in the corpus
         - error_message: Present only if an error occurred
     """
+    cache_key = ("corpus", corpus_id)
+    cached = _corpus_metadata_cache.get(cache_key)
+    if cached is not None:
+        return _project_corpus_response(copy.deepcopy(cached), fields, include_raw)
     try:
-        # Construct full corpus name
-        corpus_name = f"projects/{PROJECT_ID}/locations/{LOCATION}/ragCorpora/{corpus_id}"
-        
         # Get the corpus
-        corpus = rag.get_corpus(name=corpus_name)
+        corpus = get_backend().get_corpus(corpus_id)
         
-        # Get corpus status
-        status = None
-        if hasattr(corpus, "corpus_status") and hasattr(corpus.corpus_status, "state"):
-            status = corpus.corpus_status.state
-        elif hasattr(corpus, "corpusStatus") and hasattr(corpus.corpusStatus, "state"):
-            status = corpus.corpusStatus.state
-        
-        # Make an explicit API call to count files
-        files_count = 0
-        try:
-            # List all files to get the count
-            files_response = rag.list_files(corpus_name=corpus_name)
-            
-            if hasattr(files_response, "rag_files"):
-                files_count = len(files_response.rag_files)
-        except Exception as file_error:
-            # If counting files fails, log but continue with zero count
-            print(f"Warning: Could not count files: {str(file_error)}")
+        # Count files through the same path as list_rag_corpora
+        files_count = _count_corpus_files(corpus_id)
         
         # Extract basic information
         corpus_details = {
             "id": corpus_id,
             "name": corpus.name,
             "display_name": corpus.display_name,
-            "description": corpus.description if hasattr(corpus, "description") else None,
-            "create_time": str(corpus.create_time) if hasattr(corpus, "create_time") else None,
-            "update_time": str(corpus.update_time) if hasattr(corpus, "update_time") else None,
+            "description": corpus.description,
+            "create_time": corpus.create_time,
+            "update_time": corpus.update_time,
             "files_count": files_count,
-            "state": status
+            "state": corpus.state
         }
         
         # Include raw API response data for transparency
-        raw_data = {}
-        if hasattr(corpus, "to_dict"):
-            raw_data = corpus.to_dict()
-        elif hasattr(corpus, "__dict__"):
-            raw_data = {k: v for k, v in corpus.__dict__.items() if not k.startswith('_')}
+        if corpus.raw:
+            corpus_details["raw_api_data"] = corpus.raw
         
-        if raw_data:
-            corpus_details["raw_api_data"] = raw_data
-        
-        return {
+        response = {
             "status": "success",
             "corpus": corpus_details,
             "files_count": files_count,
             "message": f"Successfully retrieved RAG corpus '{corpus_id}' with {files_count} files"
         }
+        _corpus_metadata_cache.set(cache_key, copy.deepcopy(response))
+        return _project_corpus_response(response, fields, include_raw)
     except Exception as e:
         return {
             "status": "error",
@@ -299,11 +560,14 @@ def delete_rag_corpus(corpus_id: str) -> Dict[str, Any]:
         - error_message: Present only if an error occurred
     """
     try:
-        # Construct full corpus name
-        corpus_name = f"projects/{PROJECT_ID}/locations/{LOCATION}/ragCorpora/{corpus_id}"
-        
         # Delete the corpus
-        rag.delete_corpus(name=corpus_name)
+        get_backend().delete_corpus(corpus_id)
+        _invalidate_corpus_metadata(corpus_id)
+        _invalidate_retrieval_cache(corpus_id)
+        _corpus_index.remove_corpus(corpus_id)
+        _import_manifest.remove_corpus(corpus_id)
+        if _local_vector_index is not None:
+            _local_vector_index.remove(corpus_id)
         
         return {
             "status": "success",
@@ -322,39 +586,71 @@ def delete_rag_corpus(corpus_id: str) -> Dict[str, Any]:
 # Function for importing documents into a RAG corpus
 def import_document_to_corpus(
     corpus_id: str,
-    gcs_uri: str
+    gcs_uri: str,
+    force: bool = False
 ) -> Dict[str, Any]:
     """
     Imports a document from Google Cloud Storage into a RAG corpus.
     Uses the minimal required parameters to avoid any compatibility issues.
     
+    A document whose content (GCS MD5/CRC32C) was already imported into the
+    corpus, under this or another URI, is skipped instead of re-embedded.
+    
     Args:
         corpus_id: The ID of the corpus to import the document into
         gcs_uri: GCS path of the document to import (gs://bucket-name/file-name)
+        force: Import even when the same content is already in the corpus (default: False)
     
     Returns:
         A dictionary containing:
         - status: "success" or "error"
         - corpus_id: The ID of the corpus
+        - unchanged: True if the import was skipped because the content is already imported
         - message: Status message
     """
     try:
-        # Construct full corpus name
-        corpus_name = f"projects/{PROJECT_ID}/locations/{LOCATION}/ragCorpora/{corpus_id}"
+        content_hash = (
+            _gcs_content_hashes([gcs_uri], {})[gcs_uri] if RAG_IMPORT_SKIP_UNCHANGED and not force else None
+        )
+        
+        # Nothing to do when this content is already in the corpus
+        imported_as = _import_manifest.find_unchanged(corpus_id, gcs_uri, content_hash) if content_hash else None
+        if imported_as:
+            return {
+                "status": "success",
+                "corpus_id": corpus_id,
+                "unchanged": True,
+                "imported_as": imported_as,
+                "message": (
+                    f"Document {gcs_uri} is unchanged since it was imported into corpus '{corpus_id}'; import skipped"
+                    if imported_as == gcs_uri
+                    else f"Document {gcs_uri} has the same content as {imported_as}, already in corpus '{corpus_id}'; import skipped"
+                )
+            }
         
         # Import document with minimal configuration
-        # Use the most basic form of the API call to avoid parameter issues
-        result = rag.import_files(
-            corpus_name,
+        get_backend().import_files(
+            corpus_id,
             [gcs_uri]  # Single path in a list
         )
+        if content_hash:
+            _import_manifest.record(corpus_id, gcs_uri, content_hash)
+        # File counts, update times and retrieval results of the corpus are now stale
+        _on_corpus_contents_changed(corpus_id)
+        
+        # Keep the owner's structured profile in step with their documents
+        profile_fields = _ingest_profiles(corpus_id, [gcs_uri]).get(gcs_uri)
         
         # Return success result
-        return {
+        response = {
             "status": "success",
             "corpus_id": corpus_id,
+            "unchanged": False,
             "message": f"Successfully imported document {gcs_uri} to corpus '{corpus_id}'"
         }
+        if profile_fields:
+            response["profile_fields"] = profile_fields
+        return response
     except Exception as e:
         return {
             "status": "error",
@@ -363,26 +659,303 @@ def import_document_to_corpus(
             "message": f"Failed to import document: {str(e)}"
         }
 
+
+def _expand_gcs_prefix(gcs_prefix: str) -> Dict[str, Optional[str]]:
+    """
+    Lists every object under a gs://bucket/prefix, skipping folder placeholders.
+    
+    Returns their gs:// URIs mapped to their content hashes, which the listing already carries.
+    """
+    bucket_name, prefix = split_gcs_uri(gcs_prefix)
+    return {
+        f"gs://{bucket_name}/{blob.name}": blob_content_hash(blob)
+        for blob in get_storage_client().list_blobs(bucket_name, prefix=prefix or None)
+        if not blob.name.endswith("/")
+    }
+
+
+def _import_batch(corpus_id: str, paths: List[str]) -> Dict[str, int]:
+    """Runs one import operation to completion and returns its imported/failed/skipped counts."""
+    result = get_backend().import_files(corpus_id, paths)
+    return {
+        "imported_count": result.imported_count,
+        "failed_count": result.failed_count,
+        "skipped_count": result.skipped_count
+    }
+
+
+# Function for importing many documents into a RAG corpus at once
+def bulk_import_documents(
+    corpus_id: str,
+    gcs_uris: Optional[List[str]] = None,
+    gcs_prefix: Optional[str] = None,
+    force: bool = False
+) -> Dict[str, Any]:
+    """
+    Imports many documents from Google Cloud Storage into a RAG corpus in one call.
+    Use this instead of calling import_document_to_corpus once per file.
+    
+    The documents are split into batches of the size the import API allows,
+    the batches run as concurrent import operations, and the outcome of every
+    file is reported in a single response. Documents whose content is already
+    in the corpus (or earlier in the same request) are skipped as "unchanged".
+    
+    Args:
+        corpus_id: The ID of the corpus to import the documents into
+        gcs_uris: GCS paths of the documents to import (gs://bucket-name/file-name)
+        gcs_prefix: Import every object under this GCS prefix (gs://bucket-name/folder/)
+        force: Import every document even when its content is already in the corpus (default: False)
+    
+    Returns:
+        A dictionary containing:
+        - status: "success", "partial" or "error"
+        - corpus_id: The ID of the corpus
+        - files: Per-file outcome (gcs_uri, batch, status)
+        - batches: Per-batch imported/failed/skipped counts and errors
+        - imported_count / failed_count / skipped_count: Totals across all batches
+        - unchanged_count: Documents not imported because their content already was
+        - error_message: Present only if an error occurred
+    """
+    try:
+        # Collect and deduplicate the URIs to import, keeping their order
+        uris = list(gcs_uris or [])
+        listed_hashes: Dict[str, Optional[str]] = {}
+        if gcs_prefix:
+            listed_hashes = _expand_gcs_prefix(gcs_prefix)
+            uris.extend(listed_hashes)
+        uris = list(dict.fromkeys(uri.strip() for uri in uris if uri and uri.strip()))
+        
+        if not uris:
+            return {
+                "status": "error",
+                "corpus_id": corpus_id,
+                "error_message": "No documents to import",
+                "message": "Failed to import documents: provide gcs_uris or a gcs_prefix that contains files"
+            }
+        
+        # Leave out documents whose content is already in the corpus or earlier in this request
+        content_hashes: Dict[str, Optional[str]] = {}
+        unchanged_reports = []
+        to_import = uris
+        if RAG_IMPORT_SKIP_UNCHANGED and not force:
+            content_hashes = _gcs_content_hashes(uris, listed_hashes)
+            to_import = []
+            first_uri_for_hash: Dict[str, str] = {}
+            for uri in uris:
+                content_hash = content_hashes[uri]
+                imported_as = (
+                    first_uri_for_hash.get(content_hash) or _import_manifest.find_unchanged(corpus_id, uri, content_hash)
+                    if content_hash else None
+                )
+                if imported_as:
+                    unchanged_reports.append({"gcs_uri": uri, "status": "unchanged", "imported_as": imported_as})
+                    continue
+                if content_hash:
+                    first_uri_for_hash[content_hash] = uri
+                to_import.append(uri)
+        
+        # Split into batches the import API accepts and run them concurrently
+        batches = [
+            to_import[start:start + RAG_IMPORT_MAX_BATCH_SIZE]
+            for start in range(0, len(to_import), RAG_IMPORT_MAX_BATCH_SIZE)
+        ]
+        fan_out_result = fan_out(
+            {index: partial(_import_batch, corpus_id, batch) for index, batch in enumerate(batches)},
+            max_parallelism=RAG_IMPORT_MAX_CONCURRENT_BATCHES,
+            per_call_timeout=RAG_IMPORT_BATCH_TIMEOUT
+        )
+        
+        # Whatever was imported, the cached metadata and retrieval results are stale
+        if batches:
+            _on_corpus_contents_changed(corpus_id)
+        
+        batch_reports = []
+        file_reports = []
+        totals = {"imported_count": 0, "failed_count": 0, "skipped_count": 0}
+        for index, batch in enumerate(batches):
+            batch_report = {"batch": index, "files": len(batch)}
+            if index in fan_out_result.results:
+                counts = fan_out_result.results[index]
+                batch_report.update(counts)
+                for key in totals:
+                    totals[key] += counts[key]
+                if counts["failed_count"] or counts["skipped_count"]:
+                    batch_report["status"] = "completed_with_failures"
+                else:
+                    batch_report["status"] = "imported"
+            elif index in fan_out_result.timed_out:
+                batch_report["status"] = "timed_out"
+                batch_report["error_message"] = f"Import did not finish within {RAG_IMPORT_BATCH_TIMEOUT}s; it may still complete"
+                totals["failed_count"] += len(batch)
+            else:
+                batch_report["status"] = "failed"
+                batch_report["error_message"] = fan_out_result.errors.get(index, "Unknown error")
+                totals["failed_count"] += len(batch)
+            
+            batch_reports.append(batch_report)
+            file_reports.extend(
+                {"gcs_uri": uri, "batch": index, "status": batch_report["status"]} for uri in batch
+            )
+            
+            # Only fully imported batches say for sure which documents made it in
+            if batch_report["status"] == "imported":
+                for uri in batch:
+                    if content_hashes.get(uri):
+                        _import_manifest.record(corpus_id, uri, content_hashes[uri])
+        file_reports.extend(unchanged_reports)
+        
+        # Keep the owner's structured profile in step with the documents that made it in
+        imported_uris = [
+            report["gcs_uri"] for report in file_reports
+            if report["status"] in ("imported", "completed_with_failures")
+        ]
+        profiles_updated = sum(1 for fields in _ingest_profiles(corpus_id, imported_uris).values() if fields)
+        
+        if totals["failed_count"] == 0 and totals["skipped_count"] == 0:
+            status = "success"
+        elif totals["imported_count"] > 0:
+            status = "partial"
+        else:
+            status = "error"
+        
+        return {
+            "status": status,
+            "corpus_id": corpus_id,
+            "files": file_reports,
+            "batches": batch_reports,
+            "total_files": len(uris),
+            **totals,
+            "unchanged_count": len(unchanged_reports),
+            "profile_documents": profiles_updated,
+            "message": (
+                f"Imported {totals['imported_count']} of {len(uris)} document(s) into corpus '{corpus_id}' "
+                f"in {len(batches)} batch(es); {len(unchanged_reports)} unchanged, "
+                f"{totals['failed_count']} failed, {totals['skipped_count']} skipped"
+            )
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "corpus_id": corpus_id,
+            "error_message": str(e),
+            "message": f"Failed to import documents: {str(e)}"
+        }
+
 # RAG File Management Functions
 
-def list_rag_files(
+def _rag_file_to_dict(
+    file: RagFile,
+    fields: Optional[List[str]] = None,
+    include_raw: bool = False
+) -> Dict[str, Any]:
+    """Extracts the requested details of a RAG file returned by the backend."""
+    file_details = project(
+        {
+            "id": file.id,
+            "name": file.name,
+            "display_name": file.display_name,
+            "description": file.description,
+            "source_uri": file.source_uri,
+            "size_bytes": file.size_bytes,
+            "create_time": file.create_time,
+            "update_time": file.update_time
+        },
+        fields,
+        RAG_FILE_DEFAULT_FIELDS
+    )
+    
+    # Include raw API response data for transparency, on request only
+    if include_raw and file.raw:
+        file_details["raw_api_data"] = file.raw
+    return file_details
+
+
+def _list_rag_files_page(
+    corpus_id: str,
+    page_size: int,
+    page_token: Optional[str]
+) -> Tuple[List[RagFile], Optional[str]]:
+    """Fetches one page of RAG files and the token of the next page (None on the last page)."""
+    page = get_backend().list_files(corpus_id, page_size=page_size, page_token=page_token)
+    return page.files, page.next_page_token or None
+
+
+def iter_rag_files(
     corpus_id: str,
     page_size: Optional[int] = None,
     page_token: Optional[str] = None
+) -> Iterator[RagFile]:
+    """
+    Yields every RAG file of a corpus, walking all pages from page_token on.
+    
+    The next page is fetched in the background while the current page is
+    being consumed, so page round trips overlap with processing.
+    """
+    if page_size is None:
+        page_size = RAG_DEFAULT_PAGE_SIZE
+    
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="rag-list-files") as executor:
+        next_page = executor.submit(_list_rag_files_page, corpus_id, page_size, page_token)
+        while next_page is not None:
+            files, next_page_token = next_page.result()
+            next_page = (
+                executor.submit(_list_rag_files_page, corpus_id, page_size, next_page_token)
+                if next_page_token else None
+            )
+            yield from files
+
+
+def _summarize_rag_files(files: Iterator[RagFile]) -> Dict[str, Any]:
+    """Aggregates file count, total size and newest update time in a single pass."""
+    count = 0
+    total_size_bytes = 0
+    newest_update_time = None
+    for file in files:
+        count += 1
+        if file.size_bytes:
+            total_size_bytes += int(file.size_bytes)
+        update_time = file.update_time
+        if update_time is not None and (newest_update_time is None or str(update_time) > str(newest_update_time)):
+            newest_update_time = update_time
+    return {
+        "count": count,
+        "total_size_bytes": total_size_bytes,
+        "newest_update_time": str(newest_update_time) if newest_update_time is not None else None
+    }
+
+
+def list_rag_files(
+    corpus_id: str,
+    page_size: Optional[int] = None,
+    page_token: Optional[str] = None,
+    all_pages: bool = False,
+    summary_only: bool = False,
+    fields: Optional[List[str]] = None,
+    include_raw: bool = False
 ) -> Dict[str, Any]:
     """
     Lists all RAG files in a corpus.
     
+    Prefer summary_only=True when the user only wants to know how many files a
+    corpus holds or when it was last updated, and all_pages=True to list every
+    file in one call instead of passing next_page_token back.
+    
     Args:
         corpus_id: The ID of the corpus to list files from
-        page_size: Maximum number of files to return (default: 50)
+        page_size: Maximum number of files to return per page (default: 50)
         page_token: Token for pagination
+        all_pages: Walk every remaining page and return all files (default: False)
+        summary_only: Return only count, total size and newest update time across all pages (default: False)
+        fields: File fields to return, e.g. ["id", "display_name", "size_bytes"], or ["*"] for all
+            (default: id, display_name, source_uri, update_time)
+        include_raw: Also return the raw API data of every file (default: False)
     
     Returns:
         A dictionary containing the list of files:
         - status: "success" or "error"
         - corpus_id: The ID of the corpus
-        - files: List of file objects
+        - files: List of file objects (omitted when summary_only is True)
+        - summary: count, total_size_bytes and newest_update_time (only when summary_only is True)
         - count: Number of files found
         - next_page_token: Token for the next page (if any)
         - error_message: Present only if an error occurred
@@ -390,36 +963,34 @@ def list_rag_files(
     if page_size is None:
         page_size = RAG_DEFAULT_PAGE_SIZE
     try:
-        # Construct full corpus name
-        corpus_name = f"projects/{PROJECT_ID}/locations/{LOCATION}/ragCorpora/{corpus_id}"
-        
-        # List files
-        response = rag.list_files(
-            corpus_name=corpus_name,
-            page_size=page_size, 
-            page_token=page_token
-        )
+        if summary_only:
+            summary = _summarize_rag_files(iter_rag_files(corpus_id, page_size, page_token))
+            return {
+                "status": "success",
+                "corpus_id": corpus_id,
+                "summary": summary,
+                "count": summary["count"],
+                "next_page_token": None,
+                "message": f"Corpus '{corpus_id}' holds {summary['count']} file(s)"
+            }
         
-        # Process files
-        files = []
-        for file in response.rag_files:
-            file_id = file.name.split("/")[-1]
-            files.append({
-                "id": file_id,
-                "name": file.name,
-                "display_name": file.display_name if hasattr(file, "display_name") else None,
-                "description": file.description if hasattr(file, "description") else None,
-                "source_uri": file.source_uri if hasattr(file, "source_uri") else None,
-                "create_time": str(file.create_time) if hasattr(file, "create_time") else None,
-                "update_time": str(file.update_time) if hasattr(file, "update_time") else None
-            })
+        if all_pages:
+            files = [
+                _rag_file_to_dict(file, fields, include_raw)
+                for file in iter_rag_files(corpus_id, page_size, page_token)
+            ]
+            next_page_token = None
+        else:
+            # List a single page of files
+            page_files, next_page_token = _list_rag_files_page(corpus_id, page_size, page_token)
+            files = [_rag_file_to_dict(file, fields, include_raw) for file in page_files]
         
         return {
             "status": "success",
             "corpus_id": corpus_id,
             "files": files,
             "count": len(files),
-            "next_page_token": response.next_page_token if hasattr(response, "next_page_token") else None,
+            "next_page_token": next_page_token,
             "message": f"Found {len(files)} file(s) in corpus '{corpus_id}'"
         }
     except Exception as e:
@@ -432,7 +1003,9 @@ def list_rag_files(
 
 def get_rag_file(
     corpus_id: str,
-    file_id: str
+    file_id: str,
+    fields: Optional[List[str]] = None,
+    include_raw: bool = False
 ) -> Dict[str, Any]:
     """
     Gets details of a specific RAG file in a corpus.
@@ -440,6 +1013,9 @@ def get_rag_file(
     Args:
         corpus_id: The ID of the corpus
         file_id: The ID of the file to get
+        fields: File fields to return, e.g. ["id", "display_name", "size_bytes"], or ["*"] for all
+            (default: id, display_name, source_uri, update_time)
+        include_raw: Also return the raw API data of the file (default: False)
     
     Returns:
         A dictionary containing the file details:
@@ -449,32 +1025,11 @@ def get_rag_file(
         - error_message: Present only if an error occurred
     """
     try:
-        # Construct full file name
-        file_name = f"projects/{PROJECT_ID}/locations/{LOCATION}/ragCorpora/{corpus_id}/ragFiles/{file_id}"
-        
         # Get the file
-        file = rag.get_file(name=file_name)
+        file = get_backend().get_file(corpus_id, file_id)
         
         # Extract file details
-        file_details = {
-            "id": file_id,
-            "name": file.name,
-            "display_name": file.display_name if hasattr(file, "display_name") else None,
-            "description": file.description if hasattr(file, "description") else None,
-            "source_uri": file.source_uri if hasattr(file, "source_uri") else None,
-            "create_time": str(file.create_time) if hasattr(file, "create_time") else None,
-            "update_time": str(file.update_time) if hasattr(file, "update_time") else None
-        }
-        
-        # Include raw API response data for transparency
-        raw_data = {}
-        if hasattr(file, "to_dict"):
-            raw_data = file.to_dict()
-        elif hasattr(file, "__dict__"):
-            raw_data = {k: v for k, v in file.__dict__.items() if not k.startswith('_')}
-        
-        if raw_data:
-            file_details["raw_api_data"] = raw_data
+        file_details = _rag_file_to_dict(file, fields, include_raw)
         
         return {
             "status": "success",
@@ -510,11 +1065,16 @@ def delete_rag_file(
         - error_message: Present only if an error occurred
     """
     try:
-        # Construct full file name
-        file_name = f"projects/{PROJECT_ID}/locations/{LOCATION}/ragCorpora/{corpus_id}/ragFiles/{file_id}"
+        backend = get_backend()
+        source_uri = backend.get_file(corpus_id, file_id).source_uri
         
         # Delete the file
-        rag.delete_file(name=file_name)
+        backend.delete_file(corpus_id, file_id)
+        _on_corpus_contents_changed(corpus_id)
+        if source_uri:
+            _import_manifest.remove_document(corpus_id, source_uri)
+            if _profile_store is not None:
+                _profile_store.remove_source(source_uri)
         
         return {
             "status": "success",
@@ -531,74 +1091,152 @@ def delete_rag_file(
             "message": f"Failed to delete file: {str(e)}"
         }
 
+def _retrieve(
+    corpus_id: str,
+    query_text: str,
+    top_k: int,
+    vector_distance_threshold: float
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Fetches retrieval results from the local mirror, the retrieval cache or the
+    backend, in that order. Returns the results and response fields describing
+    where they came from.
+    """
+    # Answer from the local mirror when the corpus has been synced to it
+    if _local_vector_index is not None and _local_vector_index.has(corpus_id):
+        try:
+            local_results = _local_vector_index.query(corpus_id, query_text, top_k, vector_distance_threshold)
+            return local_results, {"backend": "local_vector_index"}
+        except Exception as e:
+            logger.warning("Local vector index query failed for %s, using the backend: %s", corpus_id, e)
+    
+    cache_key = (corpus_id, _normalize_query(query_text), top_k, vector_distance_threshold)
+    cached_results = _get_cached_retrieval(cache_key)
+    if cached_results is not None:
+        return cached_results, {"cached": True}
+    
+    # Execute the query against the configured backend
+    generation = _retrieval_generation(corpus_id)
+    backend = get_backend()
+    contexts = backend.retrieval_query(
+        corpus_id,
+        query_text,
+        top_k=top_k,
+        vector_distance_threshold=vector_distance_threshold
+    )
+    
+    # Process the results
+    results = [
+        {
+            "text": context.text,
+            "source_uri": context.source_uri,
+            "relevance_score": context.relevance_score
+        }
+        for context in contexts
+    ]
+    
+    _store_retrieval(cache_key, results, generation)
+    return results, {"backend": backend.name}
+
+
+def _resolve_rerank(rerank: Optional[bool], vector_distance_threshold: Optional[float]) -> Tuple[bool, float]:
+    """
+    Applies the rerank defaults. Reranking gathers candidates with a looser
+    vector threshold, since the rerank stage does the final filtering.
+    """
+    if rerank is None:
+        rerank = RAG_RERANK_ENABLED
+    if vector_distance_threshold is None:
+        vector_distance_threshold = (
+            RAG_RERANK_CANDIDATE_DISTANCE_THRESHOLD if rerank else RAG_DEFAULT_VECTOR_DISTANCE_THRESHOLD
+        )
+    return rerank, vector_distance_threshold
+
+
+def _resolve_budget(max_tokens: Optional[int], max_chars: Optional[int]) -> int:
+    """Returns the character budget for retrieval results; max_chars wins over max_tokens."""
+    if max_chars is not None:
+        return max_chars
+    if max_tokens is None:
+        max_tokens = RAG_RESPONSE_MAX_TOKENS
+    return max_tokens * RAG_CHARS_PER_TOKEN
+
+
+def _pack(results: List[Dict[str, Any]], query_text: str, budget: int) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Packs results into the budget; the report is None when nothing had to be cut."""
+    packed, report = pack_results(results, query_text, budget, RAG_PACK_MIN_SNIPPET_CHARS)
+    if not report["truncated_results"] and not report["dropped_results"]:
+        return packed, None
+    return packed, report
+
+
 # Function for simple direct corpus querying
 def query_rag_corpus(
     corpus_id: str,
     query_text: str,
     top_k: Optional[int] = None,
-    vector_distance_threshold: Optional[float] = None
+    vector_distance_threshold: Optional[float] = None,
+    rerank: Optional[bool] = None,
+    max_tokens: Optional[int] = None,
+    max_chars: Optional[int] = None,
+    pack: bool = True
 ) -> Dict[str, Any]:
     """
-    Directly queries a RAG corpus using the Vertex AI RAG API.
+    Directly queries a RAG corpus through the configured retrieval backend.
+    Corpora synced to the local vector index are answered in process instead, and
+    repeated queries are answered from the retrieval cache until the corpus changes.
+    
+    By default more candidates than top_k are retrieved and reranked with a
+    hybrid vector + keyword score that favours chunks holding the exact value
+    asked for (email address, phone number, profile URL, ...). Weak matches
+    are dropped, so fewer than top_k results may come back.
+    
+    The results are packed into a size budget: when they do not fit, the
+    lowest-ranked results are dropped and the last one kept may be trimmed
+    around its matching passages; "packing" then reports what was cut.
     
     Args:
         corpus_id: The ID of the corpus to query
         query_text: The search query text
         top_k: Maximum number of results to return (default: 10)
-        vector_distance_threshold: Threshold for vector similarity (default: 0.5)
+        vector_distance_threshold: Threshold for vector similarity (default: 0.5, or 0.7 when reranking)
+        rerank: Rerank the retrieved chunks with the hybrid score (default: True)
+        max_tokens: Approximate token budget for the results (default: 3000)
+        max_chars: Character budget for the results; overrides max_tokens
+        pack: Fit the results into the budget (default: True); callers that merge
+            several queries pass False and pack the merged results once
         
     Returns:
         A dictionary containing the query results
     """
     if top_k is None:
         top_k = RAG_DEFAULT_TOP_K
-    if vector_distance_threshold is None:
-        vector_distance_threshold = RAG_DEFAULT_VECTOR_DISTANCE_THRESHOLD
+    rerank, vector_distance_threshold = _resolve_rerank(rerank, vector_distance_threshold)
     try:
-        # Construct full corpus resource path
-        corpus_path = f"projects/{PROJECT_ID}/locations/{LOCATION}/ragCorpora/{corpus_id}"
-        
-        # Create the resource config
-        rag_resource = rag.RagResource(rag_corpus=corpus_path)
+        candidate_k = top_k * RAG_RERANK_CANDIDATE_MULTIPLIER if rerank else top_k
+        results, retrieval_info = _retrieve(corpus_id, query_text, candidate_k, vector_distance_threshold)
         
-        # Configure retrieval parameters
-        retrieval_config = rag.RagRetrievalConfig(
-            top_k=top_k,
-            filter=rag.utils.resources.Filter(vector_distance_threshold=vector_distance_threshold)
-        )
-        
-        # Execute the query directly using the API
-        response = rag.retrieval_query(
-            rag_resources=[rag_resource],
-            text=query_text,
-            rag_retrieval_config=retrieval_config
-        )
-        
-        # Process the results
-        results = []
-        if hasattr(response, "contexts"):
-            # Handle different response structures
-            contexts = response.contexts
-            if hasattr(contexts, "contexts"):
-                contexts = contexts.contexts
-            
-            # Extract text and metadata from each context
-            for context in contexts:
-                result = {
-                    "text": context.text if hasattr(context, "text") else "",
-                    "source_uri": context.source_uri if hasattr(context, "source_uri") else None,
-                    "relevance_score": context.relevance_score if hasattr(context, "relevance_score") else None
-                }
-                results.append(result)
+        candidates = len(results)
+        if rerank:
+            results = _reranker.rerank(results, query_text, top_k)
+        packing = None
+        if pack:
+            results, packing = _pack(results, query_text, _resolve_budget(max_tokens, max_chars))
         
-        return {
+        response = {
             "status": "success",
             "corpus_id": corpus_id,
             "results": results,
             "count": len(results),
             "query": query_text,
+            **retrieval_info,
             "message": f"Found {len(results)} results for query: '{query_text}'"
         }
+        if rerank:
+            response["candidates"] = candidates
+        if packing:
+            response["packing"] = packing
+        return response
         
     except Exception as e:
         return {
@@ -608,32 +1246,164 @@ def query_rag_corpus(
             "message": f"Failed to query corpus: {str(e)}"
         }
 
+class _TopKMerger:
+    """
+    Streaming merge of per-corpus results that only keeps the global top k.
+    
+    Results are pushed as each corpus answers; a bounded min-heap holds the
+    best k seen so far, so memory and output size do not grow with the
+    number of corpora. Ties keep the earlier arrival.
+    """
+    
+    def __init__(self, k: int):
+        self.k = k
+        self.total = 0
+        self._heap: List[tuple] = []
+        self._sequence = itertools.count()
+    
+    def push(self, corpus_id: str, result: Dict[str, Any]) -> None:
+        self.total += 1
+        score = result.get("relevance_score")
+        entry = (score if score is not None else 0, -next(self._sequence), corpus_id, result)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+    
+    def ranked(self) -> List[tuple]:
+        """Returns the kept (corpus_id, result) pairs, best first."""
+        return [(corpus_id, result) for _, _, corpus_id, result in sorted(self._heap, key=lambda e: e[:2], reverse=True)]
+
+
+def _format_citation(corpus_name: str, corpus_id: str, source_uri: Optional[str]) -> str:
+    """Builds the "[Source: ...]" citation string attached to search results."""
+    citation = f"[Source: {corpus_name} ({corpus_id})]"
+    if source_uri:
+        file_name = source_uri.split("/")[-1] if "/" in source_uri else source_uri
+        citation += f" File: {file_name}"
+    return citation
+
+
+def _group_duplicates(results: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """Groups identical and near-identical chunks (one group per result when deduplication is off)."""
+    if not RAG_DEDUP_ENABLED:
+        return [[result] for result in results]
+    return group_near_duplicates(results, RAG_DEDUP_SHINGLE_SIZE, RAG_DEDUP_JACCARD_THRESHOLD)
+
+
+def _merge_duplicate_group(group: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Collapses a group of duplicate results into its best-ranked member, which
+    lists the citations of every member under "citations".
+    """
+    result = group[0]
+    citations = list(dict.fromkeys(member["citation"] for member in group))
+    if len(citations) > 1:
+        result["citations"] = citations
+    return result
+
+
+def _route_corpora(
+    all_corpora: List[Dict[str, Any]],
+    user: Optional[str],
+    include_all_corpora: bool
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Picks the corpora to search on behalf of a user.
+    
+    Uses the user -> corpus index, which is only changed by create_rag_corpus
+    and update_rag_corpus with an explicit owner. Every corpus is searched when
+    no user is known or include_all_corpora is set; a user who owns no corpus
+    gets no corpora, so another applicant's documents are never searched.
+    """
+    if include_all_corpora or not user:
+        return all_corpora, {"mode": "all_corpora", "user": user}
+    
+    owned = set(_corpus_index.corpora_for(user))
+    routed = [corpus for corpus in all_corpora if corpus["id"] in owned]
+    return routed, {"mode": "user", "user": user}
+
+
+def _no_user_corpora_message(user: str) -> str:
+    return (
+        f"No corpora belong to user '{user}'. Assign the user's corpus with update_rag_corpus(owner=...), "
+        f"or pass include_all_corpora=True to search every corpus"
+    )
+
+
 # Function to search across all corpora
 def search_all_corpora(
     query_text: str,
     top_k_per_corpus: Optional[int] = None,
-    vector_distance_threshold: Optional[float] = None
+    vector_distance_threshold: Optional[float] = None,
+    top_k: Optional[int] = None,
+    include_corpus_results: bool = False,
+    max_parallelism: Optional[int] = None,
+    per_corpus_timeout: Optional[float] = None,
+    deadline: Optional[float] = None,
+    user: Optional[str] = None,
+    include_all_corpora: bool = False,
+    rerank: Optional[bool] = None,
+    max_tokens: Optional[int] = None,
+    max_chars: Optional[int] = None,
+    tool_context: Optional[ToolContext] = None
 ) -> Dict[str, Any]:
     """
-    Searches across ALL available corpora for the given query text.
+    Searches across the available corpora for the given query text.
     When a user wants to search for information without specifying a corpus,
     this is the default tool to use.
     
+    When the applicant is known (the user argument, or the user name saved in
+    session state), only that user's corpora are searched. Set
+    include_all_corpora=True to search every corpus in the project instead.
+    
+    Corpora are queried concurrently. Corpora that do not answer within
+    per_corpus_timeout, or before the overall deadline, are skipped and
+    listed in "timed_out_corpora" so the results that did arrive can still be used.
+    Only the best top_k results across all corpora are returned; by default
+    they are picked by reranking a larger candidate set with the same hybrid
+    score as query_rag_corpus, so fewer than top_k may come back. The same
+    chunk found in several corpora (e.g. one resume uploaded twice) is
+    returned once, with every source listed under "citations". The results
+    are packed into the same size budget as query_rag_corpus.
+    
     Args:
         query_text: The search query text
-        top_k_per_corpus: Maximum number of results to return per corpus (default: 5)
-        vector_distance_threshold: Threshold for vector similarity (default: 0.5)
+        top_k_per_corpus: Maximum number of results to request from each corpus (default: 5)
+        vector_distance_threshold: Threshold for vector similarity (default: 0.5, or 0.7 when reranking)
+        top_k: Maximum number of results to return across all corpora (default: 10)
+        include_corpus_results: Also return the results grouped per corpus (default: False)
+        max_parallelism: Maximum number of corpora queried at the same time (default: 8)
+        per_corpus_timeout: Seconds to wait for a single corpus (default: 10)
+        deadline: Seconds to wait for the whole search (default: 25)
+        user: Name of the user whose corpora should be searched (default: user from session state)
+        include_all_corpora: Search every corpus regardless of user (default: False)
+        rerank: Rerank the merged results with the hybrid score (default: True)
+        max_tokens: Approximate token budget for the results (default: 3000)
+        max_chars: Character budget for the results; overrides max_tokens
+        tool_context: The tool context for ADK
         
     Returns:
-        A dictionary containing the combined search results with citations
+        A dictionary containing the combined search results with citations,
+        "routing" describing which corpora were searched, plus "partial" and
+        "timed_out_corpora" when some corpora did not answer in time
     """
     if top_k_per_corpus is None:
         top_k_per_corpus = RAG_DEFAULT_SEARCH_TOP_K
-    if vector_distance_threshold is None:
-        vector_distance_threshold = RAG_DEFAULT_VECTOR_DISTANCE_THRESHOLD
+    rerank, vector_distance_threshold = _resolve_rerank(rerank, vector_distance_threshold)
+    if top_k is None:
+        top_k = RAG_DEFAULT_SEARCH_GLOBAL_TOP_K
+    if max_parallelism is None:
+        max_parallelism = RAG_SEARCH_MAX_PARALLELISM
+    if per_corpus_timeout is None:
+        per_corpus_timeout = RAG_SEARCH_PER_CORPUS_TIMEOUT
+    if deadline is None:
+        deadline = RAG_SEARCH_DEADLINE
+    if user is None and tool_context is not None:
+        user = tool_context.state.get("user:name")
     try:
-        # First, list all available corpora
-        corpora_response = list_rag_corpora()
+        # First, list all available corpora (without file counts, which searching never needs)
+        corpora_response = list_rag_corpora(include_file_counts=False)
         
         if corpora_response["status"] != "success":
             return {
@@ -650,78 +1420,141 @@ def search_all_corpora(
                 "message": "No corpora found to search in"
             }
         
-        # Search in each corpus
-        all_results = []
-        corpus_results_map = {}  # Map of corpus name to its results
-        searched_corpora = []
+        # Only search the applicant's corpora when we know who is applying
+        routed_corpora, routing = _route_corpora(all_corpora, user, include_all_corpora)
+        if not routed_corpora:
+            return {
+                "status": "warning",
+                "query": query_text,
+                "results": [],
+                "count": 0,
+                "routing": routing,
+                "message": _no_user_corpora_message(user)
+            }
+        corpus_names = {corpus["id"]: corpus.get("display_name", corpus["id"]) for corpus in routed_corpora}
         
-        for corpus in all_corpora:
-            corpus_id = corpus["id"]
-            corpus_name = corpus.get("display_name", corpus_id)
-            
-            # Query this corpus
-            corpus_results = query_rag_corpus(
-                corpus_id=corpus_id,
-                query_text=query_text,
-                top_k=top_k_per_corpus,
-                vector_distance_threshold=vector_distance_threshold
-            )
-            
-            # Add corpus info to the results
+        # Merge results into a bounded global top-k heap as each corpus answers,
+        # keeping extra candidates for the rerank and deduplication stages
+        merger = _TopKMerger(top_k * RAG_RERANK_CANDIDATE_MULTIPLIER if rerank or RAG_DEDUP_ENABLED else top_k)
+        
+        def _merge_corpus_results(corpus_id: str, corpus_results: Dict[str, Any]) -> None:
             if corpus_results["status"] == "success":
-                results = corpus_results.get("results", [])
-                corpus_specific_results = []
-                
-                for result in results:
-                    # Add citation and source information
-                    result["corpus_id"] = corpus_id
-                    result["corpus_name"] = corpus_name
-                    result["citation"] = f"[Source: {corpus_name} ({corpus_id})]"
-                    
-                    # Add source file information if available
-                    if "source_uri" in result and result["source_uri"]:
-                        source_path = result["source_uri"]
-                        file_name = source_path.split("/")[-1] if "/" in source_path else source_path
-                        result["citation"] += f" File: {file_name}"
-                    
-                    corpus_specific_results.append(result)
-                    all_results.append(result)
-                
-                # Save results for this corpus
-                if corpus_specific_results:
-                    corpus_results_map[corpus_name] = {
-                        "corpus_id": corpus_id,
-                        "corpus_name": corpus_name,
-                        "results": corpus_specific_results,
-                        "count": len(corpus_specific_results)
-                    }
-                    searched_corpora.append(corpus_name)
+                for result in corpus_results.get("results", []):
+                    merger.push(corpus_id, result)
         
-        # Sort all results by relevance score (if available)
-        all_results.sort(
-            key=lambda x: x.get("relevance_score", 0) if x.get("relevance_score") is not None else 0,
-            reverse=True
+        # Query every corpus concurrently, bounded by the per-corpus and overall budgets
+        fan_out_result = fan_out(
+            {
+                corpus_id: partial(
+                    query_rag_corpus,
+                    corpus_id=corpus_id,
+                    query_text=query_text,
+                    top_k=top_k_per_corpus,
+                    vector_distance_threshold=vector_distance_threshold,
+                    rerank=False,
+                    pack=False
+                )
+                for corpus_id in corpus_names
+            },
+            max_parallelism=max_parallelism,
+            per_call_timeout=per_corpus_timeout,
+            deadline=deadline,
+            on_result=_merge_corpus_results
         )
         
-        # Format citations summary
-        citations_summary = []
-        for corpus_name in searched_corpora:
-            corpus_data = corpus_results_map[corpus_name]
-            citations_summary.append(
-                f"{corpus_name} ({corpus_data['corpus_id']}): {corpus_data['count']} results"
-            )
+        timed_out_corpora = [
+            f"{corpus_names[corpus_id]} ({corpus_id})"
+            for corpus_id in corpus_names if corpus_id in fan_out_result.timed_out
+        ]
+        failed_corpora = [
+            f"{corpus_names[corpus_id]} ({corpus_id})"
+            for corpus_id in corpus_names
+            if corpus_id in fan_out_result.errors
+            or (corpus_id in fan_out_result.results and fan_out_result.results[corpus_id]["status"] != "success")
+        ]
         
-        return {
+        ranked_results = []
+        for corpus_id, result in merger.ranked():
+            result["corpus_id"] = corpus_id
+            ranked_results.append(result)
+        candidates = len(ranked_results)
+        if rerank:
+            # Keep every candidate above the cutoff; duplicates are collapsed before trimming to top_k
+            ranked_results = _reranker.rerank(ranked_results, query_text, candidates if RAG_DEDUP_ENABLED else top_k)
+        
+        # Add citation and source information, then collapse the same chunk found in several corpora
+        for result in ranked_results:
+            corpus_name = corpus_names[result["corpus_id"]]
+            result["corpus_name"] = corpus_name
+            result["citation"] = _format_citation(corpus_name, result["corpus_id"], result.get("source_uri"))
+        groups = _group_duplicates(ranked_results)[:top_k]
+        
+        all_results = [_merge_duplicate_group(group) for group in groups]
+        
+        # Fit the results into the response budget; packing only drops from the end
+        all_results, packing = _pack(all_results, query_text, _resolve_budget(max_tokens, max_chars))
+        groups = groups[:len(all_results)]
+        
+        corpus_counts: Dict[str, int] = {}
+        for group in groups:
+            for member in group:
+                corpus_counts[member["corpus_id"]] = corpus_counts.get(member["corpus_id"], 0) + 1
+        duplicates_collapsed = sum(len(group) - 1 for group in groups)
+        
+        # Format citations summary in corpus listing order
+        searched_corpora = [corpus_names[corpus_id] for corpus_id in corpus_names if corpus_id in corpus_counts]
+        citations_summary = [
+            f"{corpus_names[corpus_id]} ({corpus_id}): {corpus_counts[corpus_id]} results"
+            for corpus_id in corpus_names if corpus_id in corpus_counts
+        ]
+        
+        message = f"Found {len(all_results)} results for query '{query_text}' across {len(searched_corpora)} corpora"
+        if merger.total > len(all_results):
+            message += f" (top {len(all_results)} of {merger.total} matches)"
+        if duplicates_collapsed:
+            message += f" ({duplicates_collapsed} duplicate chunks merged)"
+        if packing:
+            message += f" (trimmed to fit {packing['max_chars']} characters)"
+        if timed_out_corpora:
+            message += f" ({len(timed_out_corpora)} corpora timed out)"
+        
+        response = {
             "status": "success",
             "results": all_results,
-            "corpus_results": corpus_results_map,
             "searched_corpora": searched_corpora,
             "citations_summary": citations_summary,
             "count": len(all_results),
+            "total_matches": merger.total,
             "query": query_text,
-            "message": f"Found {len(all_results)} results for query '{query_text}' across {len(searched_corpora)} corpora",
+            "routing": routing,
+            "partial": bool(timed_out_corpora),
+            "timed_out_corpora": timed_out_corpora,
+            "failed_corpora": failed_corpora,
+            "message": message,
             "citation_note": "Each result includes a citation indicating its source corpus and file."
         }
+        if rerank:
+            response["candidates"] = candidates
+        if duplicates_collapsed:
+            response["duplicates_collapsed"] = duplicates_collapsed
+        if packing:
+            response["packing"] = packing
+        
+        # The per-corpus map repeats every result, so it is only built on request
+        if include_corpus_results:
+            corpus_results_map = {}
+            for result in all_results:
+                corpus_data = corpus_results_map.setdefault(result["corpus_name"], {
+                    "corpus_id": result["corpus_id"],
+                    "corpus_name": result["corpus_name"],
+                    "results": [],
+                    "count": 0
+                })
+                corpus_data["results"].append(result)
+                corpus_data["count"] += 1
+            response["corpus_results"] = corpus_results_map
+        
+        return response
         
     except Exception as e:
         return {
@@ -730,6 +1563,385 @@ def search_all_corpora(
             "message": f"Failed to search all corpora: {str(e)}"
         }
 
+def _normalize_field_label(label: str) -> str:
+    """Turns a form label such as 'Full Name *' or 'E-mail: (required)' into a comparable key."""
+    label = re.sub(r"\((required|optional)\)", "", label, flags=re.IGNORECASE)
+    label = label.strip().strip("*:").strip()
+    return " ".join(label.lower().split())
+
+
+# Function to retrieve the values of many form fields in one call
+def retrieve_fields(
+    user: str,
+    fields: List[str],
+    top_k_per_field: Optional[int] = None,
+    vector_distance_threshold: Optional[float] = None,
+    include_all_corpora: bool = False,
+    rerank: Optional[bool] = None,
+    max_tokens: Optional[int] = None,
+    max_chars: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Retrieves a user's information for a list of form fields in a single call.
+    Use this for the job application pipeline instead of building one long query:
+    pass ALL the extracted form field names at once.
+    
+    Field labels are normalized and deduplicated ("Email *" and "email:" are
+    searched once), and every distinct field is searched separately and concurrently
+    in the user's corpora. Snippets are reranked per field, and snippets holding
+    a value of the requested shape (email, phone, profile URL, ...) list it
+    under "matched_values". The snippets of every searched field are packed
+    into an equal share of the size budget once they are merged.
+    
+    Common fields (name, email, phone, location, links, work authorization,
+    years of experience) are answered from the user's stored profile when
+    it holds them with enough confidence, as a single snippet with a "value";
+    only the other fields are searched.
+    
+    Args:
+        user: The name of the user whose information is needed
+        fields: The form field labels, e.g. ["Full Name", "Email", "Phone", "LinkedIn"]
+        top_k_per_field: Maximum number of snippets returned per field (default: 3)
+        vector_distance_threshold: Threshold for vector similarity (default: 0.5, or 0.7 when reranking)
+        include_all_corpora: Search every corpus instead of only the user's (default: False)
+        rerank: Rerank each field's snippets with the hybrid score (default: True)
+        max_tokens: Approximate token budget for all snippets together (default: 3000)
+        max_chars: Character budget for all snippets together; overrides max_tokens
+        
+    Returns:
+        A dictionary containing:
+        - status: "success", "warning" or "error"
+        - user: The user the fields were retrieved for
+        - routing: Which corpora were searched
+        - fields: Map of each field label to its best snippets (text, relevance_score, citation),
+          or to one profile snippet (value, source, citation)
+        - missing_fields: Labels for which nothing was found
+        - profile_fields: Number of labels answered from the stored profile
+        - timed_out_corpora: Corpora that did not answer in time
+        - error_message: Present only if an error occurred
+    """
+    if top_k_per_field is None:
+        top_k_per_field = RAG_FIELD_SNIPPETS_PER_FIELD
+    rerank, vector_distance_threshold = _resolve_rerank(rerank, vector_distance_threshold)
+    try:
+        # Deduplicate labels that only differ in case, punctuation or required markers
+        labels_by_key: Dict[str, List[str]] = {}
+        for label in fields:
+            key = _normalize_field_label(label)
+            if key:
+                labels_by_key.setdefault(key, []).append(label)
+        
+        if not labels_by_key:
+            return {
+                "status": "error",
+                "user": user,
+                "error_message": "No field labels provided",
+                "message": "Failed to retrieve fields: no field labels provided"
+            }
+        
+        # Answer the fields held in the user's profile with a lookup instead of a search
+        field_snippets = {}
+        if _profile_store is not None:
+            profile = _profile_store.get_profile(user)
+            for key in list(labels_by_key):
+                profile_field = field_key_for_label(key)
+                entry = profile.get(profile_field) if profile_field else None
+                # Uncertain values (a guessed name, a sentence about visas) are searched for instead
+                if entry and entry["confidence"] >= RAG_PROFILE_MIN_CONFIDENCE:
+                    snippet = {
+                        "value": entry["value"],
+                        "source": "profile",
+                        "confidence": entry["confidence"],
+                        "citation": _format_citation("Profile", user, entry["source_uri"])
+                    }
+                    for label in labels_by_key.pop(key):
+                        field_snippets[label] = [snippet]
+        profile_fields = len(field_snippets)
+        
+        if not labels_by_key:
+            return {
+                "status": "success",
+                "user": user,
+                "fields": field_snippets,
+                "missing_fields": [],
+                "profile_fields": profile_fields,
+                "routing": {"mode": "profile", "user": user},
+                "timed_out_corpora": [],
+                "message": f"Retrieved all {len(field_snippets)} fields for user '{user}' from the stored profile"
+            }
+        
+        corpora_response = list_rag_corpora(include_file_counts=False)
+        if corpora_response["status"] != "success":
+            return {
+                "status": "error",
+                "user": user,
+                "error_message": f"Failed to list corpora: {corpora_response.get('error_message', '')}",
+                "message": "Failed to retrieve fields - could not retrieve corpus list"
+            }
+        
+        all_corpora = corpora_response.get("corpora", [])
+        if not all_corpora:
+            missing_fields = [label for labels in labels_by_key.values() for label in labels]
+            return {
+                "status": "warning",
+                "user": user,
+                "fields": {**{label: [] for label in missing_fields}, **field_snippets},
+                "missing_fields": missing_fields,
+                "profile_fields": profile_fields,
+                "message": "No corpora found to search in"
+            }
+        
+        routed_corpora, routing = _route_corpora(all_corpora, user, include_all_corpora)
+        if not routed_corpora:
+            missing_fields = [label for labels in labels_by_key.values() for label in labels]
+            return {
+                "status": "warning",
+                "user": user,
+                "fields": {**{label: [] for label in missing_fields}, **field_snippets},
+                "missing_fields": missing_fields,
+                "profile_fields": profile_fields,
+                "routing": routing,
+                "message": _no_user_corpora_message(user)
+            }
+        corpus_names = {corpus["id"]: corpus.get("display_name", corpus["id"]) for corpus in routed_corpora}
+        
+        # Keep only the best snippets of every field across all corpora (plus rerank and deduplication candidates)
+        candidates_per_field = (
+            top_k_per_field * RAG_RERANK_CANDIDATE_MULTIPLIER if rerank or RAG_DEDUP_ENABLED else top_k_per_field
+        )
+        mergers = {key: _TopKMerger(candidates_per_field) for key in labels_by_key}
+        
+        def _merge_field_results(call_key: tuple, corpus_results: Dict[str, Any]) -> None:
+            key, corpus_id = call_key
+            if corpus_results["status"] == "success":
+                for result in corpus_results.get("results", []):
+                    mergers[key].push(corpus_id, result)
+        
+        # One retrieval per (distinct field, corpus), all run in a single fan-out
+        fan_out_result = fan_out(
+            {
+                (key, corpus_id): partial(
+                    query_rag_corpus,
+                    corpus_id=corpus_id,
+                    query_text=RAG_FIELD_QUERY_TEMPLATE.format(user=user, field=labels[0]),
+                    top_k=RAG_FIELD_TOP_K_PER_CORPUS,
+                    vector_distance_threshold=vector_distance_threshold,
+                    rerank=False,
+                    pack=False
+                )
+                for key, labels in labels_by_key.items()
+                for corpus_id in corpus_names
+            },
+            max_parallelism=RAG_SEARCH_MAX_PARALLELISM,
+            per_call_timeout=RAG_SEARCH_PER_CORPUS_TIMEOUT,
+            deadline=RAG_SEARCH_DEADLINE,
+            on_result=_merge_field_results
+        )
+        
+        # Each searched field gets an equal share of the response budget
+        field_budget = _resolve_budget(max_tokens, max_chars) // len(labels_by_key)
+        packing = {"max_chars": field_budget * len(labels_by_key), "chars": 0, "truncated_results": 0, "dropped_results": 0}
+        
+        missing_fields = []
+        for key, labels in labels_by_key.items():
+            ranked_results = []
+            for corpus_id, result in mergers[key].ranked():
+                result["corpus_id"] = corpus_id
+                ranked_results.append(result)
+            if rerank:
+                # Rerank on the label alone; the user name appears in every snippet
+                ranked_results = _reranker.rerank(
+                    ranked_results, labels[0], len(ranked_results) if RAG_DEDUP_ENABLED else top_k_per_field
+                )
+            for result in ranked_results:
+                result["citation"] = _format_citation(
+                    corpus_names[result["corpus_id"]], result["corpus_id"], result.get("source_uri")
+                )
+            
+            snippets = []
+            for group in _group_duplicates(ranked_results)[:top_k_per_field]:
+                result = _merge_duplicate_group(group)
+                snippet = {
+                    "text": result.get("text", ""),
+                    "relevance_score": result.get("relevance_score"),
+                    "citation": result["citation"]
+                }
+                if result.get("citations"):
+                    snippet["citations"] = result["citations"]
+                if result.get("matched_values"):
+                    snippet["matched_values"] = result["matched_values"]
+                snippets.append(snippet)
+            snippets, report = pack_results(snippets, labels[0], field_budget, RAG_PACK_MIN_SNIPPET_CHARS)
+            for counter in ("chars", "truncated_results", "dropped_results"):
+                packing[counter] += report[counter]
+            for label in labels:
+                field_snippets[label] = snippets
+                if not snippets:
+                    missing_fields.append(label)
+        
+        timed_out_corpora = sorted({
+            f"{corpus_names[corpus_id]} ({corpus_id})" for _, corpus_id in fan_out_result.timed_out
+        })
+        
+        response = {
+            "status": "success",
+            "user": user,
+            "fields": field_snippets,
+            "missing_fields": missing_fields,
+            "profile_fields": profile_fields,
+            "routing": routing,
+            "timed_out_corpora": timed_out_corpora,
+            "message": f"Retrieved {len(field_snippets) - len(missing_fields)} of {len(field_snippets)} fields for user '{user}'"
+        }
+        if packing["truncated_results"] or packing["dropped_results"]:
+            response["packing"] = packing
+        return response
+        
+    except Exception as e:
+        return {
+            "status": "error",
+            "user": user,
+            "error_message": str(e),
+            "message": f"Failed to retrieve fields: {str(e)}"
+        }
+
+
+def _read_source_text(source_uri: str) -> Optional[str]:
+    """Reads the text of a corpus document, creating the GCS client only for gs:// URIs."""
+    storage_client = get_storage_client() if source_uri.startswith("gs://") else None
+    return read_document_text(source_uri, storage_client)
+
+
+def _read_file_chunks(source_uri: str) -> List[Dict[str, Any]]:
+    """Downloads a corpus document and splits its text into chunks for the local index."""
+    text = _read_source_text(source_uri)
+    if text is None:
+        if source_uri.lower().endswith(".pdf") and not PDF_SUPPORTED:
+            raise ValueError("PDF text extraction needs the pypdf package")
+        raise ValueError("unsupported document format")
+    return [
+        {"text": chunk, "source_uri": source_uri}
+        for chunk in chunk_text(text, RAG_LOCAL_CHUNK_CHARS, RAG_LOCAL_CHUNK_OVERLAP_CHARS)
+    ]
+
+
+def sync_local_vector_index(corpus_id: str) -> Dict[str, Any]:
+    """
+    Mirrors the documents of a corpus into the local vector index so that
+    queries on it are answered in process. Run again after the corpus changes
+    (imports and file deletions made through these tools re-sync automatically).
+    
+    Args:
+        corpus_id: The ID of the corpus to mirror
+    
+    Returns:
+        A dictionary containing:
+        - status: "success" or "error"
+        - corpus_id: The ID of the corpus
+        - files_indexed: Number of documents mirrored
+        - chunks: Number of text chunks embedded
+        - skipped_files: Documents that could not be read, with the reason
+        - error_message: Present only if an error occurred
+    """
+    if _local_vector_index is None:
+        return {
+            "status": "error",
+            "corpus_id": corpus_id,
+            "error_message": "Local vector index is disabled",
+            "message": "Set RAG_LOCAL_VECTOR_INDEX_ENABLED=true to use the local vector index"
+        }
+    try:
+        source_uris = [
+            file.source_uri for file in iter_rag_files(corpus_id)
+            if getattr(file, "source_uri", None)
+        ]
+        
+        # Download and chunk the documents concurrently
+        downloads = fan_out(
+            {uri: partial(_read_file_chunks, uri) for uri in source_uris},
+            max_parallelism=RAG_FILE_COUNT_MAX_PARALLELISM
+        )
+        chunks = [chunk for uri in source_uris for chunk in downloads.results.get(uri, [])]
+        skipped_files = [{"source_uri": uri, "reason": error} for uri, error in downloads.errors.items()]
+        
+        meta = _local_vector_index.build(corpus_id, chunks)
+        
+        return {
+            "status": "success",
+            "corpus_id": corpus_id,
+            "files_indexed": len(downloads.results),
+            "chunks": meta["count"],
+            "embedder": meta["embedder"],
+            "skipped_files": skipped_files,
+            "message": f"Mirrored {len(downloads.results)} document(s) of corpus '{corpus_id}' into the local vector index"
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "corpus_id": corpus_id,
+            "error_message": str(e),
+            "message": f"Failed to sync local vector index: {str(e)}"
+        }
+
+
+def get_user_profile(user: str) -> Dict[str, Any]:
+    """
+    Returns the structured profile stored for a user: the fields extracted
+    from the documents imported into the user's corpora.
+    
+    Args:
+        user: The name of the user
+    
+    Returns:
+        A dictionary containing:
+        - status: "success" or "error"
+        - user: The user
+        - profile: Map of field name to {"value", "source_uri", "confidence", "from_resume"}
+        - error_message: Present only if an error occurred
+    """
+    if _profile_store is None:
+        return {
+            "status": "error",
+            "user": user,
+            "error_message": "The profile store is disabled",
+            "message": "Set RAG_PROFILE_STORE_ENABLED in rag/config.py to extract user profiles"
+        }
+    try:
+        profile = _profile_store.get_profile(user)
+        return {
+            "status": "success",
+            "user": user,
+            "profile": profile,
+            "message": f"Found {len(profile)} profile field(s) for user '{user}'"
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "user": user,
+            "error_message": str(e),
+            "message": f"Failed to get user profile: {str(e)}"
+        }
+
+
+def get_rag_cache_stats() -> Dict[str, Any]:
+    """
+    Reports the size and hit/miss counters of the RAG tool caches.
+    
+    Returns:
+        A dictionary containing:
+        - status: "success"
+        - metadata_cache: Counters of the corpus listing/details cache
+        - retrieval_cache: Counters of the in-memory query result cache
+        - retrieval_disk_cache: Counters of the on-disk query result cache (None when disabled)
+    """
+    return {
+        "status": "success",
+        "metadata_cache": _corpus_metadata_cache.stats(),
+        "retrieval_cache": _retrieval_cache.stats(),
+        "retrieval_disk_cache": _retrieval_disk_cache.stats() if _retrieval_disk_cache is not None else None,
+        "message": "Retrieved RAG cache statistics"
+    }
+
 # Create FunctionTools from the functions for the RAG corpus management tools
 create_corpus_tool = FunctionTool(create_rag_corpus)
 update_corpus_tool = FunctionTool(update_rag_corpus)
@@ -737,6 +1949,7 @@ list_corpora_tool = FunctionTool(list_rag_corpora)
 get_corpus_tool = FunctionTool(get_rag_corpus)
 delete_corpus_tool = FunctionTool(delete_rag_corpus)
 import_document_tool = FunctionTool(import_document_to_corpus)
+bulk_import_tool = FunctionTool(bulk_import_documents)
 
 # Create FunctionTools from the functions for the RAG file management tools
 list_files_tool = FunctionTool(list_rag_files)
@@ -745,4 +1958,10 @@ delete_file_tool = FunctionTool(delete_rag_file)
 
 # Create FunctionTools from the functions for the RAG query tools
 query_rag_corpus_tool = FunctionTool(query_rag_corpus)
-search_all_corpora_tool = FunctionTool(search_all_corpora)
\ No newline at end of file
+search_all_corpora_tool = FunctionTool(search_all_corpora)
+retrieve_fields_tool = FunctionTool(retrieve_fields)
+get_user_profile_tool = FunctionTool(get_user_profile)
+sync_local_index_tool = FunctionTool(sync_local_vector_index)
+
+# Create FunctionTools from the functions for the RAG diagnostics tools
+cache_stats_tool = FunctionTool(get_rag_cache_stats)
\ No newline at end of file
@@ -0,0 +1,82 @@
+"""
+Near-duplicate detection for retrieval results.
+
+The same resume is often uploaded to several corpora, or re-imported in a
+new version, so a search returns near-identical chunks several times. Each
+chunk is fingerprinted with a hash of its normalized text (exact duplicates)
+and a set of hashed word shingles (near duplicates, compared by Jaccard
+similarity).
+"""
+
+import hashlib
+import re
+from typing import Any, Dict, FrozenSet, List
+
+
+def normalize_text(text: str) -> str:
+    """Lower-cases text and reduces it to its words, so formatting differences do not matter."""
+    return " ".join(re.findall(r"\w+", text.lower()))
+
+
+def content_hash(text: str) -> str:
+    """Hash of the normalized text, equal for chunks that only differ in case, spacing or punctuation."""
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def shingles(text: str, size: int) -> FrozenSet[int]:
+    """Hashed word n-grams of the normalized text; short texts yield a single shingle."""
+    words = normalize_text(text).split()
+    if len(words) <= size:
+        return frozenset({hash(" ".join(words))}) if words else frozenset()
+    return frozenset(hash(" ".join(words[start:start + size])) for start in range(len(words) - size + 1))
+
+
+def jaccard(first: FrozenSet[int], second: FrozenSet[int]) -> float:
+    """Jaccard similarity of two shingle sets."""
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def group_near_duplicates(
+    results: List[Dict[str, Any]],
+    shingle_size: int,
+    threshold: float
+) -> List[List[Dict[str, Any]]]:
+    """
+    Groups results whose texts are identical or near-identical.
+
+    Results are visited in the given (ranked) order, so the first member of
+    every group is its best-ranked result and groups keep the ranking.
+
+    Args:
+        results: Results with a "text" entry, best first
+        shingle_size: Number of words per shingle
+        threshold: Minimum Jaccard similarity for two texts to count as duplicates
+
+    Returns:
+        The groups, each a list of results with the representative first
+    """
+    groups: List[List[Dict[str, Any]]] = []
+    group_by_hash: Dict[str, int] = {}
+    group_shingles: List[FrozenSet[int]] = []
+
+    for result in results:
+        text = result.get("text") or ""
+        digest = content_hash(text)
+        index = group_by_hash.get(digest)
+
+        if index is None:
+            result_shingles = shingles(text, shingle_size)
+            for candidate, candidate_shingles in enumerate(group_shingles):
+                if jaccard(result_shingles, candidate_shingles) >= threshold:
+                    index = candidate
+                    break
+
+        if index is None:
+            index = len(groups)
+            groups.append([])
+            group_shingles.append(result_shingles)
+        group_by_hash[digest] = index
+        groups[index].append(result)
+    return groups
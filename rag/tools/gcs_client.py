@@ -0,0 +1,111 @@
+"""
+Shared Google Cloud Storage client for the RAG and storage tools.
+
+Creating a storage.Client runs credential discovery and opens a new HTTP
+connection pool, so every tool uses the one client returned by
+get_storage_client(). It is created on first use with a connection pool
+sized for the thread pools that share it. set_storage_client() swaps in
+another client, e.g. a local fake for tests and benchmarks.
+
+The hash helpers compute and read the MD5 / CRC32C checksums GCS keeps for
+every object, so tools can tell whether content has changed without
+downloading it.
+"""
+
+import base64
+import hashlib
+import threading
+from typing import Any, Optional, Tuple
+
+from rag.config import PROJECT_ID, GCS_HTTP_POOL_SIZE, GCS_HTTP_MAX_RETRIES
+
+_GCS_ENDPOINT = "https://storage.googleapis.com/"
+
+_client: Optional[Any] = None
+_client_lock = threading.Lock()
+
+
+def _create_client() -> Any:
+    """
+    Creates a storage client whose HTTP sessions keep GCS_HTTP_POOL_SIZE connections per host.
+
+    The client is handed its own AuthorizedSession (the `_http` argument the
+    client constructor takes for this purpose) with the pooled adapter
+    mounted, rather than patching the session the client creates itself.
+
+    Raises:
+        RuntimeError: If the client does not send its requests through the pooled adapter
+    """
+    import google.auth
+    import requests
+    from google.auth.transport.requests import AuthorizedSession, Request
+    from google.cloud import storage
+
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=GCS_HTTP_POOL_SIZE,
+        pool_maxsize=GCS_HTTP_POOL_SIZE,
+        max_retries=GCS_HTTP_MAX_RETRIES,
+        pool_block=True
+    )
+    # The authorized session carries the API calls, the refresh session the token refreshes
+    refresh_session = requests.Session()
+    refresh_session.mount("https://", adapter)
+    credentials, _ = google.auth.default(scopes=storage.Client.SCOPE)
+    session = AuthorizedSession(credentials, auth_request=Request(session=refresh_session))
+    session.mount("https://", adapter)
+
+    client = storage.Client(project=PROJECT_ID, credentials=credentials, _http=session)
+    if client._http is not session or session.get_adapter(_GCS_ENDPOINT) is not adapter:
+        raise RuntimeError("The GCS client does not use the pooled HTTP session; check the google-cloud-storage version")
+    return client
+
+
+def get_storage_client() -> Any:
+    """Returns the shared storage client, creating it on first use. Safe to call from any thread."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _create_client()
+    return _client
+
+
+def set_storage_client(client: Optional[Any]) -> None:
+    """Replaces the shared client, e.g. with a fake in tests; None makes the next call create a real one."""
+    global _client
+    with _client_lock:
+        _client = client
+
+
+def split_gcs_uri(gcs_uri: str) -> Tuple[str, str]:
+    """Splits gs://bucket/path/to/object into ("bucket", "path/to/object")."""
+    if not gcs_uri.startswith("gs://"):
+        raise ValueError(f"GCS URI must start with gs://, got '{gcs_uri}'")
+    bucket_name, _, blob_name = gcs_uri[len("gs://"):].partition("/")
+    return bucket_name, blob_name
+
+
+def payload_md5(data: bytes) -> str:
+    """Base64 MD5 of a payload, in the format of Blob.md5_hash."""
+    return base64.b64encode(hashlib.md5(memoryview(data)).digest()).decode("ascii")
+
+
+def payload_crc32c(data: bytes) -> Optional[str]:
+    """Base64 big-endian CRC32C of a payload, in the format of Blob.crc32c; None without google-crc32c."""
+    try:
+        import google_crc32c
+    except ImportError:
+        return None
+    return base64.b64encode(google_crc32c.Checksum(data).digest()).decode("ascii")
+
+
+def blob_content_hash(blob: Any) -> Optional[str]:
+    """
+    Content hash of a stored object from its metadata: its MD5, or its
+    CRC32C for composite objects, which have no MD5. None if neither is known.
+    """
+    if getattr(blob, "md5_hash", None):
+        return f"md5:{blob.md5_hash}"
+    if getattr(blob, "crc32c", None):
+        return f"crc32c:{blob.crc32c}"
+    return None
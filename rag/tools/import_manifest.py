@@ -0,0 +1,80 @@
+"""
+Per-corpus manifest of imported document hashes.
+
+Re-importing a document whose content has not changed re-embeds it for
+nothing. The manifest records the content hash (the GCS object's MD5 or
+CRC32C) of every document imported into a corpus, so the import tools can
+skip documents that are already in the corpus with the same content, under
+the same or another URI.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+
+class ImportManifest:
+    """SQLite-backed mapping of (corpus, document URI) to the content hash last imported."""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Path of the SQLite database file (parent directories are created)
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS imported_documents ("
+            " corpus_id TEXT NOT NULL,"
+            " gcs_uri TEXT NOT NULL,"
+            " content_hash TEXT NOT NULL,"
+            " imported_at REAL NOT NULL,"
+            " PRIMARY KEY (corpus_id, gcs_uri))"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS imported_documents_hash ON imported_documents (corpus_id, content_hash)"
+        )
+        self._connection.commit()
+
+    def find_unchanged(self, corpus_id: str, gcs_uri: str, content_hash: str) -> Optional[str]:
+        """
+        Returns the URI under which this content was already imported into
+        the corpus (gcs_uri itself when it is unchanged), or None.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT gcs_uri FROM imported_documents WHERE corpus_id = ? AND content_hash = ?"
+                " ORDER BY gcs_uri = ? DESC LIMIT 1",
+                (corpus_id, content_hash, gcs_uri)
+            ).fetchone()
+        return row[0] if row else None
+
+    def record(self, corpus_id: str, gcs_uri: str, content_hash: str) -> None:
+        """Records that gcs_uri was imported into the corpus with this content hash."""
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO imported_documents (corpus_id, gcs_uri, content_hash, imported_at)"
+                " VALUES (?, ?, ?, ?)",
+                (corpus_id, gcs_uri, content_hash, time.time())
+            )
+            self._connection.commit()
+
+    def remove_document(self, corpus_id: str, gcs_uri: str) -> None:
+        """Forgets one document of a corpus, e.g. after its RAG file was deleted."""
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM imported_documents WHERE corpus_id = ? AND gcs_uri = ?", (corpus_id, gcs_uri)
+            )
+            self._connection.commit()
+
+    def remove_corpus(self, corpus_id: str) -> None:
+        """Forgets every document of a corpus, e.g. after it was deleted."""
+        with self._lock:
+            self._connection.execute("DELETE FROM imported_documents WHERE corpus_id = ?", (corpus_id,))
+            self._connection.commit()
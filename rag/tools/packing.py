@@ -0,0 +1,138 @@
+"""
+Budgeted packing of retrieval results into a tool response.
+
+Results are packed best first into a character budget (tokens are converted
+to characters by the caller). Results are kept whole for as long as they fit.
+The first one that does not fit is trimmed to a window around the spans that
+matched the query, as long as that window keeps a useful minimum length, and
+every lower-ranked result is dropped. The budget covers the serialized list
+of results, citations and metadata included.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from rag.tools.rerank import tokenize
+
+ELLIPSIS = "..."
+
+
+def result_size(result: Dict[str, Any]) -> int:
+    """Characters a result takes up once serialized into the tool response."""
+    return len(json.dumps(result, ensure_ascii=False, default=str))
+
+
+def _match_positions(text: str, terms: Sequence[str]) -> List[int]:
+    """Start offsets of every case-insensitive occurrence of the terms in text."""
+    positions = []
+    for term in terms:
+        if term:
+            pattern = rf"\b{re.escape(term)}\b" if term[0].isalnum() and term[-1].isalnum() else re.escape(term)
+            positions.extend(match.start() for match in re.finditer(pattern, text, re.IGNORECASE))
+    return sorted(positions)
+
+
+def trim_around_matches(text: str, terms: Sequence[str], max_chars: int) -> str:
+    """
+    Returns at most max_chars characters of text, keeping the window that
+    covers the most matched terms, cut on word boundaries and marked with
+    ellipses where text was removed.
+    """
+    if len(text) <= max_chars:
+        return text
+    width = max(max_chars - 2 * len(ELLIPSIS), 1)
+
+    # Start the window a little before the match that opens the densest cluster
+    start = 0
+    positions = _match_positions(text, terms)
+    if positions:
+        best_count = -1
+        for position in positions:
+            count = sum(1 for other in positions if position <= other < position + width)
+            if count > best_count:
+                best_count = count
+                start = max(0, position - width // 4)
+        start = min(start, len(text) - width)
+    end = start + width
+
+    # Do not cut words in half
+    if start > 0:
+        space = text.find(" ", start)
+        if 0 <= space < end:
+            start = space + 1
+    if end < len(text):
+        space = text.rfind(" ", start, end)
+        if space > start:
+            end = space
+
+    snippet = text[start:end].strip()
+    return (ELLIPSIS if start > 0 else "") + snippet + (ELLIPSIS if end < len(text) else "")
+
+
+def _trim_to_fit(result: Dict[str, Any], terms: Sequence[str], room: int, min_snippet_chars: int) -> Optional[Dict[str, Any]]:
+    """A copy of result whose text is trimmed so it serializes into room characters, or None if that leaves less than min_snippet_chars."""
+    text = result.get("text") or ""
+    target = len(text) - (result_size(result) - room)
+    while min_snippet_chars <= target < len(text):
+        snippet = trim_around_matches(text, terms, target)
+        if len(snippet) < min_snippet_chars:
+            return None
+        trimmed = {**result, "text": snippet, "truncated": True}
+        excess = result_size(trimmed) - room
+        if excess <= 0:
+            return trimmed
+        target -= excess
+    return None
+
+
+def pack_results(
+    results: List[Dict[str, Any]],
+    query_text: str,
+    max_chars: int,
+    min_snippet_chars: int
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Fits results, best first, into max_chars serialized characters.
+
+    Args:
+        results: Results with a "text" entry, best first
+        query_text: The query, whose terms (and any "matched_values") mark the spans worth keeping
+        max_chars: Character budget for the serialized list of results
+        min_snippet_chars: Chunk texts are never trimmed below this length; a result that
+            would need it is dropped instead
+
+    Returns:
+        The packed results and a report with the budget, the characters used
+        (never more than max_chars), the number of results whose text was
+        trimmed and the number dropped
+    """
+    query_terms = tokenize(query_text)
+    packed: List[Dict[str, Any]] = []
+    truncated = 0
+    used = len("[]")
+
+    for result in results:
+        # Every result after the first is preceded by ", " in the serialized list
+        separator = len(", ") if packed else 0
+        room = max_chars - used - separator
+        size = result_size(result)
+        if size <= room:
+            packed.append(dict(result))
+            used += separator + size
+            continue
+
+        # Trim the first result that does not fit, then stop: lower-ranked results are dropped
+        trimmed = _trim_to_fit(result, list(result.get("matched_values", [])) + query_terms, room, min_snippet_chars)
+        if trimmed is not None:
+            packed.append(trimmed)
+            used += separator + result_size(trimmed)
+            truncated += 1
+        break
+
+    return packed, {
+        "max_chars": max_chars,
+        "chars": used if packed else 0,
+        "truncated_results": truncated,
+        "dropped_results": len(results) - len(packed)
+    }
@@ -0,0 +1,402 @@
+"""
+Structured applicant profiles extracted from imported documents.
+
+Most application form fields ask for the same small set of facts (name,
+email, phone, location, links, work authorization, years of experience).
+extract_profile pulls them out of a document's text once, at import time,
+and ProfileStore keeps them per user in SQLite with an in-memory copy, so
+retrieve_fields can answer them with a dictionary lookup instead of a RAG
+search. Every field carries the document it came from and a confidence:
+a labeled line ("Name: ...") is certain, a guess from the layout or a
+value found several times over is not. Fields that are not in the profile,
+or only with low confidence, still go through RAG.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from rag.tools.corpus_index import normalize_user
+from rag.tools.rerank import FIELD_PATTERNS, find_field_values
+
+PROFILE_FIELDS = (
+    "full_name",
+    "first_name",
+    "last_name",
+    "email",
+    "phone",
+    "location",
+    "linkedin",
+    "github",
+    "website",
+    "work_authorization",
+    "years_of_experience",
+)
+
+# Normalized form labels that ask for a profile field
+FIELD_ALIASES = {
+    "name": "full_name",
+    "full name": "full_name",
+    "legal name": "full_name",
+    "your name": "full_name",
+    "first name": "first_name",
+    "given name": "first_name",
+    "last name": "last_name",
+    "surname": "last_name",
+    "family name": "last_name",
+    "email": "email",
+    "e-mail": "email",
+    "email address": "email",
+    "e-mail address": "email",
+    "phone": "phone",
+    "phone number": "phone",
+    "mobile": "phone",
+    "mobile number": "phone",
+    "mobile phone": "phone",
+    "telephone": "phone",
+    "contact number": "phone",
+    "location": "location",
+    "current location": "location",
+    "city": "location",
+    "address": "location",
+    "linkedin": "linkedin",
+    "linkedin url": "linkedin",
+    "linkedin profile": "linkedin",
+    "linkedin profile url": "linkedin",
+    "github": "github",
+    "github url": "github",
+    "github profile": "github",
+    "website": "website",
+    "personal website": "website",
+    "portfolio": "website",
+    "portfolio url": "website",
+    "work authorization": "work_authorization",
+    "work authorisation": "work_authorization",
+    "authorized to work": "work_authorization",
+    "are you legally authorized to work in the united states": "work_authorization",
+    "visa status": "work_authorization",
+    "years of experience": "years_of_experience",
+    "total years of experience": "years_of_experience",
+    "experience (years)": "years_of_experience",
+}
+
+# Confidence of a field value, by how it was found
+CONFIDENCE_LABELED = 1.0  # A labeled line, e.g. "Name: Jane Doe"
+CONFIDENCE_PATTERN = 0.9  # The only value of its shape in the document (email, phone, profile URL)
+CONFIDENCE_LAYOUT = 0.6  # The first line that looks like a name and is not a heading (below RAG_PROFILE_MIN_CONFIDENCE)
+CONFIDENCE_AMBIGUOUS = 0.5  # The first of several different values
+CONFIDENCE_FREE_TEXT = 0.4  # A sentence mentioning the topic (e.g. visa), not an answer
+
+_PATTERNS = {pattern.name: pattern for pattern in FIELD_PATTERNS}
+_LABELED_LINE = re.compile(r"^\s*(name|location|address|based in|work authori[sz]ation|visa status)\s*[:\-]\s*(.+?)\s*$", re.IGNORECASE | re.MULTILINE)
+_NAME_LINE = re.compile(r"^[A-Z][a-zA-Z'.-]+(?: [A-Z][a-zA-Z'.-]+){1,3}$")
+_YEARS = re.compile(r"(\d{1,2})\+?\s*(?:years?|yrs?)\.?\s+(?:of\s+)?(?:\w+\s+){0,2}experience", re.IGNORECASE)
+_AUTHORIZATION = re.compile(
+    r"[^.\n]*\b(authori[sz]ed to work|work authori[sz]ation|green card|permanent resident|citizen(?:ship)?|work permit|visa)\b[^.\n]*",
+    re.IGNORECASE
+)
+
+# Words of headings, salutations and job titles that look like a name line but are not one
+_NOT_NAME_WORDS = frozenset({
+    "dear", "hiring", "manager", "team", "recruiter", "recruiting", "sir", "madam", "whom", "concern",
+    "curriculum", "vitae", "resume", "cover", "letter", "application", "position", "re",
+    "summary", "profile", "objective", "experience", "education", "skills", "projects", "references",
+    "contact", "details", "information", "professional", "work", "employment", "history", "certifications",
+    "engineer", "developer", "analyst", "designer", "scientist", "consultant", "director", "senior", "lead",
+})
+
+# Signs that a document is a resume rather than a cover letter or other document
+_RESUME_NAME = re.compile(r"resume|résumé|\bcv\b|curriculum", re.IGNORECASE)
+_RESUME_TITLE = re.compile(r"^\s*(curriculum vitae|resume|résumé|cv)\s*$", re.IGNORECASE | re.MULTILINE)
+_RESUME_SECTIONS = re.compile(r"^\s*(experience|work experience|professional experience|employment|education|skills)\s*:?\s*$", re.IGNORECASE | re.MULTILINE)
+
+
+def field_key_for_label(label: str) -> Optional[str]:
+    """Maps a form field label (already normalized) to a profile field, if it asks for one."""
+    return FIELD_ALIASES.get(" ".join(label.lower().rstrip("?:*").split()))
+
+
+def is_resume(text: str, name: str = "") -> bool:
+    """Whether a document is a resume: its file name or title says so, or it has at least two resume sections."""
+    if _RESUME_NAME.search(name.rsplit("/", 1)[-1]) or _RESUME_TITLE.match(text.lstrip()[:100]):
+        return True
+    return len({match.group(1).lower() for match in _RESUME_SECTIONS.finditer(text)}) >= 2
+
+
+def _name_candidate(text: str) -> Optional[str]:
+    """The first of the opening lines that looks like a person's name and not like a heading or salutation."""
+    for line in text.splitlines()[:10]:
+        line = line.strip()
+        if _NAME_LINE.match(line) and not any(word.strip(".'-").lower() in _NOT_NAME_WORDS for word in line.split()):
+            return line
+    return None
+
+
+def _pattern_value(text: str, pattern_name: str) -> Optional[Dict[str, Any]]:
+    values = find_field_values(text, [_PATTERNS[pattern_name]])
+    if not values:
+        return None
+    return {"value": values[0], "confidence": CONFIDENCE_PATTERN if len(values) == 1 else CONFIDENCE_AMBIGUOUS}
+
+
+def extract_profile(text: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Extracts the profile fields found in a document's text.
+
+    Returns:
+        A dictionary keyed by PROFILE_FIELDS names, each {"value", "confidence"};
+        fields that were not found are omitted. years_of_experience is an int,
+        every other value a string.
+    """
+    profile: Dict[str, Dict[str, Any]] = {}
+
+    labeled = {}
+    for match in _LABELED_LINE.finditer(text):
+        labeled.setdefault(match.group(1).lower(), match.group(2))
+
+    # The name is either labeled or the first opening line that looks like one
+    name, confidence = labeled.get("name"), CONFIDENCE_LABELED
+    if name is None:
+        name, confidence = _name_candidate(text), CONFIDENCE_LAYOUT
+    if name:
+        profile["full_name"] = {"value": name, "confidence": confidence}
+        parts = name.split()
+        if len(parts) > 1:
+            profile["first_name"] = {"value": parts[0], "confidence": confidence}
+            profile["last_name"] = {"value": parts[-1], "confidence": confidence}
+
+    for field in ("email", "phone", "linkedin", "github"):
+        value = _pattern_value(text, field)
+        if value:
+            profile[field] = value
+
+    # Any other link counts as a personal website
+    websites = [
+        url.rstrip(".,;") for url in find_field_values(text, [_PATTERNS["url"]])
+        if not re.search(r"linkedin\.com|github\.com", url, re.IGNORECASE)
+    ]
+    if websites:
+        profile["website"] = {
+            "value": websites[0],
+            "confidence": CONFIDENCE_PATTERN if len(set(websites)) == 1 else CONFIDENCE_AMBIGUOUS
+        }
+
+    location = labeled.get("location") or labeled.get("address") or labeled.get("based in")
+    if location:
+        profile["location"] = {"value": location, "confidence": CONFIDENCE_LABELED}
+
+    authorization = labeled.get("work authorization") or labeled.get("work authorisation") or labeled.get("visa status")
+    if authorization:
+        profile["work_authorization"] = {"value": authorization, "confidence": CONFIDENCE_LABELED}
+    else:
+        # A sentence that mentions a visa may just as well say that one is needed
+        match = _AUTHORIZATION.search(text)
+        if match:
+            profile["work_authorization"] = {"value": match.group(0).strip(), "confidence": CONFIDENCE_FREE_TEXT}
+
+    years = {int(match.group(1)) for match in _YEARS.finditer(text)}
+    if years:
+        profile["years_of_experience"] = {
+            "value": max(years),
+            "confidence": CONFIDENCE_PATTERN if len(years) == 1 else CONFIDENCE_AMBIGUOUS
+        }
+
+    return profile
+
+
+class ProfileStore:
+    """
+    Per-user profile fields in SQLite, cached in memory for constant-time lookups.
+
+    Every document's value of a field is kept as a candidate; the stored
+    field is the best candidate (see _resolve), so forgetting a document
+    falls back to the value of the next best document still present.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Path of the SQLite database file (parent directories are created)
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._profiles: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS profile_fields ("
+            " user TEXT NOT NULL,"
+            " field TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " source_uri TEXT,"
+            " updated_at REAL NOT NULL,"
+            " confidence REAL NOT NULL DEFAULT 0,"
+            " from_resume INTEGER NOT NULL DEFAULT 0,"
+            " PRIMARY KEY (user, field))"
+        )
+        # Stores written before fields had a confidence get the columns added (their fields count as unconfirmed)
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(profile_fields)")}
+        for column, definition in (("confidence", "REAL NOT NULL DEFAULT 0"), ("from_resume", "INTEGER NOT NULL DEFAULT 0")):
+            if column not in columns:
+                self._connection.execute(f"ALTER TABLE profile_fields ADD COLUMN {column} {definition}")
+
+        # The value of every field per document; source_uri is '' for fields stored without a document
+        has_candidates = self._connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'profile_candidates'"
+        ).fetchone()
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS profile_candidates ("
+            " user TEXT NOT NULL,"
+            " field TEXT NOT NULL,"
+            " source_uri TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " confidence REAL NOT NULL,"
+            " from_resume INTEGER NOT NULL,"
+            " PRIMARY KEY (user, field, source_uri))"
+        )
+        if not has_candidates:
+            # Stores written before candidates were kept only know the winning value of each field
+            self._connection.execute(
+                "INSERT INTO profile_candidates (user, field, source_uri, value, updated_at, confidence, from_resume)"
+                " SELECT user, field, COALESCE(source_uri, ''), value, updated_at, confidence, from_resume FROM profile_fields"
+            )
+        self._connection.commit()
+
+    def _load(self, user: str) -> Dict[str, Dict[str, Any]]:
+        """Returns the cached profile of a normalized user, reading it from disk on first use."""
+        if user not in self._profiles:
+            rows = self._connection.execute(
+                "SELECT field, value, source_uri, confidence, from_resume FROM profile_fields WHERE user = ?", (user,)
+            ).fetchall()
+            self._profiles[user] = {
+                field: {
+                    "value": json.loads(value),
+                    "source_uri": source_uri,
+                    "confidence": confidence,
+                    "from_resume": bool(from_resume)
+                }
+                for field, value, source_uri, confidence, from_resume in rows
+            }
+        return self._profiles[user]
+
+    def _resolve(self, user: str, fields: List[str], updated_at: float) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Re-picks the stored value of fields from their candidates and writes
+        it through to profile_fields and the cache. A resume beats any other
+        document and, between documents of the same kind, the more confident
+        value wins, then the newer one. Must be called holding the lock.
+
+        Returns:
+            The new entry of every field, None for fields with no candidate left
+        """
+        resolved: Dict[str, Optional[Dict[str, Any]]] = {}
+        for field in fields:
+            row = self._connection.execute(
+                "SELECT value, source_uri, confidence, from_resume FROM profile_candidates WHERE user = ? AND field = ?"
+                " ORDER BY from_resume DESC, confidence DESC, updated_at DESC LIMIT 1",
+                (user, field)
+            ).fetchone()
+            if row is None:
+                self._connection.execute("DELETE FROM profile_fields WHERE user = ? AND field = ?", (user, field))
+                resolved[field] = None
+                continue
+            value, source_uri, confidence, from_resume = row
+            self._connection.execute(
+                "INSERT OR REPLACE INTO profile_fields (user, field, value, source_uri, updated_at, confidence, from_resume)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (user, field, value, source_uri or None, updated_at, confidence, from_resume)
+            )
+            resolved[field] = {
+                "value": json.loads(value),
+                "source_uri": source_uri or None,
+                "confidence": confidence,
+                "from_resume": bool(from_resume)
+            }
+
+        if user in self._profiles:
+            profile = self._profiles[user]
+            for field, entry in resolved.items():
+                if entry is None:
+                    profile.pop(field, None)
+                else:
+                    profile[field] = entry
+        return resolved
+
+    def update(
+        self,
+        user: str,
+        profile: Dict[str, Dict[str, Any]],
+        source_uri: Optional[str] = None,
+        from_resume: bool = False
+    ) -> List[str]:
+        """
+        Stores the fields extracted from a document (as returned by extract_profile),
+        replacing what an earlier import of the same document extracted.
+        A field already set from a resume is only replaced by another resume.
+
+        Returns:
+            The names of the fields whose stored value now comes from this document
+        """
+        user = normalize_user(user)
+        source = source_uri or ""
+        now = time.time()
+        with self._lock:
+            previous = [
+                row[0] for row in self._connection.execute(
+                    "SELECT field FROM profile_candidates WHERE user = ? AND source_uri = ?", (user, source)
+                )
+            ] if source_uri else []
+            if source_uri:
+                self._connection.execute(
+                    "DELETE FROM profile_candidates WHERE user = ? AND source_uri = ?", (user, source)
+                )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO profile_candidates (user, field, source_uri, value, updated_at, confidence, from_resume)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (user, field, source, json.dumps(extracted["value"]), now, extracted["confidence"], int(from_resume))
+                    for field, extracted in profile.items()
+                ]
+            )
+            resolved = self._resolve(user, sorted(set(previous) | set(profile)), now)
+            self._connection.commit()
+            return sorted(
+                field for field in profile
+                if resolved[field] is not None and (resolved[field]["source_uri"] or "") == source
+            )
+
+    def get_profile(self, user: str) -> Dict[str, Dict[str, Any]]:
+        """Returns every stored field of user as {field: {"value", "source_uri", "confidence", "from_resume"}}."""
+        with self._lock:
+            return {field: dict(entry) for field, entry in self._load(normalize_user(user)).items()}
+
+    def lookup(self, user: str, field: str) -> Optional[Dict[str, Any]]:
+        """Returns {"value", "source_uri", "confidence", "from_resume"} for one field of user, or None."""
+        with self._lock:
+            entry = self._load(normalize_user(user)).get(field)
+            return dict(entry) if entry else None
+
+    def remove_source(self, source_uri: str) -> None:
+        """
+        Forgets the fields extracted from a document, e.g. after it was deleted;
+        fields it supplied fall back to the best value of the remaining documents.
+        """
+        now = time.time()
+        with self._lock:
+            affected = self._connection.execute(
+                "SELECT DISTINCT user, field FROM profile_candidates WHERE source_uri = ?", (source_uri,)
+            ).fetchall()
+            self._connection.execute("DELETE FROM profile_candidates WHERE source_uri = ?", (source_uri,))
+            fields_by_user: Dict[str, List[str]] = {}
+            for user, field in affected:
+                fields_by_user.setdefault(user, []).append(field)
+            for user, fields in fields_by_user.items():
+                self._resolve(user, fields, now)
+            self._connection.commit()
@@ -0,0 +1,29 @@
+"""
+Field projection for tool responses.
+
+Management tools return compact items by default; callers name the fields
+they need with fields=[...] or pass fields=["*"] for everything. Raw API
+payloads are never part of a projection and are only attached on request.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+ALL_FIELDS = "*"
+
+
+def project(item: Dict[str, Any], fields: Optional[List[str]], default_fields: Sequence[str]) -> Dict[str, Any]:
+    """
+    Keeps the requested fields of item, in item order.
+
+    Args:
+        item: The full item
+        fields: Field names to keep, ["*"] for all of them, or None for default_fields
+        default_fields: Fields kept when fields is None
+
+    Returns:
+        A new dictionary with the kept fields; unknown names are ignored
+    """
+    if fields is not None and ALL_FIELDS in fields:
+        return dict(item)
+    keep = set(default_fields if fields is None else fields)
+    return {key: value for key, value in item.items() if key in keep}
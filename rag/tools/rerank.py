@@ -0,0 +1,187 @@
+"""
+Hybrid reranking of retrieval results.
+
+Vector search ranks chunks by meaning, which is weak for exact-token form
+fields such as "Phone", "Email" or "GitHub URL". HybridReranker re-scores
+the chunks a retrieval returned by combining their relevance_score with a
+BM25 score computed over those same chunks and a pattern score that is set
+when the query asks for a field with a recognizable shape (an email address,
+a phone number, a profile URL, ...) and the chunk contains such a value.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+
+class FieldPattern(NamedTuple):
+    """A field whose value has a recognizable shape."""
+    name: str
+    query: "re.Pattern[str]"  # Matches queries that ask for the field
+    value: "re.Pattern[str]"  # Matches values of the field inside a chunk
+    min_digits: int = 0  # Minimum number of digits a value must contain
+
+
+FIELD_PATTERNS = (
+    FieldPattern(
+        "email",
+        re.compile(r"\be-?mail\b", re.IGNORECASE),
+        re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+    ),
+    FieldPattern(
+        "phone",
+        re.compile(r"\b(phone|mobile|cell|telephone|contact number)\b", re.IGNORECASE),
+        re.compile(r"(?<![\w/])\+?\(?\d[\d\s().-]{7,}\d"),
+        min_digits=10
+    ),
+    FieldPattern(
+        "github",
+        re.compile(r"\bgit\s?hub\b", re.IGNORECASE),
+        re.compile(r"github\.com/[\w.-]+", re.IGNORECASE)
+    ),
+    FieldPattern(
+        "linkedin",
+        re.compile(r"\blinked\s?in\b", re.IGNORECASE),
+        re.compile(r"linkedin\.com/in/[\w%.-]+", re.IGNORECASE)
+    ),
+    FieldPattern(
+        "url",
+        re.compile(r"\b(url|website|portfolio|homepage|web\s?site)\b", re.IGNORECASE),
+        re.compile(r"https?://[^\s)>\]]+|www\.[^\s)>\]]+", re.IGNORECASE)
+    ),
+    FieldPattern(
+        "postal_code",
+        re.compile(r"\b(zip|postal|post)\s?code\b", re.IGNORECASE),
+        re.compile(r"\b\d{5}(?:-\d{4})?\b")
+    ),
+)
+
+_STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is",
+    "it", "my", "of", "on", "or", "the", "to", "what", "with", "your"
+})
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cases text and splits it into word tokens, dropping common stopwords."""
+    return [token for token in re.findall(r"\w+", text.lower()) if token not in _STOPWORDS]
+
+
+def field_patterns_for(query_text: str) -> List[FieldPattern]:
+    """Returns the field patterns the query asks for."""
+    return [pattern for pattern in FIELD_PATTERNS if pattern.query.search(query_text)]
+
+
+def find_field_values(text: str, patterns: Sequence[FieldPattern]) -> List[str]:
+    """Returns the values in text that match any of the given field patterns, in order of appearance."""
+    values = []
+    for pattern in patterns:
+        for match in pattern.value.finditer(text):
+            value = match.group(0).strip()
+            if sum(char.isdigit() for char in value) >= pattern.min_digits and value not in values:
+                values.append(value)
+    return values
+
+
+def bm25_scores(
+    query_tokens: Sequence[str],
+    documents: Sequence[Sequence[str]],
+    k1: float = 1.5,
+    b: float = 0.75
+) -> List[float]:
+    """Okapi BM25 score of every tokenized document, with IDF computed over the documents themselves."""
+    if not documents or not query_tokens:
+        return [0.0] * len(documents)
+
+    average_length = sum(len(document) for document in documents) / len(documents) or 1.0
+    document_frequency = Counter(token for document in documents for token in set(document))
+    idf = {
+        token: math.log(1.0 + (len(documents) - document_frequency[token] + 0.5) / (document_frequency[token] + 0.5))
+        for token in set(query_tokens)
+    }
+
+    scores = []
+    for document in documents:
+        term_frequency = Counter(document)
+        score = 0.0
+        for token, weight in idf.items():
+            frequency = term_frequency.get(token, 0)
+            if frequency:
+                score += weight * frequency * (k1 + 1) / (
+                    frequency + k1 * (1 - b + b * len(document) / average_length)
+                )
+        scores.append(score)
+    return scores
+
+
+def _scale_to_max(values: Sequence[Optional[float]]) -> List[float]:
+    """Scales non-negative scores to [0, 1] by the largest one; missing or negative values count as 0."""
+    clipped = [max(value, 0.0) if value is not None else 0.0 for value in values]
+    highest = max(clipped, default=0.0)
+    if highest <= 0:
+        return [0.0] * len(values)
+    return [value / highest for value in clipped]
+
+
+class HybridReranker:
+    """Re-scores retrieval results with a weighted sum of vector, BM25 and field pattern scores."""
+
+    def __init__(
+        self,
+        vector_weight: float,
+        lexical_weight: float,
+        pattern_weight: float,
+        relative_cutoff: float = 0.0
+    ):
+        """
+        Args:
+            vector_weight: Weight of the normalized relevance_score from the retrieval
+            lexical_weight: Weight of the normalized BM25 score over the returned chunks
+            pattern_weight: Weight of the field pattern score (1 when the chunk holds a value the query asks for)
+            relative_cutoff: Results scoring below this fraction of the best score are dropped
+        """
+        self.vector_weight = vector_weight
+        self.lexical_weight = lexical_weight
+        self.pattern_weight = pattern_weight
+        self.relative_cutoff = relative_cutoff
+
+    def rerank(self, results: List[Dict[str, Any]], query_text: str, top_n: int) -> List[Dict[str, Any]]:
+        """
+        Returns at most top_n results, best first.
+
+        Each kept result gets a "rerank_score" and, when the query asks for a
+        field with a recognizable shape, the "matched_values" found in its text.
+        """
+        if not results or top_n <= 0:
+            return []
+
+        texts = [result.get("text") or "" for result in results]
+        vector_scores = _scale_to_max([result.get("relevance_score") for result in results])
+        lexical_scores = _scale_to_max(bm25_scores(tokenize(query_text), [tokenize(text) for text in texts]))
+
+        patterns = field_patterns_for(query_text)
+        matched_values = [find_field_values(text, patterns) if patterns else [] for text in texts]
+
+        scored = []
+        for index, result in enumerate(results):
+            score = (
+                self.vector_weight * vector_scores[index]
+                + self.lexical_weight * lexical_scores[index]
+                + self.pattern_weight * (1.0 if matched_values[index] else 0.0)
+            )
+            scored.append((score, index))
+        # Stable on ties, so equal scores keep the retrieval order
+        scored.sort(key=lambda entry: (-entry[0], entry[1]))
+
+        best_score = scored[0][0]
+        reranked = []
+        for score, index in scored[:top_n]:
+            if best_score > 0 and score < self.relative_cutoff * best_score:
+                break
+            result = dict(results[index])
+            result["rerank_score"] = round(score, 4)
+            if matched_values[index]:
+                result["matched_values"] = matched_values[index]
+            reranked.append(result)
+        return reranked
@@ -5,22 +5,34 @@ This module provides tools for creating and listing GCS buckets
 to be used with the Agent Development Kit (ADK).
 """
 
-from google.cloud import storage
 from google.api_core.exceptions import GoogleAPIError
 from google.adk.tools import ToolContext, FunctionTool
-from typing import Dict, Any, Optional
+from functools import partial
+from typing import Dict, Any, List, Optional
+import io
 import logging
+import os
 
 from rag.config import (
-    PROJECT_ID,
     GCS_DEFAULT_STORAGE_CLASS,
     GCS_DEFAULT_LOCATION,
     GCS_LIST_BUCKETS_MAX_RESULTS,
     GCS_LIST_BLOBS_MAX_RESULTS,
+    GCS_BUCKET_STATS_MAX_BLOBS,
+    GCS_BUCKET_STATS_PAGE_SIZE,
     GCS_DEFAULT_CONTENT_TYPE,
+    GCS_BUCKET_DEFAULT_FIELDS,
+    GCS_UPLOAD_CHUNK_SIZE,
+    GCS_UPLOAD_CHUNK_ALIGNMENT,
+    GCS_UPLOAD_MAX_PARALLELISM,
+    GCS_UPLOAD_TIMEOUT,
+    GCS_UPLOAD_SKIP_UNCHANGED,
     LOG_LEVEL,
     LOG_FORMAT
 )
+from rag.tools.concurrency import fan_out
+from rag.tools.gcs_client import get_storage_client, payload_crc32c, payload_md5
+from rag.tools.projection import project
 
 # Configure logging
 logging.basicConfig(
@@ -28,8 +40,6 @@ logging.basicConfig(
     format=LOG_FORMAT
 )
 
-# Initialize the GCS client
-client = storage.Client(project=PROJECT_ID)
 
 def create_gcs_bucket(
     tool_context: ToolContext,
@@ -54,8 +64,8 @@ def create_gcs_bucket(
     if location is None:
         location = GCS_DEFAULT_LOCATION
     try:
-        # Initialize the client
-        client = storage.Client(project=PROJECT_ID)
+        # Use the shared client
+        client = get_storage_client()
         
         # Check if the bucket already exists
         try:
@@ -103,7 +113,9 @@ def create_gcs_bucket(
 
 def list_gcs_buckets(
     prefix: Optional[str] = None,
-    max_results: Optional[int] = None
+    max_results: Optional[int] = None,
+    fields: Optional[List[str]] = None,
+    include_raw: bool = False
 ) -> Dict[str, Any]:
     """
     Lists Google Cloud Storage buckets in the configured project.
@@ -111,6 +123,9 @@ def list_gcs_buckets(
     Args:
         prefix: Optional prefix to filter buckets by name
         max_results: Maximum number of results to return (default: 50)
+        fields: Bucket fields to return, e.g. ["name", "created"], or ["*"] for all
+            (default: name, location, storage_class)
+        include_raw: Also return the raw API resource of every bucket (default: False)
         
     Returns:
         A dictionary containing the list of buckets
@@ -118,21 +133,28 @@ def list_gcs_buckets(
     if max_results is None:
         max_results = GCS_LIST_BUCKETS_MAX_RESULTS
     try:
-        # Initialize the client
-        client = storage.Client(project=PROJECT_ID)
+        # Use the shared client
+        client = get_storage_client()
         
         # List the buckets with optional filtering
         bucket_iterator = client.list_buckets(prefix=prefix, max_results=max_results)
         
         bucket_list = []
         for bucket in bucket_iterator:
-            bucket_list.append({
-                "name": bucket.name,
-                "location": bucket.location,
-                "storage_class": bucket.storage_class,
-                "created": bucket.time_created.isoformat() if bucket.time_created else None,
-                "updated": bucket.updated.isoformat() if hasattr(bucket, "updated") and bucket.updated else None
-            })
+            bucket_entry = project(
+                {
+                    "name": bucket.name,
+                    "location": bucket.location,
+                    "storage_class": bucket.storage_class,
+                    "created": bucket.time_created.isoformat() if bucket.time_created else None,
+                    "updated": bucket.updated.isoformat() if hasattr(bucket, "updated") and bucket.updated else None
+                },
+                fields,
+                GCS_BUCKET_DEFAULT_FIELDS
+            )
+            if include_raw:
+                bucket_entry["raw_api_data"] = dict(bucket._properties)
+            bucket_list.append(bucket_entry)
         
         return {
             "status": "success",
@@ -153,59 +175,128 @@ def list_gcs_buckets(
             "message": f"An unexpected error occurred: {str(e)}"
         }
 
+def _blob_to_dict(bucket_name: str, blob: Any) -> Dict[str, Any]:
+    """Converts a listed blob into the file entry returned by the tools."""
+    return {
+        "name": blob.name,
+        "size": blob.size,
+        "content_type": blob.content_type,
+        "updated": blob.updated.isoformat() if blob.updated else None,
+        "gcs_uri": f"gs://{bucket_name}/{blob.name}",
+        "public_url": f"https://storage.googleapis.com/{bucket_name}/{blob.name}"
+    }
+
+
+def _summarize_blobs(client: Any, bucket_name: str, prefix: Optional[str]) -> Dict[str, Any]:
+    """
+    Aggregates the objects of a bucket in one page-streamed pass, holding no
+    more than a page in memory and stopping after GCS_BUCKET_STATS_MAX_BLOBS objects.
+    """
+    blobs = client.list_blobs(
+        bucket_name,
+        prefix=prefix,
+        max_results=GCS_BUCKET_STATS_MAX_BLOBS,
+        page_size=GCS_BUCKET_STATS_PAGE_SIZE,
+        fields="items(name,size,contentType),nextPageToken"
+    )
+    file_count = 0
+    total_bytes = 0
+    content_types: Dict[str, int] = {}
+    for blob in blobs:
+        file_count += 1
+        total_bytes += blob.size or 0
+        content_type = blob.content_type or "unknown"
+        content_types[content_type] = content_types.get(content_type, 0) + 1
+
+    return {
+        "file_count": file_count,
+        "total_bytes": total_bytes,
+        "content_types": dict(sorted(content_types.items(), key=lambda item: item[1], reverse=True)),
+        # The cap was reached with more objects left to list
+        "stats_complete": not (file_count >= GCS_BUCKET_STATS_MAX_BLOBS and blobs.next_page_token)
+    }
+
+
 def get_bucket_details(
-    bucket_name: str
+    bucket_name: str,
+    prefix: Optional[str] = None,
+    list_files: bool = False,
+    page_token: Optional[str] = None,
+    max_results: Optional[int] = None
 ) -> Dict[str, Any]:
     """
-    Gets detailed information about a specific GCS bucket, including a list of all files (blobs).
+    Gets detailed information about a specific GCS bucket and statistics of its files.
+    
+    By default the files are only summarized (count, total bytes and a
+    content-type histogram, over at most 10,000 files). Set list_files=True
+    to page through the files themselves.
     
     Args:
         bucket_name: The name of the bucket to get details for
+        prefix: Optional prefix to restrict the statistics or listing to
+        list_files: Return one page of files instead of statistics (default: False)
+        page_token: The next_page_token of the previous page, to continue a listing
+        max_results: Files per page when list_files is set (default: 100)
         
     Returns:
-        A dictionary containing the bucket details and a list of files
+        A dictionary containing the bucket details with either file statistics
+        or one page of files and the token of the next page
     """
+    if max_results is None:
+        max_results = GCS_LIST_BLOBS_MAX_RESULTS
     try:
-        # Initialize the client
-        client = storage.Client(project=PROJECT_ID)
+        # Use the shared client
+        client = get_storage_client()
         
         # Get the bucket
         bucket = client.get_bucket(bucket_name)
         
-        # List all blobs in the bucket
-        blobs = client.list_blobs(bucket_name)
-        blob_list = []
-        for blob in blobs:
-            blob_list.append({
-                "name": blob.name,
-                "size": blob.size,
-                "content_type": blob.content_type,
-                "updated": blob.updated.isoformat() if blob.updated else None,
-                "gcs_uri": f"gs://{bucket_name}/{blob.name}",
-                "public_url": f"https://storage.googleapis.com/{bucket_name}/{blob.name}"
-            })
+        details = {
+            "name": bucket.name,
+            "id": bucket.id,
+            "project_number": bucket.project_number,
+            "location": bucket.location,
+            "location_type": bucket.location_type,
+            "storage_class": bucket.storage_class,
+            "created": bucket.time_created.isoformat() if bucket.time_created else None,
+            "updated": bucket.updated.isoformat() if hasattr(bucket, "updated") and bucket.updated else None,
+            "versioning_enabled": bucket.versioning_enabled,
+            "labels": bucket.labels,
+            "requester_pays": bucket.requester_pays,
+            "self_link": f"https://storage.googleapis.com/{bucket_name}",
+            "etag": bucket.etag
+        }
+        if prefix:
+            details["prefix"] = prefix
+        
+        if list_files:
+            # Fetch a single page of files
+            blobs = client.list_blobs(
+                bucket_name,
+                prefix=prefix,
+                max_results=min(max_results, GCS_LIST_BLOBS_MAX_RESULTS),
+                page_token=page_token
+            )
+            page = next(blobs.pages, [])
+            blob_list = [_blob_to_dict(bucket_name, blob) for blob in page]
+            details["files"] = blob_list
+            details["file_count"] = len(blob_list)
+            details["next_page_token"] = blobs.next_page_token
+            message = f"Successfully retrieved details and {len(blob_list)} file(s) for bucket '{bucket_name}'"
+            if blobs.next_page_token:
+                message += "; more files are available with next_page_token"
+        else:
+            details.update(_summarize_blobs(client, bucket_name, prefix))
+            message = (
+                f"Successfully retrieved details for bucket '{bucket_name}': "
+                f"{details['file_count']}{'' if details['stats_complete'] else '+'} file(s), {details['total_bytes']} bytes"
+            )
         
         # Return detailed information
         return {
             "status": "success",
-            "bucket": {
-                "name": bucket.name,
-                "id": bucket.id,
-                "project_number": bucket.project_number,
-                "location": bucket.location,
-                "location_type": bucket.location_type,
-                "storage_class": bucket.storage_class,
-                "created": bucket.time_created.isoformat() if bucket.time_created else None,
-                "updated": bucket.updated.isoformat() if hasattr(bucket, "updated") and bucket.updated else None,
-                "versioning_enabled": bucket.versioning_enabled,
-                "labels": bucket.labels,
-                "requester_pays": bucket.requester_pays,
-                "self_link": f"https://storage.googleapis.com/{bucket_name}",
-                "etag": bucket.etag,
-                "files": blob_list,
-                "file_count": len(blob_list)
-            },
-            "message": f"Successfully retrieved details and {len(blob_list)} file(s) for bucket '{bucket_name}'"
+            "bucket": details,
+            "message": message
         }
     except GoogleAPIError as e:
         return {
@@ -241,8 +332,8 @@ def list_blobs_in_bucket(
     if max_results is None:
         max_results = GCS_LIST_BLOBS_MAX_RESULTS
     try:
-        # Initialize the client
-        client = storage.Client(project=PROJECT_ID)
+        # Use the shared client
+        client = get_storage_client()
         
         # Get the bucket
         bucket = client.bucket(bucket_name)
@@ -261,14 +352,7 @@ def list_blobs_in_bucket(
         
         # Save actual blobs
         for blob in blobs:
-            blob_list.append({
-                "name": blob.name,
-                "size": blob.size,
-                "updated": blob.updated.isoformat() if blob.updated else None,
-                "content_type": blob.content_type,
-                "public_url": f"https://storage.googleapis.com/{bucket_name}/{blob.name}",
-                "gcs_uri": f"gs://{bucket_name}/{blob.name}"
-            })
+            blob_list.append(_blob_to_dict(bucket_name, blob))
         
         # If using delimiter, also save prefixes (folders)
         if delimiter:
@@ -297,81 +381,257 @@ def list_blobs_in_bucket(
             "message": f"An unexpected error occurred: {str(e)}"
         }
 
+class _MemoryReader(io.RawIOBase):
+    """Read-only, seekable file object over a memoryview, so uploads stream the payload without copying it."""
+
+    def __init__(self, data: bytes):
+        self._view = memoryview(data).cast("B")
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        chunk = self._view[self._position:self._position + len(buffer)]
+        buffer[:len(chunk)] = chunk
+        self._position += len(chunk)
+        return len(chunk)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = len(self._view) + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        self._position = max(0, position)
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+
+def _resolve_chunk_size(chunk_size: Optional[int]) -> int:
+    """Rounds a chunk size up to the 256 KiB multiple resumable uploads require."""
+    if chunk_size is None:
+        chunk_size = GCS_UPLOAD_CHUNK_SIZE
+    chunks = max(1, -(-chunk_size // GCS_UPLOAD_CHUNK_ALIGNMENT))
+    return chunks * GCS_UPLOAD_CHUNK_ALIGNMENT
+
+
+def _attachments(tool_context: ToolContext) -> List[Any]:
+    """Returns the inline_data of every application/* part attached to the current message."""
+    if not (hasattr(tool_context, "user_content") and
+            tool_context.user_content and
+            tool_context.user_content.parts):
+        return []
+    return [
+        part.inline_data for part in tool_context.user_content.parts
+        if hasattr(part, "inline_data") and part.inline_data
+        and part.inline_data.mime_type.startswith("application/")
+    ]
+
+
+def _content_types(attachments: List[Any], content_type: Optional[str]) -> List[str]:
+    """Picks the content type of every attachment: the given one, else the attachment's own MIME type, else the default."""
+    return [
+        content_type or getattr(attachment, "mime_type", None) or GCS_DEFAULT_CONTENT_TYPE
+        for attachment in attachments
+    ]
+
+
+def _destination_names(
+    attachments: List[Any],
+    file_artifact_name: str,
+    destination_blob_name: Optional[str],
+    content_types: List[str]
+) -> List[str]:
+    """
+    Picks a blob name per attachment; several attachments keep their own
+    names or get numbered. Without a destination name, PDF attachments get
+    a .pdf suffix.
+    """
+    base_name = destination_blob_name or file_artifact_name
+    stem, extension = os.path.splitext(base_name)
+    names = []
+    for index, (attachment, content_type) in enumerate(zip(attachments, content_types)):
+        if len(attachments) == 1:
+            name = base_name
+        else:
+            display_name = getattr(attachment, "display_name", None)
+            name = display_name or f"{stem}_{index + 1}{extension}"
+            if destination_blob_name and display_name:
+                # Treat a destination name given for several files as a folder
+                name = f"{stem.rstrip('/')}/{display_name}"
+        if not destination_blob_name and content_type == "application/pdf" and not name.lower().endswith(".pdf"):
+            name += ".pdf"
+        while name in names:
+            name_stem, name_extension = os.path.splitext(name)
+            name = f"{name_stem}_{index + 1}{name_extension}"
+        names.append(name)
+    return names
+
+
+def _upload_attachment(
+    bucket_name: str,
+    blob_name: str,
+    data: bytes,
+    content_type: str,
+    chunk_size: int,
+    skip_unchanged: bool
+) -> Dict[str, Any]:
+    """
+    Streams one payload to GCS. Payloads larger than a single request are
+    sent as a chunked resumable upload, so a failed chunk is retried rather
+    than the whole file. With skip_unchanged, nothing is sent when the
+    object's stored MD5 (or CRC32C) already matches the payload.
+    """
+    client = get_storage_client()
+    bucket = client.bucket(bucket_name)
+    md5_hash = payload_md5(data)
+
+    # Skip the upload when the object already holds exactly this content
+    existing = bucket.get_blob(blob_name) if skip_unchanged else None
+    unchanged = existing is not None and (
+        existing.md5_hash == md5_hash if existing.md5_hash
+        else existing.crc32c is not None and existing.crc32c == payload_crc32c(data)
+    )
+
+    if unchanged:
+        blob = existing
+    else:
+        blob = bucket.blob(blob_name, chunk_size=chunk_size)
+        # GCS rejects the upload if the received bytes do not match this hash
+        blob.md5_hash = md5_hash
+        blob.upload_from_file(
+            _MemoryReader(data),
+            size=len(data),
+            content_type=content_type,
+            rewind=True,
+            timeout=GCS_UPLOAD_TIMEOUT
+        )
+
+    # Generate a URL
+    try:
+        url = blob.public_url
+    except Exception:
+        url = f"gs://{bucket_name}/{blob_name}"
+
+    return {
+        "status": "success",
+        "bucket": bucket_name,
+        "filename": blob_name,
+        "gcs_uri": f"gs://{bucket_name}/{blob_name}",
+        "size_bytes": len(data),
+        "content_type": content_type,
+        "md5_hash": md5_hash,
+        "unchanged": unchanged,
+        "url": url,
+        "message": (
+            f"File gs://{bucket_name}/{blob_name} already has this content; upload skipped" if unchanged
+            else f"Successfully uploaded file to gs://{bucket_name}/{blob_name}"
+        )
+    }
+
+
 def upload_file_to_gcs(
     tool_context: ToolContext,
     bucket_name: str,
     file_artifact_name: str,
     destination_blob_name: Optional[str] = None,
-    content_type: Optional[str] = None
+    content_type: Optional[str] = None,
+    chunk_size: Optional[int] = None,
+    force: bool = False
 ) -> Dict[str, Any]:
     """
-    Uploads a file from ADK artifacts to a Google Cloud Storage bucket.
+    Uploads the files attached to the current message to a Google Cloud Storage bucket.
+    
+    Every attachment is streamed from memory without copying, in chunked
+    resumable uploads, and several attachments are uploaded concurrently.
+    Attachments whose content is already stored under their name are not
+    uploaded again (reported with "unchanged": true).
     
     Args:
         tool_context: The tool context for ADK
         bucket_name: The name of the GCS bucket to upload to
         file_artifact_name: The name of the artifact file in the ADK session
-        destination_blob_name: The name to give the file in GCS (defaults to artifact name)
-        content_type: The content type of the file (defaults to PDF)
+        destination_blob_name: The name to give the file in GCS (defaults to artifact name);
+            with several attachments, files are named after their attachment or numbered
+        content_type: The content type of every file (defaults to each attachment's own MIME type, else PDF)
+        chunk_size: Bytes per resumable upload chunk, rounded up to a multiple of 256 KiB (default: 8 MiB)
+        force: Upload even when the stored object already has the same content (default: False)
         
     Returns:
-        A dictionary containing the upload status and details
+        A dictionary containing the upload status and details; with several
+        attachments, a "files" list holds the result of every upload
     """
-    if content_type is None:
-        content_type = GCS_DEFAULT_CONTENT_TYPE
     try:
-        # Check if user_content contains a PDF attachment
-        if (hasattr(tool_context, "user_content") and 
-            tool_context.user_content and 
-            tool_context.user_content.parts):
-            
-            # Look for any file in parts
-            file_data = None
-            for part in tool_context.user_content.parts:
-                if hasattr(part, "inline_data") and part.inline_data:
-                    if part.inline_data.mime_type.startswith("application/"):
-                        file_data = part.inline_data.data
-                        break
-            
-            if file_data:
-                # We found file data in the user message
-                if not destination_blob_name:
-                    destination_blob_name = file_artifact_name
-                    if content_type == "application/pdf" and not destination_blob_name.lower().endswith(".pdf"):
-                        destination_blob_name += ".pdf"
-                
-                # Upload to GCS
-                client = storage.Client(project=PROJECT_ID)
-                bucket = client.bucket(bucket_name)
-                blob = bucket.blob(destination_blob_name)
-                
-                blob.upload_from_string(
-                    data=file_data,
-                    content_type=content_type
+        attachments = _attachments(tool_context)
+        
+        # If no file found in user content, return error
+        if not attachments:
+            return {
+                "status": "error",
+                "message": "No file found in the current message. Please upload a file and try again.",
+                "details": "Files must be attached directly to the current message."
+            }
+        
+        chunk_size = _resolve_chunk_size(chunk_size)
+        skip_unchanged = GCS_UPLOAD_SKIP_UNCHANGED and not force
+        content_types = _content_types(attachments, content_type)
+        names = _destination_names(attachments, file_artifact_name, destination_blob_name, content_types)
+        if len(attachments) == 1:
+            return _upload_attachment(
+                bucket_name, names[0], attachments[0].data, content_types[0], chunk_size, skip_unchanged
+            )
+        
+        # Upload every attachment concurrently
+        uploads = fan_out(
+            {
+                index: partial(
+                    _upload_attachment, bucket_name, name, attachment.data, attachment_type, chunk_size, skip_unchanged
                 )
-                
-                # Generate a URL
-                try:
-                    url = blob.public_url
-                except:
-                    url = f"gs://{bucket_name}/{destination_blob_name}"
-                
-                return {
-                    "status": "success",
+                for index, (name, attachment, attachment_type) in enumerate(zip(names, attachments, content_types))
+            },
+            max_parallelism=GCS_UPLOAD_MAX_PARALLELISM
+        )
+        
+        files = []
+        for index, name in enumerate(names):
+            if index in uploads.results:
+                files.append(uploads.results[index])
+            else:
+                error = uploads.errors.get(index, "Unknown error")
+                files.append({
+                    "status": "error",
                     "bucket": bucket_name,
-                    "filename": destination_blob_name,
-                    "gcs_uri": f"gs://{bucket_name}/{destination_blob_name}",
-                    "size_bytes": len(file_data),
-                    "content_type": content_type,
-                    "url": url,
-                    "message": f"Successfully uploaded file to gs://{bucket_name}/{destination_blob_name}"
-                }
+                    "filename": name,
+                    "error_message": error,
+                    "message": f"Failed to upload file: {error}"
+                })
+        
+        uploaded = [result for result in files if result["status"] == "success"]
+        if len(uploaded) == len(files):
+            status = "success"
+        elif uploaded:
+            status = "partial"
+        else:
+            status = "error"
         
-        # If no file found in user content, return error
         return {
-            "status": "error",
-            "message": "No file found in the current message. Please upload a file and try again.",
-            "details": "Files must be attached directly to the current message."
+            "status": status,
+            "bucket": bucket_name,
+            "files": files,
+            "uploaded_count": len(uploaded),
+            "failed_count": len(files) - len(uploaded),
+            "unchanged_count": sum(1 for result in uploaded if result["unchanged"]),
+            "size_bytes": sum(result["size_bytes"] for result in uploaded),
+            "message": f"Uploaded {len(uploaded)} of {len(files)} files to gs://{bucket_name}/"
         }
     except GoogleAPIError as e:
         return {
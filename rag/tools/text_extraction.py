@@ -0,0 +1,106 @@
+"""
+Plain-text extraction and chunking for documents stored in GCS or on local disk.
+
+Used by the local retrieval paths, which need the text of corpus documents
+without going through Vertex AI. PDF support needs the `pypdf` package;
+other binary formats are skipped.
+"""
+
+import html
+import importlib.util
+import io
+import logging
+import os
+import re
+from typing import Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PDF_SUPPORTED = importlib.util.find_spec("pypdf") is not None
+
+TEXT_EXTENSIONS = (".txt", ".md", ".markdown", ".csv", ".json", ".yaml", ".yml", ".html", ".htm")
+
+
+def extract_text(data: bytes, content_type: Optional[str] = None, name: str = "") -> Optional[str]:
+    """
+    Extracts plain text from a document's bytes.
+
+    Args:
+        data: The raw document bytes
+        content_type: MIME type of the document, if known
+        name: File name or URI, used to guess the format when content_type is missing
+
+    Returns:
+        The extracted text, or None if the format is not supported
+    """
+    content_type = (content_type or "").lower()
+    lowered_name = name.lower()
+
+    if content_type == "application/pdf" or lowered_name.endswith(".pdf"):
+        if not PDF_SUPPORTED:
+            logger.warning("Skipping PDF %s: PDF text extraction needs the pypdf package", name or "document")
+            return None
+        from pypdf import PdfReader
+        reader = PdfReader(io.BytesIO(data))
+        return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+    if content_type.startswith("text/") or content_type == "application/json" or lowered_name.endswith(TEXT_EXTENSIONS):
+        text = data.decode("utf-8", errors="replace")
+        if "html" in content_type or lowered_name.endswith((".html", ".htm")):
+            text = html.unescape(re.sub(r"<[^>]+>", " ", text))
+        return text
+
+    return None
+
+
+def read_document_text(uri: str, storage_client: Any = None) -> Optional[str]:
+    """
+    Downloads a document and extracts its text.
+
+    Args:
+        uri: gs://bucket/object, file:///path or a plain local path
+        storage_client: GCS client used for gs:// URIs
+
+    Returns:
+        The extracted text, or None if the format is not supported
+    """
+    if uri.startswith("gs://"):
+        if storage_client is None:
+            raise ValueError("A GCS client is required to read gs:// documents")
+        bucket_name, _, blob_name = uri[len("gs://"):].partition("/")
+        blob = storage_client.bucket(bucket_name).get_blob(blob_name)
+        if blob is None:
+            raise FileNotFoundError(f"GCS object not found: {uri}")
+        return extract_text(blob.download_as_bytes(), blob.content_type, blob_name)
+
+    path = uri[len("file://"):] if uri.startswith("file://") else uri
+    with open(path, "rb") as document:
+        return extract_text(document.read(), None, os.path.basename(path))
+
+
+def chunk_text(text: str, chunk_chars: int, overlap_chars: int) -> List[str]:
+    """
+    Splits text into overlapping chunks of roughly chunk_chars characters,
+    breaking on whitespace so words are never cut in half.
+    """
+    words = text.split()
+    chunks = []
+    start = 0
+    while start < len(words):
+        length = 0
+        end = start
+        while end < len(words) and (length == 0 or length + len(words[end]) + 1 <= chunk_chars):
+            length += len(words[end]) + 1
+            end += 1
+        chunks.append(" ".join(words[start:end]))
+        if end >= len(words):
+            break
+
+        # Step back far enough to repeat about overlap_chars of context
+        overlap = 0
+        next_start = end
+        while next_start > start + 1 and overlap + len(words[next_start - 1]) + 1 <= overlap_chars:
+            next_start -= 1
+            overlap += len(words[next_start]) + 1
+        start = next_start
+    return chunks
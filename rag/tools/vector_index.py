@@ -0,0 +1,233 @@
+"""
+Local, memory-mapped vector index mirroring the documents of RAG corpora.
+
+Each mirrored corpus is stored under its own directory as a float32
+embedding matrix (opened with numpy.memmap) plus a JSON file with the chunk
+texts and their sources. Queries are answered in process with a cosine
+top-k search, avoiding a network round trip to Vertex AI RAG.
+
+NumPy is imported lazily so the rest of the RAG tools work without it.
+HashingEmbedder is a deterministic, offline stand-in for the Vertex AI
+embedding model, intended for tests and benchmarks.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy installed
+    np = None
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("The local vector index requires numpy (pip install numpy)")
+
+
+class HashingEmbedder:
+    """
+    Deterministic bag-of-words embedder based on the hashing trick.
+
+    Produces the same vectors on every machine without network access, so
+    the local index can be exercised offline.
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _embed(self, text: str) -> "np.ndarray":
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in re.findall(r"\w+", text.lower()):
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        return vector
+
+    def embed_documents(self, texts: Sequence[str]) -> "np.ndarray":
+        _require_numpy()
+        return np.stack([self._embed(text) for text in texts]) if texts else np.zeros((0, self.dim), dtype=np.float32)
+
+    def embed_query(self, text: str) -> "np.ndarray":
+        _require_numpy()
+        return self._embed(text)
+
+
+class VertexEmbedder:
+    """Embeds text with a Vertex AI text embedding model (e.g. text-embedding-004)."""
+
+    BATCH_SIZE = 100
+
+    def __init__(self, model_name: str):
+        self.name = f"vertex-{model_name}"
+        self._model_name = model_name
+        self._model = None
+
+    def _get_model(self) -> Any:
+        if self._model is None:
+            from vertexai.language_models import TextEmbeddingModel
+            self._model = TextEmbeddingModel.from_pretrained(self._model_name)
+        return self._model
+
+    def _embed(self, texts: Sequence[str], task_type: str) -> "np.ndarray":
+        from vertexai.language_models import TextEmbeddingInput
+        vectors = []
+        for start in range(0, len(texts), self.BATCH_SIZE):
+            batch = [TextEmbeddingInput(text, task_type) for text in texts[start:start + self.BATCH_SIZE]]
+            vectors.extend(embedding.values for embedding in self._get_model().get_embeddings(batch))
+        return np.asarray(vectors, dtype=np.float32)
+
+    def embed_documents(self, texts: Sequence[str]) -> "np.ndarray":
+        _require_numpy()
+        return self._embed(list(texts), "RETRIEVAL_DOCUMENT")
+
+    def embed_query(self, text: str) -> "np.ndarray":
+        _require_numpy()
+        return self._embed([text], "RETRIEVAL_QUERY")[0]
+
+
+def _normalize_rows(matrix: "np.ndarray") -> "np.ndarray":
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class LocalVectorIndex:
+    """Directory of per-corpus memory-mapped embedding matrices."""
+
+    def __init__(self, directory: str, embedder: Any):
+        """
+        Args:
+            directory: Root directory holding one sub-directory per mirrored corpus
+            embedder: Object with name, embed_documents(texts) and embed_query(text)
+        """
+        self.directory = directory
+        self.embedder = embedder
+        self._lock = threading.Lock()
+        self._loaded: Dict[str, Tuple["np.ndarray", List[Dict[str, Any]]]] = {}
+
+    def _corpus_dir(self, corpus_id: str) -> str:
+        return os.path.join(self.directory, corpus_id)
+
+    def _read_meta(self, corpus_id: str) -> Optional[Dict[str, Any]]:
+        meta_path = os.path.join(self._corpus_dir(corpus_id), "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, encoding="utf-8") as meta_file:
+            return json.load(meta_file)
+
+    def has(self, corpus_id: str) -> bool:
+        """True if corpus_id is mirrored with the current embedder."""
+        meta = self._read_meta(corpus_id)
+        return meta is not None and meta.get("embedder") == self.embedder.name
+
+    def build(self, corpus_id: str, chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Embeds chunks and atomically replaces the corpus mirror.
+
+        Args:
+            corpus_id: The ID of the mirrored corpus
+            chunks: Dictionaries with at least "text" and "source_uri"
+
+        Returns:
+            The metadata written for the mirror
+        """
+        _require_numpy()
+        matrix = _normalize_rows(self.embedder.embed_documents([chunk["text"] for chunk in chunks]).astype(np.float32))
+
+        corpus_dir = self._corpus_dir(corpus_id)
+        staging_dir = corpus_dir + ".staging"
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        os.makedirs(staging_dir)
+
+        if len(chunks):
+            embeddings = np.memmap(
+                os.path.join(staging_dir, "embeddings.f32"), dtype=np.float32, mode="w+", shape=matrix.shape
+            )
+            embeddings[:] = matrix
+            embeddings.flush()
+            del embeddings
+
+        meta = {
+            "embedder": self.embedder.name,
+            "count": len(chunks),
+            "dim": int(matrix.shape[1]) if len(chunks) else 0
+        }
+        with open(os.path.join(staging_dir, "chunks.json"), "w", encoding="utf-8") as chunks_file:
+            json.dump(chunks, chunks_file)
+        with open(os.path.join(staging_dir, "meta.json"), "w", encoding="utf-8") as meta_file:
+            json.dump(meta, meta_file)
+
+        with self._lock:
+            self._loaded.pop(corpus_id, None)
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+            os.replace(staging_dir, corpus_dir)
+        return meta
+
+    def remove(self, corpus_id: str) -> None:
+        """Deletes the mirror of a corpus, if any."""
+        with self._lock:
+            self._loaded.pop(corpus_id, None)
+            shutil.rmtree(self._corpus_dir(corpus_id), ignore_errors=True)
+
+    def _load(self, corpus_id: str) -> Tuple["np.ndarray", List[Dict[str, Any]]]:
+        with self._lock:
+            if corpus_id not in self._loaded:
+                corpus_dir = self._corpus_dir(corpus_id)
+                meta = self._read_meta(corpus_id)
+                with open(os.path.join(corpus_dir, "chunks.json"), encoding="utf-8") as chunks_file:
+                    chunks = json.load(chunks_file)
+                if meta["count"]:
+                    matrix = np.memmap(
+                        os.path.join(corpus_dir, "embeddings.f32"), dtype=np.float32, mode="r",
+                        shape=(meta["count"], meta["dim"])
+                    )
+                else:
+                    matrix = np.zeros((0, 0), dtype=np.float32)
+                self._loaded[corpus_id] = (matrix, chunks)
+            return self._loaded[corpus_id]
+
+    def query(
+        self,
+        corpus_id: str,
+        query_text: str,
+        top_k: int,
+        vector_distance_threshold: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns the top_k chunks by cosine similarity to query_text.
+
+        Chunks whose cosine distance (1 - similarity) exceeds
+        vector_distance_threshold are dropped, mirroring the Vertex filter.
+        Each result carries "text", "source_uri" and "relevance_score"
+        (the cosine similarity).
+        """
+        _require_numpy()
+        matrix, chunks = self._load(corpus_id)
+        if not len(chunks) or top_k <= 0:
+            return []
+
+        query_vector = _normalize_rows(self.embedder.embed_query(query_text).astype(np.float32))
+        similarities = matrix @ query_vector
+
+        k = min(top_k, len(chunks))
+        candidates = np.argpartition(-similarities, k - 1)[:k]
+        ranked = candidates[np.argsort(-similarities[candidates])]
+
+        results = []
+        for index in ranked:
+            similarity = float(similarities[index])
+            if vector_distance_threshold is not None and 1.0 - similarity > vector_distance_threshold:
+                continue
+            results.append({
+                "text": chunks[index]["text"],
+                "source_uri": chunks[index].get("source_uri"),
+                "relevance_score": similarity
+            })
+        return results